@@ -0,0 +1,222 @@
+"""
+판정 기준 엔진 (Acceptance Criteria).
+
+PARAM DB 의 기준 문구(SST_Criteria · Detail_Linearity · Detail_Accuracy · Detail_Precision · Detail_LOQ)를 적재 시 1회 해석해
+지표별 Criterion(연산 · 한계값)으로 컴파일하고, 로그북 IF 수식 · 보고서 요약표/서술 · 노션 결과 반영이 모두 같은 기준을 쓴다.
+    criteria = compile_criteria(params)          # MethodParams / dict → CriteriaSet (문구가 없거나 해석할 수 없으면 기본 기준)
+    criteria["r2"].excel("C20")                  # 'C20>=0.99'  — 로그북 수식
+    criteria.judge(data)                         # [(항목, 기준, 결과, Pass/Fail/-)] — 보고서 요약표
+                                                 # 시스템 적합성은 로그북과 같이 Area · RT RSD 와 Tailing 을 함께 판정 (EXTRA_CHECKS)
+    evaluate(table, {method: criteria})          # 결과 표(행 = Run) 일괄 판정 — 노션 결과 반영 (batch close-out)
+
+문구 해석: "RSD ≤ 2.0%", "NMT 2.0", "2.0% 이하" → max / "R² ≥ 0.990", "NLT 10" → min / "80.0 ~ 120.0%", "≥ 80 and ≤ 120" → range.
+"RSD ≤ 2.0% (n ≥ 6)" 처럼 하한 ≥ 상한이 되는 구절은 지표 키워드에 가까운 한계만 쓴다.
+한 필드에 여러 기준이 있으면("LOD S/N ≥ 3, LOQ S/N ≥ 10") 지표 키워드가 있는 구절을 쓰고, 지표 범위를 벗어나는 값(R² ≥ 5 등)은 버린다.
+한계값은 모두 포함(≤ / ≥) 비교이다.
+"""
+import re
+
+import numpy as np
+
+from notion_records import Record
+
+# metric, 항목, PARAM 필드, 구절 키워드(정규식), 키워드 필수 여부, 기본 기준, 결과 표시, 허용 범위
+METRIC_SPECS = (
+    ("sst", "시스템 적합성", "SST_Criteria", r"RSD", False, "RSD ≤ 2.0%", "RSD {}%", (0, 100)),
+    ("sst_tailing", "시스템 적합성 (Tailing)", "SST_Criteria", r"TAIL|대칭", True, "Tailing ≤ 2.0", "Tailing {}", (0, 10)),
+    ("r2", "직선성", "Detail_Linearity", r"R\s*(²|2|\^2)|결정계수|R-?SQ", False, "R² ≥ 0.990", "R² = {}", (0, 1)),
+    ("acc_mean", "정확성", "Detail_Accuracy", r"회수율|RECOVERY|MEAN|평균", False, "80.0 ~ 120.0%", "Mean {}%", (0, 200)),
+    ("prec_rsd", "정밀성", "Detail_Precision", r"RSD", False, "RSD ≤ 2.0%", "RSD {}%", (0, 100)),
+    ("lod_sn", "검출한계 (LOD)", "Detail_LOQ", r"LOD|검출", True, "S/N ≥ 3", "S/N {}", (0, 1000)),
+    ("loq_sn", "정량한계 (LOQ)", "Detail_LOQ", r"LOQ|정량", False, "S/N ≥ 10", "S/N {}", (0, 1000)),
+)
+# 보고서 요약표 · 종합 판정(Result_Verdict) 항목
+REPORT_METRICS = ("sst", "r2", "acc_mean", "prec_rsd", "loq_sn")
+# 함께 판정하는 결과 키 (결과 키, 기준 metric, 결과 표시): 시스템 적합성은 로그북 F12 와 같이 Area · RT RSD 와 Tailing(1st Inj) 이 모두 적합해야 Pass
+EXTRA_CHECKS = {"sst": (("sst_rt", "sst", "RT RSD {}%"), ("sst_tailing", "sst_tailing", "Tailing {}"))}
+
+
+def _check_keys(metric): return ((metric, metric),) + tuple((k, m) for k, m, _ in EXTRA_CHECKS.get(metric, ()))
+_PERCENT = {"sst", "acc_mean", "prec_rsd"}
+
+
+# ---------------------------------------------------------
+# 문구 → (연산, 하한, 상한)
+# ---------------------------------------------------------
+_N = r"(\d+(?:\.\d+)?)"
+_MAX = re.compile(r"(?:≤|<=|=<|＜|<|NMT|NOT MORE THAN|MAX(?:IMUM)?\.?:?)\s*" + _N + r"|" + _N + r"\s*%?\s*(?:이하|미만)")
+_MIN = re.compile(r"(?:≥|>=|=>|＞|>|NLT|NOT LESS THAN|MIN(?:IMUM)?\.?:?)\s*" + _N + r"|" + _N + r"\s*%?\s*(?:이상|초과)")
+_RANGE = re.compile(_N + r"\s*%?\s*(?:~|∼|～|–|—|-|TO)\s*" + _N)
+
+
+def _first(m): return float(m.group(1) or m.group(2))
+
+
+def parse_limit(text, keyword=None):
+    """
+    기준 구절 → (op, lo, hi). op: "max" / "min" / "range", 해석할 수 없으면 None.
+    ≤ 와 ≥ 가 함께 있어도 하한 < 상한일 때만 range — 아니면("RSD ≤ 2.0% (n ≥ 6)") 지표 키워드에 가장 가까운 한계를 쓰고,
+    키워드가 없으면 해석하지 않는다 (기본 기준으로 대체).
+    """
+    s = str(text or "").upper()
+    hi = _MAX.search(s); lo = _MIN.search(s)
+    if hi and lo:
+        if _first(lo) < _first(hi): return "range", _first(lo), _first(hi)
+        kw = re.search(keyword, s) if keyword else None
+        if kw is None: return None
+        near = min((m for p in (_MAX, _MIN) for m in p.finditer(s)), key=lambda m: abs(m.start() - kw.start()))
+        return ("max", None, _first(near)) if near.re is _MAX else ("min", _first(near), None)
+    if hi: return "max", None, _first(hi)
+    if lo: return "min", _first(lo), None
+    r = _RANGE.search(s)
+    if r:
+        a, b = float(r.group(1)), float(r.group(2))
+        if a < b: return "range", a, b
+    return None
+
+
+def _clauses(text): return [c.strip() for c in re.split(r"[,;\n]", str(text or "")) if c.strip()]
+
+
+# ---------------------------------------------------------
+# 컴파일된 기준
+# ---------------------------------------------------------
+class Criterion(Record):
+    """지표 하나의 판정 기준. source: "PARAM"(노션 문구) / "default" """
+    __slots__ = ("metric", "label", "op", "lo", "hi", "text", "result_fmt", "source")
+
+    def __init__(self, metric, label, op, lo=None, hi=None, text="", result_fmt="{}", source="default"):
+        Record.__init__(self, metric, label, op, lo, hi, text, result_fmt, source)
+
+    @property
+    def short(self):
+        """'≤ 2.0%' / '≥ 0.990' / '80.0 ~ 120.0%'"""
+        unit = "%" if self.metric in _PERCENT else ""
+        if self.op == "max": return f"≤ {_fmt(self.hi)}{unit}"
+        if self.op == "min": return f"≥ {_fmt(self.lo)}{unit}"
+        return f"{_fmt(self.lo)} ~ {_fmt(self.hi)}{unit}"
+
+    def check(self, values):
+        """값 배열 → 적합 여부 bool 배열 (숫자가 아니면 False)"""
+        v = _as_float(values)
+        with np.errstate(invalid="ignore"):
+            if self.op == "max": return v <= self.hi
+            if self.op == "min": return v >= self.lo
+            return (v >= self.lo) & (v <= self.hi)
+
+    def verdict(self, values):
+        """값 배열 → "Pass" / "Fail" / "-"(결측 · N/A) 배열"""
+        v = _as_float(values)
+        return np.where(np.isnan(v), "-", np.where(self.check(v), "Pass", "Fail"))
+
+    def passes(self, value): return bool(self.check([value])[0])
+
+    def excel(self, cell):
+        """엑셀 IF 조건식"""
+        if self.op == "max": return f"{cell}<={self.hi:g}"
+        if self.op == "min": return f"{cell}>={self.lo:g}"
+        return f"AND({cell}>={self.lo:g}, {cell}<={self.hi:g})"
+
+
+def _fmt(v): return f"{v:.1f}" if v == int(v) else f"{v:g}"
+
+
+def _as_float(values):
+    try: return np.asarray(values, dtype=float)
+    except (TypeError, ValueError): pass        # "N/A" · None 이 섞인 object 배열
+    out = np.full(len(values), np.nan)
+    for i, v in enumerate(values):
+        try: out[i] = float(v)
+        except (TypeError, ValueError): pass
+    return out
+
+
+class CriteriaSet:
+    """Method 하나의 지표별 기준 (읽기 전용, 세션 간 공유)"""
+    __slots__ = ("_items",)
+
+    def __init__(self, criteria): object.__setattr__(self, "_items", {c.metric: c for c in criteria})
+
+    def __setattr__(self, name, value): raise AttributeError("CriteriaSet 는 읽기 전용입니다")
+
+    def __getitem__(self, metric): return self._items[metric]
+
+    def __iter__(self): return iter(self._items.values())
+
+    def __reduce__(self): return (CriteriaSet, (tuple(self._items.values()),))
+
+    def check(self, metric, table):
+        """지표 판정 배열 — EXTRA_CHECKS 의 결과 키까지 함께 판정 (table: 결과 dict 또는 DataFrame 의 열 → 값 배열)"""
+        return _combine([self._items[m].verdict(table[k]) for k, m in _check_keys(metric) if k in table])
+
+    def judge(self, data, metrics=REPORT_METRICS):
+        """결과 dict → [(항목, 기준 문구, 결과 문자열, Pass/Fail/-)]"""
+        out = []
+        for m in metrics:
+            c = self._items[m]; text = c.text; result = c.result_fmt.format(data.get(m, "N/A"))
+            extra = [(k, cm, fmt) for k, cm, fmt in EXTRA_CHECKS.get(m, ()) if data.get(k, "N/A") != "N/A"]
+            if extra:
+                text += "".join(f", {self._items[cm].text}" for _, cm, _ in extra if cm != m)
+                result += f" ({', '.join(fmt.format(data[k]) for k, _, fmt in extra)})"
+            out.append((c.label, text, result, str(self.check(m, {k: [v] for k, v in data.items()})[0])))
+        return out
+
+    def verdict(self, data, metrics=REPORT_METRICS):
+        """종합 판정: 하나라도 Fail → Fail, 판정된 항목이 있으면 Pass, 모두 결측이면 '-'"""
+        return str(_combine([self.check(m, {k: [v] for k, v in data.items()}) for m in metrics])[0])
+
+
+def _combine(verdicts):
+    """판정 배열 목록 → 하나라도 Fail 이면 Fail, 판정된 항목이 있으면 Pass, 모두 결측이면 '-'"""
+    if not verdicts: return np.array(["-"])
+    v = np.stack(verdicts)
+    return np.where((v == "Fail").any(0), "Fail", np.where((v == "Pass").any(0), "Pass", "-"))
+
+
+def _compile_one(spec, text):
+    metric, label, _, keyword, strict, default, result_fmt, (low, high) = spec
+    clauses = _clauses(text)
+    matched = [c for c in clauses if re.search(keyword, c.upper())]
+    for clause in matched or ([] if strict else clauses):
+        parsed = parse_limit(clause, keyword)
+        if parsed is None: continue
+        op, lo, hi = parsed
+        if all(v is None or low <= v <= high for v in (lo, hi)):
+            return Criterion(metric, label, op, lo, hi, clause, result_fmt, "PARAM")
+    op, lo, hi = parse_limit(default)
+    return Criterion(metric, label, op, lo, hi, default, result_fmt, "default")
+
+
+def compile_criteria(params=None):
+    """PARAM 기준 문구 → CriteriaSet. 적재 시 1회 (load_param_catalog) 호출한다."""
+    params = params or {}
+    return CriteriaSet(_compile_one(spec, params.get(spec[2]) or "") for spec in METRIC_SPECS)
+
+
+DEFAULT_CRITERIA = compile_criteria()
+
+
+# ---------------------------------------------------------
+# 일괄 판정
+# ---------------------------------------------------------
+def evaluate(table, criteria, method_col="method", metrics=REPORT_METRICS):
+    """
+    table: 결과 DataFrame (행 = Run, 열 = 지표). criteria: CriteriaSet 또는 {method: CriteriaSet} (없는 Method 는 기본 기준).
+    반환: 지표별 판정 열 + "Verdict" 열 DataFrame (table 과 같은 index). Method 별로 묶어 지표마다 배열 비교 1회.
+    """
+    import pandas as pd
+    out = pd.DataFrame("-", index=table.index, columns=[*metrics, "Verdict"])
+    if table.empty: return out
+    if isinstance(criteria, CriteriaSet): groups = [(criteria, np.arange(len(table)))]
+    else:
+        codes, methods = pd.factorize(table[method_col])
+        groups = [(criteria.get(m, DEFAULT_CRITERIA), np.flatnonzero(codes == i)) for i, m in enumerate(methods)]
+    verdicts = np.full((len(table), len(metrics)), "-", dtype=object)
+    keys = {k for m in metrics for k, _ in _check_keys(m) if k in table}
+    for cs, rows in groups:
+        cols = {k: table[k].to_numpy()[rows] for k in keys}
+        for j, m in enumerate(metrics):
+            if m in table: verdicts[rows, j] = cs.check(m, cols)
+    out[list(metrics)] = verdicts
+    out["Verdict"] = np.where((verdicts == "Fail").any(1), "Fail", np.where((verdicts == "Pass").any(1), "Pass", "-"))
+    return out
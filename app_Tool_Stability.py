@@ -1,37 +1,18 @@
 import streamlit as st
 import pandas as pd
-import requests
-import xlsxwriter
-from io import BytesIO
+from notion_api import NotionUnavailable, data_as_of, swr_get
 from datetime import datetime, timedelta
+from cmc_docs import STABILITY_CONDITIONS, create_stability_excel, load_stability_catalog, stability_targets
+from notion_records import IndexedFrame
+from shelf_life import estimate_shelf_life, read_stability_results, shelf_life_matrix
 
 st.set_page_config(page_title="AtheraCLOUD Stability Planner", layout="wide")
 
 # 1. Notion 데이터 호출 (기존 로직 활용)
-@st.cache_data(ttl=60)
 def fetch_notion_data(database_id, token):
-    url = f"https://api.notion.com/v1/databases/{database_id}/query"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    response = requests.post(url, headers=headers)
-    if response.status_code != 200: return pd.DataFrame()
-    results = response.json().get("results", [])
-    data = []
-    for page in results:
-        props = page.get("properties", {})
-        row = {}
-        for key, val in props.items():
-            p_type = val.get("type")
-            if p_type == "title": row[key] = val["title"][0]["plain_text"] if val["title"] else ""
-            elif p_type in ["rich_text", "select"]:
-                if p_type == "select": row[key] = val["select"]["name"] if val["select"] else ""
-                else: row[key] = val["rich_text"][0]["plain_text"] if val["rich_text"] else ""
-            else: row[key] = str(val.get(p_type, ""))
-        data.append(row)
-    return pd.DataFrame(data)
+    # Stale-While-Revalidate: 마지막 정상 데이터를 즉시 반환, DB 가 바뀌었을 때만 백그라운드 재조회 후 교체
+    # 안정성 시험 대상 행 · 필요한 속성만 노션에서 걸러 받는다 (cmc_docs.load_stability_catalog — 서버 측 필터 · filter_properties)
+    return swr_get(database_id, token, load_stability_catalog)
 
 # --- UI 설정 ---
 st.title("📉 Tool 4: Stability Study Protocol Planner")
@@ -41,66 +22,52 @@ st.markdown("ICH Q1A(R2) 기반의 안정성 시험 매트릭스를 자동으로
 st.sidebar.header("❄️ Storage Conditions")
 conditions = st.sidebar.multiselect(
     "보관 조건 선택",
-    ["Long-term (5°C ± 3°C)", "Accelerated (25°C / 60% RH)", "Stress (40°C / 75% RH)"],
-    default=["Long-term (5°C ± 3°C)", "Accelerated (25°C / 60% RH)"]
+    STABILITY_CONDITIONS,
+    default=STABILITY_CONDITIONS[:2]
 )
 start_date = st.sidebar.date_input("안정성 시험 착수일", datetime(2026, 8, 1))
 
 # 데이터 로드
 try:
-    df = fetch_notion_data(st.secrets["NOTION_DB_ID"], st.secrets["NOTION_TOKEN"])
+    db_id, token = st.secrets["NOTION_DB_ID"], st.secrets["NOTION_TOKEN"]
+    catalog = fetch_notion_data(db_id, token)
+except NotionUnavailable:
+    catalog = IndexedFrame(pd.DataFrame())
 except:
     st.error("Secrets 설정을 확인해주세요.")
     st.stop()
+if data_as_of(db_id): st.caption(f"🕒 데이터 기준: {data_as_of(db_id):%Y-%m-%d %H:%M:%S}")
 
-if not df.empty:
-    # 안정성 지시력이 있는 항목만 필터링
-    stab_df = df[df['Stability-indicating'].str.lower().isin(['yes', 'partial'])]
+# 2. 안정성 결과 분석 (ICH Q1E) — 업로드한 시점 결과로 (조건 × 항목) 전체 유효기간을 한 번에 추정
+with st.expander("📈 안정성 결과 분석 · 유효기간 추정 (ICH Q1E)"):
+    st.caption("열: Lot · Condition · Attribute · Timepoint(T0, 3M …) · Result · LSL / USL — 규격이 한쪽이면 단측 95%, 양쪽이면 양측 95% 신뢰한계")
+    results_file = st.file_uploader("안정성 결과 (CSV / XLSX)", type=["csv", "xlsx"])
+    analysis = None
+    if results_file:
+        # 같은 파일이면 rerun 마다 다시 계산하지 않는다
+        cached = st.session_state.get("_shelf_life")
+        if cached is None or cached[0] != results_file.file_id:
+            try: result = estimate_shelf_life(read_stability_results(results_file))
+            except Exception as e: result = str(e)
+            cached = st.session_state["_shelf_life"] = (results_file.file_id, result)
+        if isinstance(cached[1], str): st.error(f"결과 파일을 읽을 수 없습니다: {cached[1]}")
+        else:
+            analysis = cached[1]
+            st.success(f"{int(analysis['N'].sum()):,} 개 결과 · {len(analysis)} 개 (조건 × 항목) 분석 완료")
+            st.dataframe(shelf_life_matrix(analysis), use_container_width=True)
+            st.dataframe(analysis, use_container_width=True, hide_index=True)
+
+if not catalog.empty:
+    # 안정성 지시력이 있는 항목만 (적재 시 만든 색인)
+    stab_df = stability_targets(catalog)
     st.success(f"🟢 노션에서 {len(stab_df)}개의 안정성 시험 대상 항목을 확인했습니다.")
     st.dataframe(stab_df[['Category', 'Method', 'Stability-indicating']], use_container_width=True)
 
-    def create_stability_excel(dataframe, conds, start_dt):
-        output = BytesIO()
-        workbook = xlsxwriter.Workbook(output)
-        
-        # 스타일 설정
-        header_fmt = workbook.add_format({'bold': True, 'bg_color': '#4472C4', 'font_color': 'white', 'border': 1, 'align': 'center'})
-        cell_fmt = workbook.add_format({'border': 1, 'align': 'center'})
-        mark_fmt = workbook.add_format({'bg_color': '#E2EFDA', 'border': 1, 'align': 'center', 'bold': True})
-
-        # 각 보관 조건별 시트 생성
-        for cond in conds:
-            sheet_name = cond.split(' (')[0]
-            sheet = workbook.add_worksheet(sheet_name)
-            
-            # 헤더: 시험 항목 및 주차(Timepoints)
-            headers = ['Category', 'Method', 'Attribute']
-            timepoints = ['T0', '1M', '3M', '6M', '9M', '12M', '18M', '24M']
-            
-            for c, h in enumerate(headers + timepoints):
-                sheet.write(0, c, h, header_fmt)
-                sheet.set_column(c, c, 12)
-
-            # 데이터 작성
-            for r, (_, row) in enumerate(dataframe.iterrows(), start=1):
-                sheet.write(r, 0, str(row.get('Category', '')), cell_fmt)
-                sheet.write(r, 1, str(row.get('Method', '')), cell_fmt)
-                sheet.write(r, 2, str(row.get('Attribute', '')), cell_fmt)
-                
-                # 시험 주기별 체크 표시 (자동 매트릭스)
-                for c in range(len(timepoints)):
-                    # 가속 조건(Accelerated)은 통상 6개월까지만 표시하는 로직 등 추가 가능
-                    if "Accelerated" in cond and c > 3: # 6M(index 3) 이후는 제외
-                        sheet.write(r, 3 + c, "-", cell_fmt)
-                    else:
-                        sheet.write(r, 3 + c, "X", mark_fmt)
-
-        workbook.close()
-        return output.getvalue()
-
     if st.button("📊 안정성 시험 매트릭스(Excel) 추출"):
-        excel_file = create_stability_excel(stab_df, conditions, start_date)
+        excel_file = create_stability_excel(stab_df, conditions, start_date, analysis)
         st.download_button("💾 Protocol_Draft.xlsx 다운로드", excel_file, "Stability_Protocol.xlsx")
 
 else:
-    st.warning("안정성 시험 대상 데이터를 찾을 수 없습니다.")
\ No newline at end of file
+    st.warning("안정성 시험 대상 데이터를 찾을 수 없습니다.")
+    if analysis is not None:
+        st.download_button("💾 Shelf-life 분석(Excel) 다운로드", create_stability_excel(pd.DataFrame(), conditions, start_date, analysis), "Stability_Shelf_Life.xlsx")
\ No newline at end of file
@@ -1,77 +1,112 @@
 import streamlit as st
 import pandas as pd
-from docx import Document
-from docx.shared import Pt, Inches, RGBColor
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.oxml.ns import qn
-from docx.oxml import OxmlElement
 import io
+import json
+import os
 from datetime import datetime
+from functools import partial
+from doc_content import heading, paragraph, bullets, table, render_html, write_docx
+
+# python-docx 는 계획서 생성 시점에만 import 한다 (Lazy Import)
 
 # ==========================================
 # 1. Notion Master Blueprint 기반 지식 베이스
 # ==========================================
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "characterization_catalog.json")
+CATALOG_COLUMNS = ["Category", "Attribute", "Method", "Tier", "Rationale", "Dev_Strategy"]
+SELECT_COL = '선택 (Select)'
+
+class CharacterizationCatalog:
+    """
+    노션 03_Analytical_Library 를 버전 관리된 데이터 파일로 내보낸 마스터 카탈로그.
+    언어·분류(Category)·Tier 별 인덱스를 한 번만 만들고 모든 세션이 공유한다 (읽기 전용).
+    """
+    def __init__(self, payload):
+        self.version = payload.get("version", "")
+        self.records = {}      # lang -> [row dict]
+        self.frames = {}       # lang -> DataFrame (data_editor 토글 시 재생성하지 않음)
+        self.editor_frames = {}  # lang -> 선택 체크박스 컬럼이 붙은 편집용 DataFrame
+        self.by_category = {}  # (lang, category) -> [row 위치]
+        self.by_tier = {}      # (lang, tier) -> [row 위치]
+        for lang, rows in payload.get("methods", {}).items():
+            self.records[lang] = rows
+            self.frames[lang] = pd.DataFrame(rows, columns=CATALOG_COLUMNS)
+            self.editor_frames[lang] = self.frames[lang].copy()
+            self.editor_frames[lang].insert(0, SELECT_COL, True)
+            for i, row in enumerate(rows):
+                self.by_category.setdefault((lang, row.get("Category", "")), []).append(i)
+                self.by_tier.setdefault((lang, row.get("Tier", "")), []).append(i)
+
+    def categories(self, lang): return [c for (l, c) in self.by_category if l == lang]
+
+    def tiers(self, lang): return [t for (l, t) in self.by_tier if l == lang]
+
+    def select(self, lang, categories=None, tiers=None, editor=False):
+        """인덱스 교집합으로 행을 고른다 (전체 스캔 없음). 조건이 없으면 전체 프레임을 그대로 반환."""
+        frames = self.editor_frames if editor else self.frames
+        frame = frames.get(lang, pd.DataFrame(columns=([SELECT_COL] if editor else []) + CATALOG_COLUMNS))
+        if not categories and not tiers: return frame
+        pos = set(range(len(frame)))
+        if categories: pos &= {i for c in categories for i in self.by_category.get((lang, c), [])}
+        if tiers: pos &= {i for t in tiers for i in self.by_tier.get((lang, t), [])}
+        return frame.iloc[sorted(pos)]
+
+@st.cache_resource
+def load_catalog(path, mtime):
+    # mtime 을 캐시 키에 포함 → 데이터 파일이 교체(버전 업)되면 자동으로 다시 로드
+    with open(path, encoding="utf-8") as f:
+        return CharacterizationCatalog(json.load(f))
+
+def get_catalog():
+    path = CATALOG_PATH
+    try: path = st.secrets.get("CHAR_CATALOG_PATH", CATALOG_PATH)
+    except Exception: pass
+    return load_catalog(path, os.path.getmtime(path))
+
 def get_notion_master_db(lang_code):
     """
     노션 라이브러리의 03_Analytical_Library 로직을 반영한 마스터 DB
     """
-    if lang_code == "KR":
-        return [
-            {"Category": "1. 구조적 특성", "Attribute": "1차 구조 (아미노산 서열)", "Method": "Peptide Mapping (LC-MS/MS)", "Tier": "필수 (Tier 1)", "Rationale": "아미노산 서열 일치성 및 PTM 확인 필수", "Dev_Strategy": "Trypsin 소화 효율 최적화 및 Coverage 95% 이상 확보 전략."},
-            {"Category": "1. 구조적 특성", "Attribute": "당쇄 프로파일 (N-Glycan)", "Method": "HILIC-FLD / MS", "Tier": "필수 (Tier 1)", "Rationale": "면역원성 및 이펙터 기능(ADCC) 영향 분석", "Dev_Strategy": "2-AB 라벨링 효율 및 주요 당쇄(G0F, G1F 등) 분리능 최적화."},
-            {"Category": "2. 물리화학적 성질", "Attribute": "전하 변이체 (Charge Variants)", "Method": "CEX-HPLC / cIEF", "Tier": "필수 (Tier 1)", "Rationale": "단백질 안정성 및 불순물 프로파일 확인", "Dev_Strategy": "pH Gradient를 이용한 Acidic/Basic 변이체 분리능 극대화."},
-            {"Category": "2. 물리화학적 성질", "Attribute": "크기 변이체 (응집체)", "Method": "SEC-HPLC", "Tier": "필수 (Tier 1)", "Rationale": "단백질 응집에 따른 안전성 위험 관리", "Dev_Strategy": "비특이적 결합 방지를 위한 이동상 염 농도 및 유속 최적화."},
-            {"Category": "3. 생물학적 활성", "Attribute": "결합 역가 (Binding Affinity)", "Method": "SPR (Biacore) / ELISA", "Tier": "필수 (Tier 1)", "Rationale": "항원-항체 결합력(KD) 및 특이성 입증", "Dev_Strategy": "Chip 표면 고정화 농도 최적화 및 Kinetics 분석 정밀도 확보."},
-        ]
-    else:
-        return [
-            {"Category": "1. Structural", "Attribute": "Primary Structure", "Method": "Peptide Mapping (LC-MS/MS)", "Tier": "Tier 1", "Rationale": "Sequence confirmation and PTM site mapping", "Dev_Strategy": "Optimize digestion and target >95% sequence coverage."},
-            {"Category": "1. Structural", "Attribute": "Glycan Profile (N-linked)", "Method": "HILIC-FLD / MS", "Tier": "Tier 1", "Rationale": "Impact on immunogenicity and ADCC activity", "Dev_Strategy": "Maximize labeling efficiency and resolve major glycoforms."},
-            {"Category": "2. Physicochemical", "Attribute": "Charge Variants", "Method": "CEX-HPLC / cIEF", "Tier": "Tier 1", "Rationale": "Assessment of stability and variant profile", "Dev_Strategy": "Optimize pH gradient for acidic/basic peak resolution."},
-            {"Category": "2. Physicochemical", "Attribute": "Size Variants (Aggregates)", "Method": "SEC-HPLC", "Tier": "Tier 1", "Rationale": "Safety risk management for protein aggregation", "Dev_Strategy": "Screen mobile phase salt concentration to prevent non-specific binding."},
-            {"Category": "3. Biological", "Attribute": "Binding Affinity", "Method": "SPR (Biacore) / ELISA", "Tier": "Tier 1", "Rationale": "Demonstrate antigen-antibody binding (KD)", "Dev_Strategy": "Optimize ligand density and ensure kinetic data quality."},
-        ]
+    return get_catalog().records.get(lang_code, [])
 
 # ==========================================
 # 2. 문서 생성 엔진
 # ==========================================
 def set_cell_background(cell, color_hex):
+    from docx.oxml.ns import qn
+    from docx.oxml import OxmlElement
     shd = OxmlElement('w:shd')
     shd.set(qn('w:val'), 'clear')
     shd.set(qn('w:color'), 'auto')
     shd.set(qn('w:fill'), color_hex)
     cell._element.get_or_add_tcPr().append(shd)
 
+def build_plan_content(product_name, phase, selected_df, lang):
+    """종합계획서 중간 표현 (미리보기 HTML 과 DOCX 가 공유)"""
+    title = "의약품 특성분석 종합 계획서" if lang == "KR" else "Comprehensive Characterization Plan"
+    headers = ["분류", "항목", "시험법", "선정근거"] if lang == "KR" else ["Category", "Attribute", "Method", "Rationale"]
+    rows = list(selected_df[['Category', 'Attribute', 'Method', 'Rationale', 'Dev_Strategy']].itertuples(index=False, name=None))
+    return [
+        {"type": "title", "text": title, "as_heading": True},
+        heading("1. 개요 (Project Overview)"),
+        paragraph(f"제품명: {product_name} / 개발 단계: {phase}"),
+        heading("2. 시험 항목 및 선정 근거 (Test Items & Rationale)"),
+        table(headers, [r[:4] for r in rows]),
+        heading("3. 개발 전략 (Development Strategy)"),
+        bullets((f"{r[2]}: ", r[4]) for r in rows),
+    ]
+
 def generate_plan_report(product_name, phase, selected_df, lang):
+    from docx import Document
+    from docx.oxml.ns import qn
     doc = Document()
     font_name = 'Malgun Gothic' if lang == "KR" else 'Arial'
     style = doc.styles['Normal']
     style.font.name = font_name
     if lang == "KR": style._element.rPr.rFonts.set(qn('w:eastAsia'), font_name)
-    
-    title = "의약품 특성분석 종합 계획서" if lang == "KR" else "Comprehensive Characterization Plan"
-    doc.add_heading(title, 0).alignment = WD_ALIGN_PARAGRAPH.CENTER
-    
-    doc.add_heading("1. 개요 (Project Overview)", level=1)
-    doc.add_paragraph(f"제품명: {product_name} / 개발 단계: {phase}")
-
-    doc.add_heading("2. 시험 항목 및 선정 근거 (Test Items & Rationale)", level=1)
-    table = doc.add_table(rows=1, cols=4, style='Table Grid')
-    headers = ["분류", "항목", "시험법", "선정근거"] if lang == "KR" else ["Category", "Attribute", "Method", "Rationale"]
-    for i, h in enumerate(headers):
-        cell = table.cell(0, i)
-        cell.text = h
-        set_cell_background(cell, 'E7E6E6')
-
-    for _, row in selected_df.iterrows():
-        cells = table.add_row().cells
-        cells[0].text, cells[1].text, cells[2].text, cells[3].text = row['Category'], row['Attribute'], row['Method'], row['Rationale']
 
-    doc.add_heading("3. 개발 전략 (Development Strategy)", level=1)
-    for _, row in selected_df.iterrows():
-        p = doc.add_paragraph(style='List Bullet')
-        p.add_run(f"{row['Method']}: ").bold = True
-        p.add_run(row['Dev_Strategy'])
+    write_docx(doc, build_plan_content(product_name, phase, selected_df, lang),
+               style_header_cell=lambda cell: set_cell_background(cell, 'E7E6E6'), list_style='List Bullet')
 
     bio = io.BytesIO()
     doc.save(bio)
@@ -94,9 +129,10 @@ def main():
     st.header(f"🧪 {lang_code} 특성분석 엔진 (Characterization Engine)")
     st.info("노션 마스터 블루프린트 로직 기반 종합 계획서 생성 시스템")
 
-    # 원본 데이터 로드
-    db_list = get_notion_master_db(lang_code)
-    master_df = pd.DataFrame(db_list)
+    # 원본 데이터 로드 (세션 공유 카탈로그 → rerun 마다 재생성하지 않음)
+    catalog = get_catalog()
+    master_df = catalog.select(lang_code)
+    st.caption(f"📚 Catalog v{catalog.version} · {len(master_df)} methods")
     
     # 탭 구성
     tab1, tab2, tab3 = st.tabs(["📋 종합계획서 (Summary Plan)", "🔬 시험항목 선정 (Decision)", "💡 개발 가이드 (Strategy)"])
@@ -104,18 +140,20 @@ def main():
     # [Step 1] 항목 선정 (Tab 2)
     with tab2:
         st.subheader("시험 항목 선정 (Method Decision)")
-        # 체크박스 선택용 데이터프레임 생성
-        display_df = master_df.copy()
-        display_df.insert(0, '선택 (Select)', True)
+        fc1, fc2 = st.columns(2)
+        with fc1: sel_cats = st.multiselect("분류 필터 (Category)", catalog.categories(lang_code))
+        with fc2: sel_tiers = st.multiselect("Tier 필터", catalog.tiers(lang_code))
+        # 체크박스 선택용 데이터프레임 (카탈로그에 미리 만들어 둔 편집용 프레임을 인덱스로 조회)
+        display_df = catalog.select(lang_code, sel_cats, sel_tiers, editor=True)
         
         edited_df = st.data_editor(
-            display_df[['선택 (Select)', 'Category', 'Attribute', 'Method', 'Rationale']], 
+            display_df[[SELECT_COL, 'Category', 'Attribute', 'Method', 'Rationale']], 
             use_container_width=True, 
             hide_index=True
         )
         
         # 사용자가 선택한 행의 'Attribute' 리스트 추출
-        selected_attributes = edited_df[edited_df['선택 (Select)'] == True]['Attribute'].tolist()
+        selected_attributes = edited_df[edited_df[SELECT_COL] == True]['Attribute'].tolist()
         # 원본 데이터에서 선택된 행만 필터링 (에러 방지 핵심)
         selected_df = master_df[master_df['Attribute'].isin(selected_attributes)].copy()
 
@@ -123,12 +161,13 @@ def main():
     with tab1:
         st.subheader("종합계획서 미리보기 (Master Plan Preview)")
         if not selected_df.empty:
-            st.dataframe(selected_df[['Category', 'Attribute', 'Method']], use_container_width=True, hide_index=True)
+            # 미리보기는 중간 표현을 HTML 로만 렌더링 (DOCX 생성 없음)
+            with st.container(border=True):
+                st.markdown(render_html(build_plan_content(product_name, phase, selected_df, lang_code)), unsafe_allow_html=True)
             
-            # 리포트 파일 생성
-            doc_file = generate_plan_report(product_name, phase, selected_df, lang_code)
+            # 리포트 파일 생성 (다운로드 클릭 시점에 생성 → 첫 화면에서 python-docx 로드 안 함)
+            doc_file = partial(generate_plan_report, product_name, phase, selected_df, lang_code)
             
-            st.success("종합 계획서 생성이 완료되었습니다.")
             st.download_button(
                 label=f"📥 {lang_code} 종합계획서 다운로드 (.docx)",
                 data=doc_file,
@@ -1,35 +1,16 @@
 import streamlit as st
 import pandas as pd
-import requests
-import xlsxwriter
+from notion_api import NotionUnavailable, data_as_of, swr_get
+from cmc_docs import category_column, load_cmc_catalog
+from notion_records import IndexedFrame
 from io import BytesIO
 from datetime import datetime, timedelta
 
 # --- 1. Notion API 및 데이터 호출 (기존 로직 유지) ---
-@st.cache_data(ttl=60)
 def fetch_notion_data(database_id, token):
-    url = f"https://api.notion.com/v1/databases/{database_id}/query"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    response = requests.post(url, headers=headers)
-    if response.status_code != 200: return pd.DataFrame()
-    results = response.json().get("results", [])
-    data = []
-    for page in results:
-        props = page.get("properties", {})
-        row = {}
-        for key, val in props.items():
-            p_type = val.get("type")
-            if p_type == "title": row[key] = val["title"][0]["plain_text"] if val["title"] else ""
-            elif p_type in ["rich_text", "select"]:
-                if p_type == "select": row[key] = val["select"]["name"] if val["select"] else ""
-                else: row[key] = val["rich_text"][0]["plain_text"] if val["rich_text"] else ""
-            else: row[key] = str(val.get(p_type, ""))
-        data.append(row)
-    return pd.DataFrame(data)
+    # Stale-While-Revalidate: 마지막 정상 데이터를 즉시 반환, DB 가 바뀌었을 때만 백그라운드 재조회 후 교체
+    # 분류 · 안정성 열 정규화와 그룹 색인은 적재 시 1회 (cmc_docs.load_cmc_catalog, 세 도구 앱 공유)
+    return swr_get(database_id, token, load_cmc_catalog)
 
 # --- 2. UI 설정 및 전략 파라미터 ---
 st.title("🎯 Tool 2: Strategic CMC Master Scheduler")
@@ -41,15 +22,20 @@ prod_date = st.sidebar.date_input("임상 시료 생산 예정일 (Clinical Batc
 
 # 노션 데이터 로드
 try:
-    df = fetch_notion_data(st.secrets["NOTION_DB_ID"], st.secrets["NOTION_TOKEN"])
+    db_id, token = st.secrets["NOTION_DB_ID"], st.secrets["NOTION_TOKEN"]
+    catalog = fetch_notion_data(db_id, token)
+except NotionUnavailable:
+    catalog = IndexedFrame(pd.DataFrame())
 except:
     st.error("Secrets 설정을 확인해주세요.")
     st.stop()
+if data_as_of(db_id): st.caption(f"🕒 데이터 기준: {data_as_of(db_id):%Y-%m-%d %H:%M:%S}")
 
-if not df.empty:
+if not catalog.empty:
     st.success(f"🟢 {dev_stage} 맞춤형 마일스톤 연동 완료")
     
-    def generate_master_gantt(dataframe, start_date, clinical_prod_date, stage):
+    def generate_master_gantt(catalog, start_date, clinical_prod_date, stage):
+        import xlsxwriter
         output = BytesIO()
         workbook = xlsxwriter.Workbook(output)
         sheet = workbook.add_worksheet('CMC_Master_Roadmap')
@@ -87,8 +73,8 @@ if not df.empty:
         row += 2
 
         # --- [SECTION 2: Analytical Methods & Stability] ---
-        cat_col = "Method Category" if "Method Category" in df.columns else "Category"
-        for _, item in dataframe.iterrows():
+        cat_col = category_column(catalog)
+        for (_, item), is_stab in zip(catalog.frame.iterrows(), catalog.flags("stability", True)):
             m_name = item['Method']
             # 개발 일정
             sheet.write(row, 0, item[cat_col])
@@ -102,7 +88,7 @@ if not df.empty:
             row += 1
             
             # 안정성 시험 (생산 직후 착수)
-            if str(item['Stability-indicating']).lower() in ['yes', 'partial']:
+            if is_stab:
                 sheet.write(row, 1, f"{m_name} Stability Study (Long-term/Accel)")
                 for w in range(prod_week, prod_week + 24): # 최소 6개월 표시
                     if 3 + w < 55: sheet.write(row, 3 + w, "", fmt_stab)
@@ -113,5 +99,5 @@ if not df.empty:
         return output.getvalue()
 
     if st.button("📊 전략 마스터 로드맵(Excel) 생성"):
-        excel_file = generate_master_gantt(df, base_date, prod_date, dev_stage)
+        excel_file = generate_master_gantt(catalog, base_date, prod_date, dev_stage)
         st.download_button("💾 엑셀 다운로드", excel_file, f"CMC_Master_Roadmap_{dev_stage}.xlsx")
\ No newline at end of file
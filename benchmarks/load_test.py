@@ -0,0 +1,282 @@
+"""
+동시 세션 부하 테스트: 로컬 노션 스텁(notion_stub.py) 위에서 Streamlit AppTest 세션 N 개가 실제 사용 흐름을 동시에 반복한다.
+
+    python benchmarks/load_test.py                                  # 동시 세션 1, 5, 10, 20 단계별 측정
+    python benchmarks/load_test.py --sessions 8 --iterations 3 --think-ms 500 --latency-ms 150
+    python benchmarks/load_test.py --flow tool --sessions 1,10 --json result.json
+
+흐름 (--flow validation, app.py): 최초 로딩 → Protocol 선택 → Stock 농도 · 바이알 부피 입력 → Logbook 생성
+→ 작성된 Logbook 업로드 → Lot 입력 · 결과 저장. (--flow tool, app_tool_1.py): 로딩 → CTD Word 생성.
+단계마다 rerun 지연을 기록해 p50 / p95 / p99, 처리량(rerun/s), 프로세스 RSS 증가량, 노션 요청 수를 보고한다.
+
+- 세션은 한 프로세스 안의 스레드로 실행되므로 한 Pod(프로세스)가 세션을 나눠 갖는 실제 구조와 같이 GIL · 공용 캐시를 공유한다.
+- AppTest 는 위젯 변경 시 st.fragment 구간만이 아니라 스크립트 전체를 다시 실행하므로 측정값은 상한(보수적 추정)이다.
+- 측정 전 세션 1개로 흐름을 한 번 실행해 노션 캐시(SWR)를 채운다 (운영 중인 Pod 기준). --cold 이면 생략.
+- 측정 전 사전 점검: CDS 피크 테이블 → Logbook(재계산 전) → 추출 왕복 결과가 CDS 직접 계산과 같은지,
+  PARAM 기준 문구(≤ · ≥ 혼재 구절 포함)가 의도한 기준으로 컴파일되는지 확인한다.
+- p95 가 --budget-ms 를 넘거나 스크립트 예외 · 사전 점검 불일치가 발생하면 종료 코드 1 을 반환한다.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT); sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from notion_stub import DB_IDS, NotionStub
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def rss_mb():
+    """현재 RSS (Linux /proc, 그 외에는 최대 RSS)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"): return int(line.split()[1]) / 1024.0
+    except OSError: pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def fill_logbook(data, seed=0, slope=1000.0):
+    """Logbook 템플릿에 재현 가능한 측정값(SST · 직선성 · 정확성 · 정밀성 · S/N)을 채운다"""
+    import openpyxl
+    rnd = random.Random(seed)
+    wb = openpyxl.load_workbook(io.BytesIO(data))
+    ws = wb['2. SST']
+    for r in range(3, 9): ws.cell(r, 2, 5.0 + rnd.gauss(0, .01)); ws.cell(r, 3, 1000 + rnd.gauss(0, 5)); ws.cell(r, 5, 1.1)
+    for row in wb['4. Linearity'].iter_rows():
+        v = row[0].value
+        if isinstance(v, str) and v.startswith("■ Summary"): break
+        if isinstance(v, str) and v.endswith('%') and v[:-1].isdigit(): row[2].value = slope * int(v[:-1]) / 100 + rnd.gauss(0, 3)
+    lvl = None
+    for row in wb['5. Accuracy'].iter_rows():
+        v = row[0].value
+        if isinstance(v, str) and v.startswith('■ Level'): lvl = int(v.split()[2].rstrip('%'))
+        elif lvl and v in (1, 2, 3): row[2].value = slope * lvl / 100 * (1 + rnd.gauss(0, .01))
+    ws = wb['6. Precision']
+    for r in range(5, 11): ws.cell(r, 3, 100 + rnd.gauss(0, 1))
+    ws = wb['8. LOD_LOQ']; ws['B3'] = 35; ws['C3'] = 10; ws['B4'] = 130; ws['C4'] = 10
+    out = io.BytesIO(); wb.save(out); return out.getvalue()
+
+
+
+def peak_table(seed=0, slope=1000.0):
+    """SST · 직선성 · 정확성 시퀀스의 CDS 피크 테이블(TSV) — 재현 가능한 주 피크 값"""
+    rnd = random.Random(seed)
+    seq = [(f"SST-{i}", 100) for i in range(1, 7)] + [(f"LIN-R{r}-{l}", l) for r in (1, 2, 3) for l in (80, 90, 100, 110, 120)]
+    seq += [(f"ACC-{l}-{r}", l) for l in (80, 100, 120) for r in (1, 2, 3)]
+    lines = ["Sample Name\tPeak Name\tRT (min)\tArea\tHeight\tUSP Tailing\tUSP Plate Count"]
+    for name, lvl in seq:
+        area = slope * lvl / 100 * (1 + rnd.gauss(0, .005))
+        lines.append(f"{name}\tMain\t{5.0 + rnd.gauss(0, .01):.3f}\t{area:.2f}\t{area / 10:.1f}\t1.05\t8500")
+    return "\n".join(lines).encode("utf-8")
+
+
+def check_cds_roundtrip(target_conc=1.0):
+    """CDS → 로그북(재계산 전 그대로) → 추출 결과가 CDS 직접 계산과 같은지 확인 → 불일치 목록"""
+    from cds_import import import_peak_table
+    from validation_docs import extract_cds_data, extract_logbook_data, generate_smart_excel
+    table = peak_table()
+    direct = extract_cds_data(io.BytesIO(table), target_conc)
+    logbook = generate_smart_excel("Roundtrip", "Assay", {"Target_Conc": target_conc}, measured=import_peak_table(io.BytesIO(table))["slots"])
+    back = extract_logbook_data(io.BytesIO(logbook.getvalue()))
+    return [f"{k}: CDS {direct.get(k)} ≠ Logbook {back.get(k)}" for k in ("sst", "sst_rt", "sst_tailing", "r2", "acc_mean") if direct.get(k) != back.get(k)]
+
+
+# PARAM 문구 → (metric, op, lo, hi) — 하한 ≥ 상한이 되는 ≤ · ≥ 혼재 구절은 뒤집힌 range 가 아니어야 한다
+CRITERIA_CASES = (
+    ({"SST_Criteria": "RSD ≤ 2.0% (n ≥ 6)"}, "sst", ("max", None, 2.0)),
+    ({"SST_Criteria": "(n ≥ 6) RSD ≤ 2.0%"}, "sst", ("max", None, 2.0)),
+    ({"Detail_LOQ": "LOQ S/N ≥ 10 (n ≤ 3)"}, "loq_sn", ("min", 10.0, None)),
+    ({"Detail_LOQ": "S/N ≥ 10 (n ≤ 3)"}, "loq_sn", ("min", 10.0, None)),          # 키워드 없음 → 기본 기준
+    ({"Detail_Precision": "RSD NMT 1.5% (n NLT 6)"}, "prec_rsd", ("max", None, 1.5)),
+    ({"Detail_Accuracy": "≥ 98.0 and ≤ 102.0"}, "acc_mean", ("range", 98.0, 102.0)),
+)
+
+
+def check_criteria_parsing():
+    """기준 문구 컴파일 결과가 CRITERIA_CASES 와 같은지 확인 → 불일치 목록"""
+    from acceptance_criteria import compile_criteria
+    out = []
+    for params, metric, expected in CRITERIA_CASES:
+        c = compile_criteria(params)[metric]
+        if (c.op, c.lo, c.hi) != expected: out.append(f"{next(iter(params.values()))!r}: {(c.op, c.lo, c.hi)} ≠ {expected}")
+    return out
+
+
+# ---------------------------------------------------------
+# 세션 흐름
+# ---------------------------------------------------------
+def _by_label(widgets, label):
+    for w in widgets:
+        if w.label == label: return w
+    raise LookupError(label)
+
+
+def share_script_cache():
+    """
+    AppTest 는 rerun 마다 새 ScriptCache 로 스크립트를 다시 컴파일한다. 실제 서버(Runtime)는 모든 세션이 캐시 하나를 공유하므로
+    같은 구조로 맞춘다 — 컴파일 비용이 지연에 섞이지 않고, 여러 스레드의 동시 ast.parse 충돌도 피한다.
+    """
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    from streamlit.testing.v1 import local_script_runner
+    shared = ScriptCache()
+    local_script_runner.ScriptCache = lambda: shared
+
+
+class Session:
+    """AppTest 1개 = 브라우저 세션 1개. step() 마다 rerun 지연을 기록한다."""
+    def __init__(self, app, secrets, think, record):
+        from streamlit.testing.v1 import AppTest
+        self.at = AppTest.from_file(os.path.join(ROOT, app), default_timeout=120)
+        for k, v in secrets.items(): self.at.secrets[k] = v
+        self.think = think; self.record = record
+
+    def step(self, name, action):
+        if self.think: time.sleep(self.think * random.uniform(0.5, 1.5))
+        t = time.perf_counter()
+        action(self.at).run()
+        self.record(name, time.perf_counter() - t, [str(e.value) for e in self.at.exception])
+
+
+def validation_flow(s, i, ctx):
+    s.step("load", lambda at: at)
+    methods = _by_label(s.at.selectbox, "Protocol:").options
+    method = methods[i % len(methods)]
+    s.step("protocol", lambda at: _by_label(at.selectbox, "Protocol:").select(method))
+    s.step("stock_conc", lambda at: _by_label(at.number_input, "내 Stock 농도 (mg/mL 등):").set_value(10.0 + i % 5))
+    s.step("vial_volume", lambda at: _by_label(at.number_input, "개별 바이알 조제 목표량 (Target Vol, mL):").set_value(10.0))
+    s.step("logbook_pick", lambda at: at.selectbox(key="l").select(method))
+    s.step("logbook_build", lambda at: _by_label(at.button, "Download Excel Logbook").click())
+    s.step("logbook_upload", lambda at: _by_label(at.file_uploader, "📂 Upload Filled Logbook").set_value((f"Logbook_{method}.xlsx", ctx["logbook"], XLSX_MIME)))
+    s.step("report_pick", lambda at: at.selectbox(key="r").select(method))
+    s.step("lot_input", lambda at: at.text_input(key="res_lot").input(f"LT-{threading.get_ident() % 10000:04d}-{i}"))
+    s.step("result_save", lambda at: _by_label(at.button, "💾 결과 저장").click())
+
+
+def tool_flow(s, i, ctx):
+    s.step("load", lambda at: at)
+    s.step("ctd_build", lambda at: _by_label(at.button, "📥 최신 노션 데이터로 CTD Word 추출").click())
+
+
+FLOWS = {"validation": ("app.py", validation_flow), "tool": ("app_tool_1.py", tool_flow)}
+
+
+# ---------------------------------------------------------
+# 실행 · 집계
+# ---------------------------------------------------------
+def run_level(flow, sessions, iterations, think, ctx, secrets):
+    app, fn = FLOWS[flow]
+    samples, errors, lock = [], [], threading.Lock()
+    def record(name, seconds, exc):
+        with lock:
+            samples.append((name, seconds))
+            if exc: errors.append((name, exc[0][:200]))
+    def worker(k):
+        for it in range(iterations):
+            try: fn(Session(app, secrets, think, record), k * iterations + it, ctx)
+            except Exception as e:
+                with lock: errors.append(("flow", f"{type(e).__name__}: {e}"[:200]))
+    rss0 = rss_mb(); peak = [rss0]; done = threading.Event()
+    def sample_rss():
+        while not done.wait(0.2): peak[0] = max(peak[0], rss_mb())
+    threading.Thread(target=sample_rss, daemon=True).start()
+    t = time.perf_counter()
+    with ThreadPoolExecutor(sessions) as pool: list(pool.map(worker, range(sessions)))
+    wall = time.perf_counter() - t; done.set()
+    rss1 = rss_mb()
+    lat = np.array([s for _, s in samples]) * 1000 if samples else np.zeros(1)
+    steps = {}
+    for name, sec in samples: steps.setdefault(name, []).append(sec * 1000)
+    return {
+        "sessions": sessions, "reruns": len(samples), "wall_s": wall, "throughput_rps": len(samples) / wall if wall else 0.0,
+        "p50_ms": float(np.percentile(lat, 50)), "p95_ms": float(np.percentile(lat, 95)), "p99_ms": float(np.percentile(lat, 99)), "max_ms": float(lat.max()),
+        "rss_start_mb": rss0, "rss_peak_mb": peak[0], "rss_end_mb": rss1, "rss_per_session_mb": (peak[0] - rss0) / sessions,
+        "steps": {n: {"n": len(v), "p50_ms": float(np.percentile(v, 50)), "p95_ms": float(np.percentile(v, 95))} for n, v in steps.items()},
+        "errors": errors,
+    }
+
+
+def warm_up(flow, ctx, secrets):
+    """세션 1개로 흐름을 실행해 노션 캐시를 채우고, 업로드에 쓸 작성된 Logbook 을 만든다"""
+    app, fn = FLOWS[flow]
+    if flow == "validation":
+        from doc_archive import get_archive
+        s = Session(app, secrets, 0, lambda *a: None)
+        s.step("load", lambda at: at)
+        method = _by_label(s.at.selectbox, "Protocol:").options[0]
+        s.step("logbook_build", lambda at: _by_label(at.button, "Download Excel Logbook").click())
+        issued = get_archive().find(method=method, kind="Logbook")
+        template = get_archive().read(issued[0])
+        try: ctx["logbook"] = fill_logbook(template)
+        except Exception: ctx["logbook"] = template     # 템플릿 구조가 바뀐 경우에도 업로드 · 추출 경로는 측정
+    else:
+        Session(app, secrets, 0, lambda *a: None).step("load", lambda at: at)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AtheraCLOUD concurrent-session load test")
+    parser.add_argument("--flow", choices=sorted(FLOWS), default="validation")
+    parser.add_argument("--sessions", default="1,5,10,20", help="동시 세션 수 (쉼표로 여러 단계)")
+    parser.add_argument("--iterations", type=int, default=1, help="세션당 흐름 반복 횟수")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="단계 사이 사용자 대기 시간 (평균)")
+    parser.add_argument("--methods", type=int, default=40, help="스텁 DB 의 Method 수")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="스텁의 노션 왕복 지연")
+    parser.add_argument("--notion-url", default=None, help="스텁 대신 사용할 노션 호환 API 주소")
+    parser.add_argument("--cold", action="store_true", help="캐시 예열 없이 측정")
+    parser.add_argument("--budget-ms", type=float, default=None, help="rerun p95 예산")
+    parser.add_argument("--json", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args(argv)
+
+    stub = None
+    if args.notion_url: base_url = args.notion_url
+    else:
+        stub = NotionStub(0, args.methods, args.latency_ms).start(); base_url = stub.base_url
+    # 앱 모듈은 AppTest 실행 시점에 처음 import 되므로 그 전에 환경을 지정한다
+    os.environ["NOTION_BASE_URL"] = base_url
+    os.environ.setdefault("ATHERA_DATA_DIR", tempfile.mkdtemp(prefix="athera_load_"))
+    secrets = {"NOTION_API_KEY": "stub-token", "NOTION_TOKEN": "stub-token", **DB_IDS}
+    import logging; logging.getLogger("streamlit").setLevel(logging.ERROR)
+    share_script_cache()
+
+    ctx = {}
+    t = time.perf_counter()
+    if args.cold: ctx["logbook"] = b""
+    else: warm_up(args.flow, ctx, secrets)
+    print(f"Notion: {base_url} · 데이터: {os.environ['ATHERA_DATA_DIR']} · 예열 {time.perf_counter() - t:.1f}s")
+    preflight = [("criteria_parsing", m) for m in check_criteria_parsing()]
+    if args.flow == "validation": preflight += [("cds_roundtrip", m) for m in check_cds_roundtrip()]
+    for name, msg in preflight: print(f"    ⚠️ 사전 점검 {name}: {msg}")
+
+    results = []
+    print(f"{'sessions':>8} {'reruns':>7} {'rerun/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'RSS MB':>8} {'+MB/sess':>9} {'errors':>6}")
+    for n in [int(x) for x in args.sessions.split(",") if x.strip()]:
+        r = run_level(args.flow, n, args.iterations, args.think_ms / 1000.0, ctx, secrets); results.append(r)
+        print(f"{n:>8} {r['reruns']:>7} {r['throughput_rps']:>8.1f} {r['p50_ms']:>8.0f} {r['p95_ms']:>8.0f} {r['p99_ms']:>8.0f} {r['max_ms']:>8.0f}"
+              f" {r['rss_peak_mb']:>8.0f} {r['rss_per_session_mb']:>9.1f} {len(r['errors']):>6}")
+    last = results[-1]
+    print("\n단계별 지연 (마지막 단계):")
+    for name, st_ in last["steps"].items(): print(f"    {name:<16} n={st_['n']:<4} p50 {st_['p50_ms']:7.0f} ms   p95 {st_['p95_ms']:7.0f} ms")
+    if stub: print("\n노션 요청: " + ", ".join(f"{k} × {v}" for k, v in sorted(stub.requests.items())))
+    errors = [e for r in results for e in r["errors"]] + preflight
+    for name, msg in errors[:5]: print(f"    ⚠️ {name}: {msg}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"flow": args.flow, "latency_ms": args.latency_ms, "levels": results, "notion_requests": dict(stub.requests) if stub else {}}, f, ensure_ascii=False, indent=2)
+    if stub: stub.stop()
+    over = args.budget_ms is not None and any(r["p95_ms"] > args.budget_ms for r in results)
+    return 1 if (errors or over) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
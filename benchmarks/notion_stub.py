@@ -0,0 +1,191 @@
+"""
+로컬 노션 API 스텁 (부하 테스트 · 오프라인 개발용).
+
+CRITERIA / STRATEGY / PARAM / 도구(CMC) DB 를 합성 데이터로 메모리에 만들고, 앱이 쓰는 엔드포인트만 흉내 낸다.
+    POST  /v1/databases/{id}/query   — page_size · start_cursor 페이지네이션, 속성 · last_edited_time 정렬,
+                                       and / or · equals / contains 필터, ?filter_properties= 속성 선택
+    GET   /v1/databases/{id}         — 속성 스키마 (PARAM 에는 Result_* 반영 속성 포함)
+    GET   /v1/pages/{id}, PATCH /v1/pages/{id}   — 다중 관계 · CRITERIA 쿼리에 없는 관계 페이지(crit-extra) 포함
+
+    python benchmarks/notion_stub.py --port 8787 --methods 40 --latency-ms 150
+    NOTION_BASE_URL=http://127.0.0.1:8787/v1 streamlit run app.py    # secrets 의 DB ID 는 DB_IDS 값 사용
+
+--latency-ms 로 노션 왕복 지연을, --rate-limit 로 초당 요청 한도(초과 시 429 + Retry-After)를 재현한다.
+"""
+import argparse
+import json
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+DB_IDS = {"CRITERIA_DB_ID": "stub-criteria", "STRATEGY_DB_ID": "stub-strategy", "PARAM_DB_ID": "stub-param", "NOTION_DB_ID": "stub-cmc"}
+CATEGORIES = [("Purity", ["Specificity", "Linearity", "Accuracy", "Precision", "LOQ"]), ("Potency", ["Accuracy", "Precision", "Range"]),
+              ("Identity", ["Specificity"]), ("Charge", ["Specificity", "Precision", "Robustness"])]
+RESULT_PROPS = {"Result_SST_RSD": "number", "Result_R2": "number", "Result_Recovery": "number", "Result_Precision_RSD": "number",
+                "Result_LOQ_SN": "number", "Result_Verdict": "select", "Result_Lot": "rich_text", "Result_Date": "date", "Result_Report_No": "rich_text"}
+
+
+def _text(s): return [{"type": "text", "text": {"content": s}, "plain_text": s}]
+def _title(s): return {"type": "title", "title": _text(s)}
+def _rich(s): return {"type": "rich_text", "rich_text": _text(s)}
+def _select(s): return {"type": "select", "select": {"name": s} if s else None}
+
+
+def _value(prop):
+    """속성 → 비교용 문자열 (title / rich_text / select / number)"""
+    t = prop.get("type"); v = prop.get(t)
+    if t in ("title", "rich_text"): return "".join(x["plain_text"] for x in v)
+    if t == "select": return v["name"] if v else ""
+    return "" if v is None else str(v)
+
+
+def _matches(page, flt):
+    """query filter 평가: and / or 복합 조건, 속성 조건은 equals · contains (타입 불일치는 400 대신 False)"""
+    if "and" in flt: return all(_matches(page, f) for f in flt["and"])
+    if "or" in flt: return any(_matches(page, f) for f in flt["or"])
+    prop = page["properties"].get(flt.get("property"), {})
+    cond = flt.get(prop.get("type"))
+    if not cond: return False
+    if "equals" in cond: return _value(prop) == str(cond["equals"])
+    if "contains" in cond: return str(cond["contains"]) in _value(prop)
+    return True
+
+def build_databases(methods=40):
+    """합성 DB: {db_id: [page, ...]} — Method 수만큼 전략 · 파라미터 · 도구 행을 만든다"""
+    stamp = "2026-01-01T00:00:00.000Z"
+    def page(pid, props): return {"object": "page", "id": pid, "last_edited_time": stamp, "properties": props}
+    criteria = [page(f"crit-{i}", {"Test_Category": _title(cat), "Required_Items": {"type": "multi_select", "multi_select": [{"name": n} for n in items]}})
+                for i, (cat, items) in enumerate(CATEGORIES)]
+    names = [f"Method-{i:03d}" for i in range(methods)]
+    strategy, param, cmc = [], [], []
+    for i, m in enumerate(names):
+        # 3 번째 Method 마다 분류 2개, 7 번째마다 CRITERIA DB 쿼리에 나오지 않는 페이지(crit-extra)를 함께 연결
+        rel = [f"crit-{i % len(CATEGORIES)}"] + ([f"crit-{(i + 1) % len(CATEGORIES)}"] if i % 3 == 2 else []) + (["crit-extra"] if i % 7 == 6 else [])
+        for phase in ("Phase 1", "Phase 3"):
+            strategy.append(page(f"strat-{i}-{phase[-1]}", {"Modality": _select("mAb"), "Phase": _select(phase), "Method Name": _rich(m),
+                                                            "Test Category": {"type": "relation", "relation": [{"id": r} for r in rel]}}))
+        param.append(page(f"param-{i}", {
+            "Method_Name": _title(m), "Instrument": _rich("HPLC"), "Column_Plate": _rich("C18, 4.6 x 150 mm"), "Detection": _rich("UV 280 nm"),
+            "Condition_A": _rich("0.1% TFA in water"), "Condition_B": _rich("0.1% TFA in ACN"), "SST_Criteria": _rich("RSD ≤ 2.0%"),
+            "Detail_Linearity": _rich("R² ≥ 0.990"), "Detail_Accuracy": _rich("80.0 ~ 120.0%"), "Detail_Precision": _rich("RSD ≤ 2.0%"),
+            "Target_Conc": {"type": "number", "number": 1.0}, "Unit": _rich("mg/mL"),
+            **{k: ({"type": t, t: None} if t in ("number", "select", "date") else {"type": t, t: []}) for k, t in RESULT_PROPS.items()}}))
+        cat = CATEGORIES[i % len(CATEGORIES)][0]
+        cmc.append(page(f"cmc-{i}", {"Method": _title(m), "Category": _select(cat), "Method Category": _select(cat), "Attribute": _rich(f"{cat} attribute {i}"),
+                                     "Stability-indicating": _select(["Yes", "Partial", "No"][i % 3]), "Typical Purpose": _rich("Release / Stability")}))
+    return {DB_IDS["CRITERIA_DB_ID"]: criteria, DB_IDS["STRATEGY_DB_ID"]: strategy, DB_IDS["PARAM_DB_ID"]: param, DB_IDS["NOTION_DB_ID"]: cmc}
+
+
+def build_extra_pages():
+    """DB 쿼리에는 없고 GET /pages/{id} 로만 조회되는 관계 페이지 (보관 · 다른 DB 의 분류 페이지 재현)"""
+    return [{"object": "page", "id": "crit-extra", "last_edited_time": "2026-01-01T00:00:00.000Z",
+             "properties": {"Test_Category": _title("Stability-indicating"), "Required_Items": {"type": "multi_select", "multi_select": [{"name": "Forced Degradation"}]}}}]
+
+
+class NotionStub:
+    """스레드에서 실행되는 스텁 서버. requests 는 엔드포인트별 요청 수 (Counter)."""
+    def __init__(self, port=0, methods=40, latency_ms=0.0, rate_limit=None):
+        self.databases = build_databases(methods)
+        self.pages = {p["id"]: p for rows in [*self.databases.values(), build_extra_pages()] for p in rows}
+        self.latency = latency_ms / 1000.0; self.rate_limit = rate_limit
+        self.requests = Counter(); self._recent = deque(); self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self): return f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="notion-stub", daemon=True); self._thread.start()
+        return self
+
+    def stop(self): self.server.shutdown(); self.server.server_close()
+
+    def _throttled(self):
+        if not self.rate_limit: return False
+        with self._lock:
+            now = time.monotonic()
+            while self._recent and now - self._recent[0] > 1.0: self._recent.popleft()
+            if len(self._recent) >= self.rate_limit: return True
+            self._recent.append(now); return False
+
+    def query(self, db_id, body, properties=None):
+        rows = list(self.databases.get(db_id, []))
+        if body.get("filter"): rows = [r for r in rows if _matches(r, body["filter"])]
+        for s in reversed(body.get("sorts") or []):
+            key = (lambda r: r[s["timestamp"]]) if s.get("timestamp") else (lambda r: _value(r["properties"].get(s.get("property"), {})))
+            rows.sort(key=key, reverse=s.get("direction") == "descending")
+        start = int(body.get("start_cursor") or 0); size = min(int(body.get("page_size") or 100), 100)
+        chunk = rows[start:start + size]; more = start + size < len(rows)
+        if properties: chunk = [{**r, "properties": {k: v for k, v in r["properties"].items() if k in properties}} for r in chunk]
+        return {"object": "list", "results": chunk, "has_more": more, "next_cursor": str(start + size) if more else None}
+
+    def patch_page(self, page_id, body):
+        page = self.pages.get(page_id)
+        if page is None: return None
+        with self._lock:
+            page["properties"].update(body.get("properties", {}))
+            page["last_edited_time"] = time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime())
+        return page
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args): pass
+
+            def _send(self, status, body, headers=None):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json"); self.send_header("Content-Length", str(len(data)))
+                for k, v in (headers or {}).items(): self.send_header(k, v)
+                self.end_headers(); self.wfile.write(data)
+
+            def _body(self):
+                n = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(n) or b"{}") if n else {}
+
+            def _route(self, method):
+                path, _, qs = self.path.partition("?")
+                parts = [p for p in path.split("/") if p][1:]     # "v1" 제외
+                stub.requests[f"{method} /{parts[0] if parts else ''}" + ("/query" if parts[-1:] == ["query"] else "")] += 1
+                if stub.latency: time.sleep(stub.latency)
+                if stub._throttled(): return self._send(429, {"object": "error", "code": "rate_limited"}, {"Retry-After": "1"})
+                if method == "POST" and len(parts) == 3 and parts[0] == "databases" and parts[2] == "query":
+                    if parts[1] not in stub.databases: return self._send(404, {"object": "error", "code": "object_not_found"})
+                    return self._send(200, stub.query(parts[1], self._body(), parse_qs(qs).get("filter_properties")))
+                if method == "GET" and len(parts) == 2 and parts[0] == "databases" and parts[1] in stub.databases:
+                    rows = stub.databases[parts[1]]
+                    props = {k: {"id": k, "name": k, "type": v["type"]} for k, v in (rows[0]["properties"].items() if rows else ())}
+                    return self._send(200, {"object": "database", "id": parts[1], "properties": props})
+                if len(parts) == 2 and parts[0] == "pages":
+                    page = stub.patch_page(parts[1], self._body()) if method == "PATCH" else stub.pages.get(parts[1])
+                    if page is not None: return self._send(200, page)
+                return self._send(404, {"object": "error", "code": "object_not_found"})
+
+            def do_GET(self): self._route("GET")
+            def do_POST(self): self._route("POST")
+            def do_PATCH(self): self._route("PATCH")
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local Notion API stub")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--methods", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=None, help="초당 요청 한도 (초과 시 429)")
+    args = parser.parse_args(argv)
+    stub = NotionStub(args.port, args.methods, args.latency_ms, args.rate_limit)
+    print(f"Notion stub: {stub.base_url}")
+    for k, v in DB_IDS.items(): print(f"    {k} = \"{v}\"")
+    try: stub.server.serve_forever()
+    except KeyboardInterrupt: pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Cold Start 벤치마크: 각 앱을 `python -X importtime` 으로 실행하여 import 시간 예산(Budget)을 검사한다.
+
+    python benchmarks/startup_importtime.py                 # 기본 예산 (앱당 1500 ms)
+    python benchmarks/startup_importtime.py --budget-ms 900 app.py
+    python benchmarks/startup_importtime.py validation_docs validation_catalog     # 엔진 모듈 (.py 가 아니면 import 만)
+
+예산 초과 또는 Lazy 대상 라이브러리(docx, xlsxwriter, openpyxl, requests)가 첫 실행에서
+로드되면 종료 코드 1 을 반환한다. 엔진 모듈(워커 · CLI 용)은 streamlit 을 로드해도 실패다.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APPS = ["app.py", "app_characterization.py", "app_Tool_Stability.py", "app_timeline.py", "app_tool_1.py"]
+ENGINE_MODULES = ["validation_docs", "validation_catalog"]
+LAZY_MODULES = ("docx", "xlsxwriter", "openpyxl", "requests")
+UI_MODULES = ("streamlit",)
+
+# bare mode 에서는 st.stop() 이 동작하지 않으므로 스크립트 예외는 무시한다 (import 단계는 이미 끝난 시점)
+RUNNER = "import runpy, sys\ntry: runpy.run_path(sys.argv[1], run_name='__main__')\nexcept BaseException: pass"
+
+
+def measure(app_path):
+    # .py 는 스크립트로 실행, 그 외(엔진 모듈)는 import 만
+    args = ["-c", RUNNER, app_path] if app_path.endswith(".py") else ["-c", f"import {app_path}"]
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT, capture_output=True, text=True, encoding="utf-8", errors="replace",
+    )
+    top_level = []; imported = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line: continue
+        try: _, cumulative, name = line[len("import time:"):].split("|")
+        except ValueError: continue
+        imported.add(name.strip().split(".")[0])
+        # 들여쓰기 없는 모듈 = 최상위 import (cumulative 에 하위 import 포함)
+        if not name.startswith("  "): top_level.append((name.strip(), int(cumulative) / 1000.0))
+    total_ms = sum(ms for _, ms in top_level)
+    loaded_lazy = sorted({n.split(".")[0] for n, _ in top_level if n.split(".")[0] in LAZY_MODULES})
+    # 엔진 모듈은 하위 import 까지 포함해 Lazy 대상 · streamlit 이 없어야 한다
+    if not app_path.endswith(".py"): loaded_lazy = sorted(imported & set(LAZY_MODULES + UI_MODULES))
+    heaviest = sorted(top_level, key=lambda x: -x[1])[:5]
+    return total_ms, loaded_lazy, heaviest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AtheraCLOUD cold-start import budget")
+    parser.add_argument("apps", nargs="*", default=APPS + ENGINE_MODULES)
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    args = parser.parse_args(argv)
+
+    failed = False
+    for app in args.apps:
+        total_ms, loaded_lazy, heaviest = measure(app)
+        over = total_ms > args.budget_ms
+        status = "FAIL" if (over or loaded_lazy) else "OK"
+        failed = failed or status == "FAIL"
+        print(f"[{status}] {app}: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+        for name, ms in heaviest: print(f"    {ms:9.1f} ms  {name}")
+        if loaded_lazy: print(f"    ⚠️ 첫 실행에서 로드되면 안 되는 모듈: {', '.join(loaded_lazy)}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+크로마토그래피 데이터 시스템(CDS) 피크 테이블 가져오기 (Streaming Import).
+
+Empower / Chromeleon / OpenLab 등에서 내보낸 CSV · TXT 피크 테이블을 chunk 단위로 읽어 로그북 칸(slot)에 배치한다.
+    result = import_peak_table(uploaded_file, peak="Main")       # 주 피크 이름 (없으면 injection 별 최대 Area 피크)
+    generate_smart_excel(method, "Cat", params, measured=result["slots"])   # 2. SST / 4. Linearity / 5. Accuracy 칸 자동 입력
+    summarize_runs([to_raw(result, target_conc)])                 # 또는 로그북 없이 바로 결과 계산
+
+시퀀스 이름 → 칸 (대소문자 · 구분자 무관):
+    SST-1 … SST-6, "System Suitability 3", "SST Inj 2"      → ("sst", None, 주입 번호)
+    LIN-R1-80, "Linearity 80% Rep 2", LIN_100_3             → ("lin", 수준(%), 반복)
+    ACC-80-1, "Accuracy 120% R3", REC_100_2                 → ("acc", 수준(%), 반복)
+번호가 없는 이름(예: 'SST' 6회 주입)은 등장 순서로 번호를 매기며, 같은 칸에 재주입하면 나중 값이 남는다.
+
+메모리는 파일 크기와 무관하다 — chunk(기본 5000행) 하나와 로그북 칸 수(최대 30)만큼의 피크 값만 보관하고,
+칸에 해당하지 않는 시료 주입은 읽는 즉시 버린다 (수천 주입 시퀀스도 일정 메모리).
+"""
+import io
+import re
+from functools import lru_cache
+
+import pandas as pd
+
+SST_INJECTIONS = 6
+LIN_LEVELS = (80, 90, 100, 110, 120); LIN_REPS = 3
+ACC_LEVELS = (80, 100, 120); ACC_REPS = 3
+PEAK_FIELDS = ("rt", "area", "height", "tailing", "plates")
+
+# 열 이름 별칭: 영숫자만 남긴 소문자 이름에 대한 정규식 ('%' 는 'pct' 로 바꿔 Area % 를 Area 와 구분)
+COLUMN_PATTERNS = {
+    "sample": r"^(samplename|sample|injectionname|sampleid|seqname|sequencename)$",
+    "injection": r"^(inj|injection|injno|injnumber|injectionno|injectionnumber|injectionid|injid)$",
+    "peak": r"^(peakname|peak|component|componentname|compound|compoundname)$",
+    "rt": r"^(rt|retentiontime|rettime|retention)(min)?$",
+    "area": r"^(peak)?area(?!pct|percent)",
+    "height": r"^(peak)?height(?!pct|percent)",
+    "tailing": r"^(usp|ep)?(tailing|tailingfactor|tail|asymmetry)",
+    "plates": r"^(usp|ep)?(theoretical)?plate(s|count|number)?",
+}
+_HEAD_BYTES = 64 * 1024
+
+
+# ---------------------------------------------------------
+# 시퀀스 이름 → 로그북 칸
+# ---------------------------------------------------------
+_KIND = (("sst", re.compile(r"^(SST|SYS(TEM)?[\s_.-]*SUIT(ABILITY)?)")),
+         ("lin", re.compile(r"^LIN(EARITY)?")),
+         ("acc", re.compile(r"^(ACC(URACY)?|REC(OVERY)?)")))
+_LEVEL = re.compile(r"(?<![\d.])(\d{2,3})(?:\.0+)?\s*%")
+_REP = re.compile(r"(?<![A-Z])(?:REPLICATE|REPETITION|REP|INJ|R|#)[\s_.-]*(\d{1,2})(?![\d.])")
+_NUM = re.compile(r"(?<![\d.])(\d{1,3})(?![\d.])")
+
+
+@lru_cache(maxsize=4096)
+def parse_sequence_name(name):
+    """시퀀스(시료) 이름 → (kind, level, n) / 로그북 칸이 아니면 None. n 이 None 이면 등장 순서로 번호를 매긴다."""
+    s = str(name).strip().upper()
+    for kind, pattern in _KIND:
+        m = pattern.match(s)
+        if m: break
+    else: return None
+    rest = s[m.end():]
+    level = _LEVEL.search(rest)
+    if level: rest = rest[:level.start()] + " " + rest[level.end():]; level = int(level.group(1))
+    rep = _REP.search(rest)
+    if rep: rest = rest[:rep.start()] + " " + rest[rep.end():]; rep = int(rep.group(1))
+    nums = [int(v) for v in _NUM.findall(rest)]
+    if kind == "sst":
+        n = rep if rep is not None else (nums[0] if nums else None)
+        return ("sst", None, n) if n is None or 1 <= n <= SST_INJECTIONS else None
+    levels, reps = (LIN_LEVELS, LIN_REPS) if kind == "lin" else (ACC_LEVELS, ACC_REPS)
+    if level is None: level = next((v for v in nums if v in levels), None)
+    if rep is None: rep = next((v for v in nums if v != level and 1 <= v <= reps), None)
+    if level not in levels or (rep is not None and not 1 <= rep <= reps): return None
+    return (kind, level, rep)
+
+
+# ---------------------------------------------------------
+# 파일 형식 감지 (인코딩 · 구분자 · 머리말 줄 수)
+# ---------------------------------------------------------
+def _normalize(col): return re.sub(r"[^0-9a-z]", "", str(col).lower().replace("%", "pct"))
+
+
+def map_columns(columns):
+    """{필드: 원래 열 이름} — 필드마다 처음 일치하는 열"""
+    found = {}
+    for field, pattern in COLUMN_PATTERNS.items():
+        for col in columns:
+            if col not in found.values() and re.search(pattern, _normalize(col)): found[field] = col; break
+    return found
+
+
+def _decode(head):
+    head = head[:head.rfind(b"\n") + 1] or head     # chunk 경계에서 잘린 멀티바이트 문자 제외
+    for enc in ("utf-8-sig", "cp949"):
+        try: return head.decode(enc), enc
+        except UnicodeDecodeError: pass
+    return head.decode("latin-1"), "latin-1"
+
+
+def sniff_layout(head):
+    """파일 앞부분(bytes) → (encoding, 구분자, 머리말 줄 수, 열 매핑). 시료 이름 · Area 열이 있는 첫 줄을 머리행으로 본다."""
+    text, encoding = _decode(head)
+    for i, line in enumerate(text.splitlines()[:200]):
+        for sep in ("\t", ";", ","):
+            cols = [c.strip().strip('"') for c in line.split(sep)]
+            if len(cols) < 2: continue
+            columns = map_columns(cols)
+            if "sample" in columns and "area" in columns: return encoding, sep, i, columns
+    raise ValueError("피크 테이블 머리행(Sample Name · Area 열)을 찾을 수 없습니다.")
+
+
+def _open(source):
+    if isinstance(source, (bytes, bytearray)): return io.BytesIO(source), False
+    if isinstance(source, str): return open(source, "rb"), True
+    return source, False
+
+
+def _number(s, sep):
+    # 쉼표 구분자가 아닌 파일은 천 단위 구분 쉼표(1,234.5)가 섞일 수 있음
+    if sep != ",": s = s.str.replace(",", "", regex=False)
+    return pd.to_numeric(s, errors="coerce").to_numpy()
+
+
+# ---------------------------------------------------------
+# 스트리밍 가져오기
+# ---------------------------------------------------------
+def import_peak_table(source, peak=None, chunksize=5000):
+    """
+    source: 경로 / bytes / 파일 객체(st.file_uploader 결과 등). peak: 주 피크 이름 (대소문자 무관, 없으면 최대 Area 피크).
+    반환: {"slots": {(kind, level, n): {rt, area, height, tailing, plates, sample, injection}}, "rows", "injections", "matched",
+           "skipped": 칸 범위를 벗어난 이름 (최대 20개), "columns": 열 매핑}
+    """
+    stream, owned = _open(source)
+    try:
+        start = stream.tell() if stream.seekable() else 0
+        encoding, sep, skip, columns = sniff_layout(stream.read(_HEAD_BYTES))
+        stream.seek(start)
+        reader = pd.read_csv(stream, sep=sep, skiprows=skip, usecols=list(columns.values()), dtype=str, encoding=encoding,
+                             chunksize=chunksize, skipinitialspace=True, on_bad_lines="skip")
+        target = str(peak).strip().upper() if peak else None
+        slots, order, skipped = {}, {}, []
+        stats = {"rows": 0, "injections": 0, "matched": 0}
+        state = {"key": None, "slot": None, "best": None, "peaks": set()}
+
+        def commit():
+            best, slot = state["best"], state["slot"]
+            if slot is None or best is None: return
+            if slot[2] is None:     # 번호 없는 이름: (kind, level) 별 등장 순서
+                n = order[slot[:2]] = order.get(slot[:2], 0) + 1
+                slot = slot[:2] + (n,)
+                if n > (SST_INJECTIONS if slot[0] == "sst" else LIN_REPS if slot[0] == "lin" else ACC_REPS): return
+            slots[slot] = best; stats["matched"] += 1
+
+        for chunk in reader:
+            stats["rows"] += len(chunk)
+            names = chunk[columns["sample"]].fillna("").str.strip().to_numpy()
+            injs = chunk[columns["injection"]].fillna("").str.strip().to_numpy() if "injection" in columns else None
+            peaks = chunk[columns["peak"]].fillna("").str.strip().str.upper().to_numpy() if "peak" in columns else None
+            values = {f: _number(chunk[columns[f]], sep) if f in columns else None for f in PEAK_FIELDS}
+            for i, name in enumerate(names):
+                if not name: continue
+                pk = peaks[i] if peaks is not None else ""
+                # injection 경계: 주입 번호 열이 있으면 (이름, 번호), 없으면 이름이 바뀌거나 같은 피크 이름이 다시 나올 때
+                key = (name, injs[i]) if injs is not None else name
+                if key != state["key"] or (injs is None and (peaks is None or pk in state["peaks"])):
+                    commit(); stats["injections"] += 1
+                    slot = parse_sequence_name(name)
+                    if slot is None and len(skipped) < 20 and any(p.match(name.upper()) for _, p in _KIND) and name not in skipped: skipped.append(name)
+                    state.update(key=key, slot=slot, best=None, peaks=set())
+                state["peaks"].add(pk)
+                if state["slot"] is None: continue
+                area = values["area"][i]
+                best = state["best"]
+                if target is not None:
+                    if pk != target: continue
+                elif best is not None and best["area"] is not None and not area > best["area"]: continue
+                state["best"] = {f: (float(values[f][i]) if values[f] is not None and values[f][i] == values[f][i] else None) for f in PEAK_FIELDS}
+                state["best"].update(sample=name, injection=injs[i] if injs is not None else None)
+        commit()
+    finally:
+        if owned: stream.close()
+    return {"slots": slots, **stats, "skipped": skipped, "columns": columns}
+
+
+# ---------------------------------------------------------
+# 결과 파이프라인 / 화면 표시
+# ---------------------------------------------------------
+def slot_value(slots, slot, field, default=""):
+    v = (slots or {}).get(slot, {}).get(field)
+    return default if v is None else v
+
+
+def to_raw(result, target_conc=None):
+    """가져온 칸 → read_logbook_arrays 와 같은 원시 배열 dict (summarize_runs 입력). 농도는 Target × Level%, Target 이 없으면 Level(%)."""
+    slots = result["slots"]; nan = float("nan")
+    try: target = float(target_conc) / 100
+    except (TypeError, ValueError): target = 1.0
+    raw = {"sst_area": [slot_value(slots, ("sst", None, n), "area", nan) for n in range(1, SST_INJECTIONS + 1)],
+           "sst_rt": [slot_value(slots, ("sst", None, n), "rt", nan) for n in range(1, SST_INJECTIONS + 1)],
+           "sst_tailing": [slot_value(slots, ("sst", None, 1), "tailing", nan)]}
+    lin = [(lv, slots[("lin", lv, r)]["area"]) for r in range(1, LIN_REPS + 1) for lv in LIN_LEVELS if ("lin", lv, r) in slots]
+    acc = [(lv, slots[("acc", lv, r)]["area"]) for lv in ACC_LEVELS for r in range(1, ACC_REPS + 1) if ("acc", lv, r) in slots]
+    raw["lin_x"] = [target * lv for lv, _ in lin]; raw["lin_y"] = [nan if a is None else a for _, a in lin]
+    raw["acc_theo"] = [target * lv for lv, _ in acc]; raw["acc_area"] = [nan if a is None else a for _, a in acc]
+    return raw
+
+
+def slots_frame(result):
+    """칸별 가져온 값 표 (로그북 순서)"""
+    order = ([("sst", None, n) for n in range(1, SST_INJECTIONS + 1)] + [("lin", lv, r) for r in range(1, LIN_REPS + 1) for lv in LIN_LEVELS]
+             + [("acc", lv, r) for lv in ACC_LEVELS for r in range(1, ACC_REPS + 1)])
+    labels = {"sst": "2. SST", "lin": "4. Linearity", "acc": "5. Accuracy"}
+    rows = [{"Sheet": labels[s[0]], "Level": f"{s[1]}%" if s[1] else "", "No.": s[2], "Sample": v["sample"], "Injection": v["injection"],
+             **{f: v[f] for f in PEAK_FIELDS}} for s in order for v in [result["slots"].get(s)] if v is not None]
+    return pd.DataFrame(rows, columns=["Sheet", "Level", "No.", "Sample", "Injection", *PEAK_FIELDS])
@@ -0,0 +1,157 @@
+"""
+CMC 문서 생성기 (CTD 3.2.S.4 요약 · 안정성 시험 매트릭스).
+
+app_tool_1 / app_Tool_Stability / app_timeline 이 함께 쓰는 최상위 함수 — import 가능한 모듈에 두어야
+parallel_render 의 프로세스 풀에서도 실행할 수 있다. docx / xlsxwriter 는 함수 안에서 import 한다.
+
+load_cmc_catalog() 는 세 도구 앱이 공유하는 노션 CMC DB 로더다. 분류 · 안정성 열은 적재 시 1회 정규화(strip · category dtype)하고
+분류별 · 안정성 대상 그룹 색인을 함께 만들어 탭 · 필터 화면이 rerun 마다 전체 행을 다시 훑지 않게 한다.
+load_stability_catalog() 는 안정성 대상 행과 필요한 속성만 노션 쪽에서 걸러 받는다 (Stability Planner 전용).
+"""
+from io import BytesIO
+
+from notion_records import IndexedFrame
+
+STABILITY_CONDITIONS = ["Long-term (5°C ± 3°C)", "Accelerated (25°C / 60% RH)", "Stress (40°C / 75% RH)"]
+STABILITY_TIMEPOINTS = ['T0', '1M', '3M', '6M', '9M', '12M', '18M', '24M']
+STABILITY_VALUES = ("Yes", "Partial")
+STABILITY_PROPERTIES = ("Method", "Category", "Method Category", "Attribute", "Stability-indicating")
+
+
+def category_column(df):
+    # 노션 DB 에 따라 'Category' 가 비어 있고 'Method Category' 를 쓰는 경우가 있다
+    return "Method Category" if "Method Category" in df.columns else "Category"
+
+
+def stability_flags(df):
+    """안정성 지시력(Stability-indicating)이 Yes / Partial 인지 (bool Series)"""
+    return df['Stability-indicating'].astype(str).str.strip().str.lower().isin(['yes', 'partial'])
+
+
+def stability_targets(df):
+    """안정성 지시력(Stability-indicating)이 Yes / Partial 인 항목만"""
+    if isinstance(df, IndexedFrame): return df.rows("stability", True)
+    if df.empty or 'Stability-indicating' not in df: return df.iloc[0:0]
+    return df[stability_flags(df)]
+
+
+def load_cmc_catalog(database_id, token, payload=None, properties=None):
+    """노션 CMC DB → IndexedFrame (색인: "category" = 분류 열, "stability" = 안정성 시험 대상 여부). payload · properties 는 서버 측 필터 · 속성 선택."""
+    from notion_api import fetch_database_frame
+    df = fetch_database_frame(database_id, token, payload, properties)
+    for col in ("Method Category", "Category", "Stability-indicating"):
+        if col in df: df[col] = df[col].astype(str).str.strip().astype("category")
+    keys = {}
+    cat_col = category_column(df)
+    if cat_col in df: keys["category"] = df[cat_col].astype(object).where(~df[cat_col].isin(["", "None"]))
+    if 'Stability-indicating' in df: keys["stability"] = stability_flags(df)
+    return IndexedFrame(df, keys)
+
+
+def load_stability_catalog(database_id, token):
+    """
+    안정성 시험 대상(Yes / Partial)만 노션에서 걸러 화면 · 매트릭스에 쓰는 속성만 받는다 (Stability Planner).
+    DB 의 속성 타입이 달라 필터가 거부되면 전체를 받아 pandas 로 거른다 (stability_targets).
+    """
+    from notion_api import NotionUnavailable, one_of, query_payload, sort_by
+    payload = query_payload(one_of("Stability-indicating", STABILITY_VALUES), sort_by("Method"))
+    try: return load_cmc_catalog(database_id, token, payload, STABILITY_PROPERTIES)
+    except NotionUnavailable: return load_cmc_catalog(database_id, token)
+
+# --- CTD Word 생성 ---
+def create_ctd_docx(dataframe, doc_num):
+    from docx import Document
+    from docx.shared import Pt
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.oxml.ns import qn
+    doc = Document()
+    # 폰트 세팅
+    style = doc.styles['Normal']
+    style.font.name = 'Times New Roman'
+    style.font.size = Pt(11)
+    style.element.rPr.rFonts.set(qn('w:eastAsia'), '맑은 고딕')
+
+    # 타이틀 (국문 크게, 영문 부제목)
+    t_kr = doc.add_heading('3.2.S.4 원료의약품의 관리', level=0)
+    t_kr.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    t_en = doc.add_heading('3.2.S.4 Control of Drug Substance', level=1)
+    t_en.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+    # 표 생성
+    doc.add_heading('분석 시험법 요약 (Analytical Procedures Summary)', level=2)
+    table = doc.add_table(rows=1, cols=4)
+    table.style = 'Medium Shading 1 Accent 1'
+    hdr = table.rows[0].cells
+    hdr[0].text, hdr[1].text, hdr[2].text, hdr[3].text = 'CQA', 'Method', 'Stability', 'Purpose'
+
+    for _, row in dataframe.iterrows():
+        cells = table.add_row().cells
+        cells[0].text, cells[1].text = str(row['Attribute']), str(row['Method'])
+        cells[2].text, cells[3].text = str(row['Stability-indicating']), str(row['Typical Purpose'])
+
+    bio = BytesIO()
+    doc.save(bio)
+    return bio.getvalue()
+
+
+# --- 안정성 시험 매트릭스 (ICH Q1A(R2)) ---
+def create_stability_excel(dataframe, conds, start_dt, analysis=None):
+    """analysis: shelf_life.estimate_shelf_life 결과 — 주면 프로토콜 시트 뒤에 유효기간 매트릭스 · 회귀 상세 시트를 붙인다"""
+    import xlsxwriter
+    output = BytesIO()
+    workbook = xlsxwriter.Workbook(output)
+
+    # 스타일 설정
+    header_fmt = workbook.add_format({'bold': True, 'bg_color': '#4472C4', 'font_color': 'white', 'border': 1, 'align': 'center'})
+    cell_fmt = workbook.add_format({'border': 1, 'align': 'center'})
+    mark_fmt = workbook.add_format({'bg_color': '#E2EFDA', 'border': 1, 'align': 'center', 'bold': True})
+
+    # 각 보관 조건별 시트 생성
+    for cond in conds:
+        sheet_name = cond.split(' (')[0]
+        sheet = workbook.add_worksheet(sheet_name)
+
+        # 헤더: 시험 항목 및 주차(Timepoints)
+        headers = ['Category', 'Method', 'Attribute']
+        timepoints = STABILITY_TIMEPOINTS
+
+        for c, h in enumerate(headers + timepoints):
+            sheet.write(0, c, h, header_fmt)
+            sheet.set_column(c, c, 12)
+
+        # 데이터 작성
+        for r, (_, row) in enumerate(dataframe.iterrows(), start=1):
+            sheet.write(r, 0, str(row.get('Category', '')), cell_fmt)
+            sheet.write(r, 1, str(row.get('Method', '')), cell_fmt)
+            sheet.write(r, 2, str(row.get('Attribute', '')), cell_fmt)
+
+            # 시험 주기별 체크 표시 (자동 매트릭스)
+            for c in range(len(timepoints)):
+                # 가속 조건(Accelerated)은 통상 6개월까지만 표시하는 로직 등 추가 가능
+                if "Accelerated" in cond and c > 3: # 6M(index 3) 이후는 제외
+                    sheet.write(r, 3 + c, "-", cell_fmt)
+                else:
+                    sheet.write(r, 3 + c, "X", mark_fmt)
+
+    # 안정성 결과 분석 (ICH Q1E) — 항목 × 조건 유효기간 · 그룹별 회귀 상세
+    if analysis is not None and not analysis.empty:
+        from shelf_life import shelf_life_matrix
+        num_fmt = workbook.add_format({'border': 1, 'align': 'center', 'num_format': '0.0###'})
+        matrix = shelf_life_matrix(analysis)
+        sheet = workbook.add_worksheet("Shelf-life Matrix")
+        sheet.write(0, 0, "Attribute \\ Condition (months)", header_fmt); sheet.set_column(0, 0, 28)
+        for c, cond in enumerate(matrix.columns, start=1):
+            sheet.write(0, c, str(cond), header_fmt); sheet.set_column(c, c, 24)
+        for r, (attr, vals) in enumerate(matrix.iterrows(), start=1):
+            sheet.write(r, 0, str(attr), cell_fmt)
+            for c, v in enumerate(vals, start=1): sheet.write(r, c, v if v == v else "-", num_fmt)
+        sheet = workbook.add_worksheet("Q1E Regression")
+        for c, h in enumerate(analysis.columns):
+            sheet.write(0, c, h, header_fmt); sheet.set_column(c, c, 16)
+        for r, row in enumerate(analysis.itertuples(index=False), start=1):
+            for c, v in enumerate(row):
+                if isinstance(v, str): sheet.write(r, c, v, cell_fmt)
+                else: v = float(v); sheet.write(r, c, v if v == v and abs(v) != float("inf") else "-", num_fmt)
+
+    workbook.close()
+    return output.getvalue()
@@ -0,0 +1,192 @@
+"""
+발행 문서 보관함 (Content-addressed Audit Archive).
+
+생성된 DOCX/XLSX 를 내용 해시(SHA-256)로 보관한다.
+    blobs/ab/abcd....z      — zlib 압축된 내용 조각. DOCX/XLSX(zip)는 파트(member) 단위로 저장하므로
+                              스타일·테마 등 템플릿 공통 파트는 문서가 달라도 한 번만 저장된다.
+    manifests/<digest>.json — 문서 1건의 파트 구성 (파트명, 조각 해시, 압축 방식, 시각)
+    index.jsonl             — 발행 이력 (append-only): 문서번호 · Method · 종류 · 발행 시각 · digest
+                              + 발행본마다 다른 docProps/core.xml 조각(core)과 manifest 와 다른 파트 시각(times)
+문서 digest 는 zip 타임스탬프와 docProps/core.xml 의 생성/수정 시각을 제외한 '정규화 내용' 해시이므로,
+같은 템플릿을 수백 번 다시 생성해도 큰 공통 파트는 늘지 않고 발행 이력 한 줄과 core.xml(1 KB 미만)만 추가된다.
+read(발행 이력)는 그 발행본의 core.xml · 시각으로 조립하므로 발행 당시 파일과 같다.
+"""
+import datetime
+import functools
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import zipfile
+import zlib
+from bisect import bisect_left, bisect_right
+
+# core.xml 의 발행 시각/작성자 계열 태그는 정규화 해시에서 제외
+_VOLATILE_CORE = re.compile(rb"<(dcterms:created|dcterms:modified|cp:lastModifiedBy|cp:revision|cp:lastPrinted)\b[^>]*>.*?</\1>", re.S)
+
+
+def _sha(data): return hashlib.sha256(data).hexdigest()
+
+
+def _as_bytes(data):
+    if isinstance(data, (bytes, bytearray)): return bytes(data)
+    if hasattr(data, "getvalue"): return data.getvalue()
+    return data.read()
+
+
+def _read_zip(data):
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as z:
+            return [(i, z.read(i)) for i in z.infolist()]
+    except zipfile.BadZipFile: return None
+
+
+def canonical_digest(data):
+    """DOCX/XLSX: 파트명 순 정렬 + 휘발성 메타데이터 제거 후 해시. 그 외 파일은 바이트 그대로 해시."""
+    members = _read_zip(data)
+    if members is None: return _sha(data)
+    h = hashlib.sha256()
+    for info, content in sorted(members, key=lambda m: m[0].filename):
+        if info.filename == "docProps/core.xml": content = _VOLATILE_CORE.sub(b"", content)
+        h.update(info.filename.encode("utf-8") + b"\0" + _sha(content).encode() + b"\n")
+    return h.hexdigest()
+
+
+class DocArchive:
+    def __init__(self, root):
+        self.root = root
+        self.blob_dir = os.path.join(root, "blobs")
+        self.manifest_dir = os.path.join(root, "manifests")
+        self.index_path = os.path.join(root, "index.jsonl")
+        os.makedirs(self.blob_dir, exist_ok=True); os.makedirs(self.manifest_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._entries = []                   # 발행 순서 (= issued 오름차순)
+        self._dates = []                     # _entries 와 같은 순서의 발행일 'YYYY-MM-DD' (기간 조회 이분 탐색용)
+        self._by_method = {}; self._by_doc_no = {}; self._by_digest = {}
+        self.stored_bytes = 0
+        self._load()
+
+    # -------------------- 색인 --------------------
+    def _load(self):
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip(): self._add_entry(json.loads(line))
+        except OSError: pass
+        for dirpath, _, files in os.walk(self.blob_dir):
+            self.stored_bytes += sum(os.path.getsize(os.path.join(dirpath, n)) for n in files)
+
+    def _add_entry(self, e):
+        e["id"] = len(self._entries)
+        self._entries.append(e); self._dates.append(e["issued"][:10])
+        self._by_method.setdefault(e["method"], []).append(e["id"])
+        self._by_doc_no.setdefault(e["doc_no"], []).append(e["id"])
+        self._by_digest.setdefault(e["digest"], []).append(e["id"])
+
+    def __len__(self): return len(self._entries)
+
+    # -------------------- 저장 --------------------
+    def _blob_path(self, digest): return os.path.join(self.blob_dir, digest[:2], digest[2:] + ".z")
+
+    def _put_blob(self, content):
+        digest = _sha(content)
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            packed = zlib.compress(content, 9)
+            with open(path + ".tmp", "wb") as f: f.write(packed)
+            os.replace(path + ".tmp", path)
+            self.stored_bytes += len(packed)
+        return digest
+
+    def _get_blob(self, digest):
+        with open(self._blob_path(digest), "rb") as f: return zlib.decompress(f.read())
+
+    def put(self, data, kind, method="", doc_no="", file_name=""):
+        """
+        문서 1건을 보관하고 발행 이력 dict 를 반환한다.
+        정규화 내용이 이미 보관된 문서면 조각은 다시 쓰지 않고 이력만 추가한다 (entry["new"] = False).
+        """
+        data = _as_bytes(data)
+        digest = canonical_digest(data)
+        with self._lock:
+            manifest_path = os.path.join(self.manifest_dir, digest + ".json")
+            is_new = not os.path.exists(manifest_path)
+            members = _read_zip(data)
+            if is_new:
+                if members is None: manifest = {"raw": self._put_blob(data)}
+                else:
+                    manifest = {"parts": [[i.filename, self._put_blob(c), i.compress_type, list(i.date_time)] for i, c in members]}
+                with open(manifest_path + ".tmp", "w", encoding="utf-8") as f: json.dump(manifest, f)
+                os.replace(manifest_path + ".tmp", manifest_path)
+            entry = {"issued": datetime.datetime.now().isoformat(timespec="seconds"), "doc_no": doc_no or "", "method": method or "",
+                     "kind": kind, "file_name": file_name, "digest": digest, "size": len(data), "new": is_new}
+            if members is not None:
+                # 발행본마다 다른 부분: core.xml (생성/수정 시각) · 파트 시각 — 공통 파트는 manifest 의 조각을 그대로 쓴다
+                core = [c for i, c in members if i.filename == "docProps/core.xml"]
+                if core: entry["core"] = self._put_blob(core[0])
+                if not is_new:
+                    with open(manifest_path, encoding="utf-8") as f: stored = {p[0]: p[3] for p in json.load(f).get("parts", [])}
+                    times = {i.filename: list(i.date_time) for i, _ in members if stored.get(i.filename) != list(i.date_time)}
+                    if times: entry["times"] = times
+            with open(self.index_path, "a", encoding="utf-8") as f: f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._add_entry(entry)
+            return dict(entry)
+
+    # -------------------- 조회 --------------------
+    def find(self, method=None, doc_no=None, kind=None, since=None, until=None):
+        """method / doc_no 는 색인으로, 기간(since/until: 'YYYY-MM-DD' 또는 date)은 발행 시각 이분 탐색으로 좁힌다. 최신순."""
+        with self._lock:
+            if doc_no is not None: ids = self._by_doc_no.get(doc_no, [])
+            elif method is not None: ids = self._by_method.get(method, [])
+            else:
+                lo = bisect_left(self._dates, str(since)[:10]) if since else 0
+                hi = bisect_right(self._dates, str(until)[:10]) if until else len(self._dates)
+                ids = range(lo, hi)
+            out = []
+            for i in ids:
+                e = self._entries[i]
+                if method is not None and e["method"] != method: continue
+                if kind is not None and e["kind"] != kind: continue
+                if since and e["issued"][:10] < str(since)[:10]: continue
+                if until and e["issued"][:10] > str(until)[:10]: continue
+                out.append(dict(e))
+        return out[::-1]
+
+    def read(self, issue):
+        """
+        발행본 바이트. issue: find() / put() 의 발행 이력 dict (digest 문자열만 주면 처음 발행본의 메타데이터로 조립).
+        DOCX/XLSX 는 파트 조각으로 다시 조립하고, core.xml · 파트 시각은 그 발행본의 것을 쓴다 (파트 내용은 발행본과 동일).
+        """
+        if isinstance(issue, str): issue = {"digest": issue}
+        with open(os.path.join(self.manifest_dir, issue["digest"] + ".json"), encoding="utf-8") as f: manifest = json.load(f)
+        if "raw" in manifest: return self._get_blob(manifest["raw"])
+        times = issue.get("times", {})
+        out = io.BytesIO()
+        with zipfile.ZipFile(out, "w") as z:
+            for name, part, compress_type, date_time in manifest["parts"]:
+                if name == "docProps/core.xml": part = issue.get("core", part)
+                info = zipfile.ZipInfo(name, tuple(times.get(name, date_time))); info.compress_type = compress_type
+                z.writestr(info, self._get_blob(part))
+        return out.getvalue()
+
+    def stats(self):
+        return {"issues": len(self._entries), "documents": len(self._by_digest),
+                "issued_bytes": sum(e["size"] for e in self._entries), "stored_bytes": self.stored_bytes}
+
+
+@functools.lru_cache(maxsize=None)
+def get_archive(root=None):
+    """프로세스 공용 보관함 (모든 세션 · 앱이 공유). 경로: ATHERA_DATA_DIR/archive, 기본 ./.athera_data/archive"""
+    root = root or os.environ.get("ATHERA_DATA_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".athera_data")
+    return DocArchive(os.path.join(root, "archive"))
+
+
+def issue(kind, method, doc_no, file_name, builder, *args, **kwargs):
+    """builder(*args) 로 문서를 만든 뒤 보관함에 기록하고 바이트를 반환 — st.download_button 의 data callable 로 사용"""
+    data = _as_bytes(builder(*args, **kwargs))
+    try: get_archive().put(data, kind, method, doc_no, file_name)
+    except OSError: pass    # 보관 실패가 문서 발행을 막지는 않는다
+    return data
@@ -0,0 +1,130 @@
+"""
+문서 중간 표현 (Content Model) 과 렌더러.
+
+생성기는 먼저 블록 리스트를 만들고, 같은 블록으로 화면 미리보기(HTML)와 DOCX 를 각각 렌더링한다.
+미리보기는 python-docx 없이 문자열 조합만 하므로 rerun 마다 호출해도 가볍다.
+
+블록 형식 (dict):
+    {"type": "page_header", "lines": [(text, bold), ...]}
+    {"type": "title", "text": ..., "subtitle": ..., "as_heading": False}   # as_heading=True → Word 'Title' 스타일
+    {"type": "heading", "text": ..., "level": 1|2}
+    {"type": "paragraph", "text": ...}
+    {"type": "bullets", "items": [(bold_prefix, text), ...]}
+    {"type": "table", "headers": [...], "rows": [[...], ...]}            # 첫 행 = 헤더
+    {"type": "kv_table", "rows": [(key, value), ...]}                   # 첫 열 = 헤더
+    {"type": "signature", "roles": [...]}
+"""
+import html
+
+
+def heading(text, level=1): return {"type": "heading", "text": text, "level": level}
+
+def paragraph(text): return {"type": "paragraph", "text": text}
+
+def bullets(items): return {"type": "bullets", "items": list(items)}
+
+def table(headers, rows): return {"type": "table", "headers": list(headers), "rows": [list(map(str, r)) for r in rows]}
+
+def kv_table(rows): return {"type": "kv_table", "rows": [(str(k), str(v)) for k, v in rows]}
+
+
+# ---------------------------------------------------------
+# 미리보기 렌더러 (HTML)
+# ---------------------------------------------------------
+_PREVIEW_CSS = (
+    "<style>.ath-doc{font-size:0.9rem}.ath-doc table{border-collapse:collapse;margin:4px 0 12px}"
+    ".ath-doc th,.ath-doc td{border:1px solid #999;padding:3px 8px}.ath-doc th{background:#D9D9D9}"
+    ".ath-doc .hdr{color:#666;font-size:0.8rem;border-bottom:1px solid #ccc;margin-bottom:8px}</style>"
+)
+
+def _h(text): return html.escape(str(text)).replace("\n", "<br>")
+
+def render_html(blocks):
+    out = [_PREVIEW_CSS, '<div class="ath-doc">']
+    for b in blocks:
+        t = b["type"]
+        if t == "page_header":
+            out.append('<div class="hdr">' + "<br>".join(f"<b>{_h(x)}</b>" if bold else _h(x) for x, bold in b["lines"]) + "</div>")
+        elif t == "title":
+            out.append(f'<h2 style="text-align:center">{_h(b["text"])}</h2>')
+            if b.get("subtitle"): out.append(f'<p style="text-align:center">{_h(b["subtitle"])}</p>')
+        elif t == "heading": out.append(f'<h{b["level"] + 2}>{_h(b["text"])}</h{b["level"] + 2}>')
+        elif t == "paragraph": out.append(f"<p>{_h(b['text'])}</p>")
+        elif t == "bullets": out.append("<ul>" + "".join(f"<li><b>{_h(k)}</b>{_h(v)}</li>" for k, v in b["items"]) + "</ul>")
+        elif t == "table":
+            out.append("<table><tr>" + "".join(f"<th>{_h(h)}</th>" for h in b["headers"]) + "</tr>"
+                       + "".join("<tr>" + "".join(f"<td>{_h(c)}</td>" for c in r) + "</tr>" for r in b["rows"]) + "</table>")
+        elif t == "kv_table":
+            out.append("<table>" + "".join(f"<tr><th>{_h(k)}</th><td>{_h(v)}</td></tr>" for k, v in b["rows"]) + "</table>")
+        elif t == "signature":
+            out.append("<table><tr>" + "".join(f"<th>{_h(r)}</th>" for r in b["roles"]) + "</tr><tr>"
+                       + "".join("<td><br>서명: ________<br>날짜: ________</td>" for _ in b["roles"]) + "</tr></table>")
+    out.append("</div>")
+    return "".join(out)
+
+
+# ---------------------------------------------------------
+# DOCX 렌더러 (python-docx 는 이 함수 안에서만 import)
+# ---------------------------------------------------------
+def write_docx(doc, blocks, set_font=None, style_header_cell=None, list_style=None):
+    """
+    doc: python-docx Document. set_font(run) / style_header_cell(cell) 로 각 문서의 서식 규칙을 주입한다.
+    list_style 을 주면 bullets 블록을 해당 스타일 문단으로, 없으면 '• ' 문단으로 쓴다.
+    """
+    from docx.shared import Pt
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    font = set_font or (lambda run: None)
+    shade = style_header_cell or (lambda cell: None)
+
+    def para(text, bold_prefix=None, style=None):
+        p = doc.add_paragraph(style=style) if style else doc.add_paragraph()
+        if bold_prefix:
+            r = p.add_run(bold_prefix); r.bold = True; font(r)
+        if text: font(p.add_run(text))
+        return p
+
+    def fill(cell, text, bold=False):
+        r = cell.paragraphs[0].add_run(str(text)); r.bold = bold; font(r)
+
+    for b in blocks:
+        t = b["type"]
+        if t == "page_header":
+            p_head = doc.sections[0].header.paragraphs[0]; p_head.alignment = WD_ALIGN_PARAGRAPH.LEFT
+            for i, (text, bold) in enumerate(b["lines"]):
+                r = p_head.add_run(text + ("\n" if i < len(b["lines"]) - 1 else "")); r.bold = bold; r.font.size = Pt(9); font(r)
+        elif t == "title" and b.get("as_heading"):
+            doc.add_heading(b["text"], 0).alignment = WD_ALIGN_PARAGRAPH.CENTER
+            if b.get("subtitle"): doc.add_paragraph(b["subtitle"]).alignment = WD_ALIGN_PARAGRAPH.CENTER
+        elif t == "title":
+            doc.add_paragraph()
+            p = doc.add_paragraph(); p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+            r = p.add_run(b["text"]); r.bold = True; r.font.size = Pt(16); font(r)
+            if b.get("subtitle"):
+                p = doc.add_paragraph(); p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+                r = p.add_run(b["subtitle"]); r.font.size = Pt(12); font(r)
+            doc.add_paragraph()
+        elif t == "heading":
+            p = doc.add_paragraph(); p.style = doc.styles[f"Heading {b['level']}"]; font(p.add_run(b["text"]))
+        elif t == "paragraph": para(b["text"])
+        elif t == "bullets":
+            for k, v in b["items"]:
+                if list_style: para(v, k, list_style)
+                else: para(v, f"• {k}" if k else "• ")
+        elif t == "table":
+            tbl = doc.add_table(rows=1, cols=len(b["headers"])); tbl.style = "Table Grid"
+            for i, h in enumerate(b["headers"]):
+                c = tbl.rows[0].cells[i]; fill(c, h, True); shade(c)
+            for row in b["rows"]:
+                cells = tbl.add_row().cells
+                for i, v in enumerate(row): fill(cells[i], v)
+        elif t == "kv_table":
+            tbl = doc.add_table(rows=len(b["rows"]), cols=2); tbl.style = "Table Grid"
+            for i, (k, v) in enumerate(b["rows"]):
+                fill(tbl.rows[i].cells[0], k, True); fill(tbl.rows[i].cells[1], v); shade(tbl.rows[i].cells[0])
+        elif t == "signature":
+            doc.add_paragraph("\n\n")
+            tbl = doc.add_table(rows=2, cols=len(b["roles"])); tbl.style = "Table Grid"
+            for i, role in enumerate(b["roles"]):
+                c = tbl.rows[0].cells[i]; fill(c, role, True); shade(c)
+                tbl.rows[1].cells[i].text = "\n\n서명: _______________\n날짜: _______________\n"
+    return doc
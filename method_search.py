@@ -0,0 +1,145 @@
+"""
+시험법 라이브러리 전문 검색 (Full-text Search) 인덱스.
+
+전략(STRATEGY) · 파라미터(PARAM) · 특성분석 카탈로그의 텍스트 필드를 역색인(Inverted Index)으로 보관하고
+BM25 점수로 정렬된 결과를 반환한다. 한글은 어절 + 음절 bigram, 영문/숫자는 소문자 단어 단위로 토큰화한다.
+문서마다 버전(last_edited_time 등)을 기억하므로 노션 동기화 시 바뀐 행만 다시 색인한다 (Incremental).
+"""
+import math
+import re
+import threading
+from bisect import bisect_left
+
+_TOKEN_RE = re.compile(r"[0-9a-z]+|[가-힣]+")
+_BM25_K1 = 1.2
+_BM25_B = 0.75
+_PREFIX_WEIGHT = 0.5
+
+
+def _is_hangul(word):
+    return "가" <= word[0] <= "힣"
+
+
+def tokenize(text):
+    """'크기 변이체 (응집체) / SEC-HPLC' → ['크기', '변이', '이체', '변이체', ..., 'sec', 'hplc']"""
+    tokens = []
+    for m in _TOKEN_RE.finditer(str(text or "").lower()):
+        word = m.group(0)
+        if _is_hangul(word):
+            # 조사·어미가 붙은 어절도 찾을 수 있도록 음절 bigram 을 함께 색인
+            if len(word) > 2: tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+            tokens.append(word)
+        else:
+            tokens.append(word)
+    return tokens
+
+
+class MethodSearchIndex:
+    """
+    문서 = (doc_id, {필드명: 텍스트}, version, payload).
+    여러 세션이 공유하므로 (st.cache_resource) 갱신/검색은 Lock 으로 보호한다.
+    """
+    def __init__(self, field_weights=None):
+        self.field_weights = field_weights or {}
+        self._postings = {}     # token -> {doc_id: weighted tf}
+        self._docs = {}         # doc_id -> {"fields", "version", "payload", "length", "tokens"}
+        self._total_length = 0.0
+        self._vocab = []        # 접두어(prefix) 검색용 정렬된 토큰 목록
+        self._vocab_dirty = False
+        self._lock = threading.RLock()
+
+    def __len__(self): return len(self._docs)
+
+    def upsert(self, doc_id, fields, version=None, payload=None):
+        """버전이 같으면 건너뛰고 False, 새로 색인하면 True. version 이 없으면 필드 내용 자체를 버전으로 쓴다."""
+        version = version if version is not None else tuple(sorted((k, str(v)) for k, v in fields.items()))
+        with self._lock:
+            old = self._docs.get(doc_id)
+            if old is not None and old["version"] == version:
+                old["payload"] = payload if payload is not None else old["payload"]
+                return False
+            if old is not None: self._remove(doc_id)
+            tf = {}
+            for name, text in fields.items():
+                w = self.field_weights.get(name, 1.0)
+                for tok in tokenize(text): tf[tok] = tf.get(tok, 0.0) + w
+            for tok, cnt in tf.items():
+                posting = self._postings.get(tok)
+                if posting is None:
+                    posting = self._postings[tok] = {}
+                    self._vocab_dirty = True
+                posting[doc_id] = cnt
+            length = sum(tf.values())
+            self._docs[doc_id] = {"fields": fields, "version": version, "payload": payload, "length": length, "tokens": tuple(tf)}
+            self._total_length += length
+            return True
+
+    def remove(self, doc_id):
+        with self._lock: self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        doc = self._docs.pop(doc_id, None)
+        if doc is None: return
+        self._total_length -= doc["length"]
+        for tok in doc["tokens"]:
+            posting = self._postings.get(tok)
+            if posting is None: continue
+            posting.pop(doc_id, None)
+            if not posting:
+                del self._postings[tok]; self._vocab_dirty = True
+
+    def sync(self, docs, prefix=None):
+        """
+        docs: (doc_id, fields, version, payload) 반복자. 바뀐 문서만 재색인하고 갱신 건수를 반환한다.
+        prefix 를 주면 해당 접두어의 doc_id 중 이번 동기화에 없는 문서는 삭제로 간주한다.
+        """
+        changed = 0; seen = set()
+        for doc_id, fields, version, payload in docs:
+            seen.add(doc_id)
+            changed += self.upsert(doc_id, fields, version, payload)
+        if prefix is not None:
+            with self._lock:
+                stale = [d for d in self._docs if str(d).startswith(prefix) and d not in seen]
+                for d in stale: self._remove(d)
+            changed += len(stale)
+        return changed
+
+    def _expand(self, tok):
+        if self._vocab_dirty:
+            self._vocab = sorted(self._postings); self._vocab_dirty = False
+        out = []
+        i = bisect_left(self._vocab, tok)
+        while i < len(self._vocab) and self._vocab[i].startswith(tok):
+            if self._vocab[i] != tok: out.append(self._vocab[i])
+            i += 1
+        return out
+
+    def search(self, query, limit=20, keep=None):
+        """BM25 순위 결과 [{"doc_id", "score", "payload", "matched"}] — matched 는 검색어가 포함된 필드명 목록. keep: doc_id → bool (순위 전 필터)"""
+        q_tokens = list(dict.fromkeys(tokenize(query)))
+        if not q_tokens: return []
+        with self._lock:
+            n_docs = len(self._docs)
+            if not n_docs: return []
+            avg_len = self._total_length / n_docs or 1.0
+            scores = {}
+            for tok in q_tokens:
+                terms = [(tok, 1.0)]
+                # 영문 3글자 이상은 접두어 확장 ('aggreg' → 'aggregation', 'aggregate')
+                if not _is_hangul(tok) and len(tok) >= 3: terms += [(t, _PREFIX_WEIGHT) for t in self._expand(tok)]
+                for term, boost in terms:
+                    posting = self._postings.get(term)
+                    if not posting: continue
+                    idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                    for doc_id, tf in posting.items():
+                        if keep is not None and not keep(doc_id): continue
+                        norm = tf + _BM25_K1 * (1 - _BM25_B + _BM25_B * self._docs[doc_id]["length"] / avg_len)
+                        scores[doc_id] = scores.get(doc_id, 0.0) + boost * idf * tf * (_BM25_K1 + 1) / norm
+            ranked = sorted(scores.items(), key=lambda x: -x[1])[:limit]
+            results = []
+            for doc_id, score in ranked:
+                doc = self._docs[doc_id]
+                matched = [name for name, text in doc["fields"].items()
+                           if any(t == q or (len(q) >= 3 and not _is_hangul(q) and t.startswith(q)) for t in tokenize(text) for q in q_tokens)]
+                results.append({"doc_id": doc_id, "score": round(score, 3), "payload": doc["payload"], "matched": matched})
+            return results
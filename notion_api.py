@@ -0,0 +1,363 @@
+"""
+노션 DB 조회 공통 모듈 (변경 감지 기반 캐시 무효화).
+
+database_version() 은 last_edited_time 내림차순 · page_size=1 쿼리 한 번으로 DB 의 최신 수정 시각을 확인한다 (Change Probe).
+조회 함수는 @st.cache_data 의 인자로 이 version 을 받으므로, DB 가 실제로 바뀌었을 때만 캐시 키가 바뀌어 다시 내려받는다.
+
+    @st.cache_data(max_entries=4)
+    def fetch(database_id, token, version=None): return fetch_database_frame(database_id, token)
+    df = fetch(DB_ID, TOKEN, database_version(DB_ID, TOKEN))
+
+- 프로브 결과는 PROBE_INTERVAL 초 동안 프로세스 안에서 재사용한다 (rerun 마다 왕복하지 않도록).
+- 보관(archive)된 페이지는 쿼리 결과에서 빠질 뿐 남은 행의 수정 시각을 바꾸지 않으므로,
+  삭제 반영을 위해 FULL_REFRESH_SECONDS 마다 version 에 시간 구간(epoch)을 더해 전체를 한 번 다시 받는다.
+
+swr_get() 은 그 위의 Stale-While-Revalidate 계층이다. 최초 1회를 제외하면 마지막 정상 데이터를 즉시 반환하고,
+재검증(프로브 → 변경 시 재조회)은 키마다 하나의 백그라운드 스레드에서 수행한 뒤 완료 시 원자적으로 교체한다.
+화면 로딩에는 노션 왕복 시간이 포함되지 않는다. data_as_of() 로 표시용 '데이터 기준 시각'을 얻는다.
+보관 값은 복사 · 피클 없이 모든 세션이 공유한다 (Zero-copy). 보관 시 freeze() 로 dict/list 를 읽기 전용으로 바꾸고,
+DataFrame 은 읽을 때마다 데이터 버퍼를 공유하는 얕은 view 를 준다 — pandas Copy-on-Write 로 view 를 수정하면 해당 열만 복사되고 원본은 그대로다.
+
+모든 노션 요청(조회 · 쓰기)은 프로세스 공용 토큰 버킷 RATE_LIMITER(통합 토큰 한도 평균 3 req/s)를 거치고,
+같은 DB · 같은 쿼리 본문의 동시 조회는 single_flight() 로 하나의 요청에 합쳐 결과를 공유한다 (Thundering Herd 방지).
+where() · one_of() · all_of() 로 만든 필터와 정렬은 query 본문으로, 필요한 속성은 filter_properties 로 서버에 넘긴다.
+관계(Relation)로 연결된 개별 페이지는 retrieve_pages() 가 고정 크기 배치 · 고정 스레드 수로 동시 조회한다.
+
+API 주소는 환경 변수 NOTION_BASE_URL 로 바꿀 수 있다 (예: 부하 테스트용 로컬 스텁 benchmarks/notion_stub.py).
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from types import MappingProxyType
+from urllib.parse import quote
+
+import pandas as pd
+
+NOTION_BASE_URL = os.environ.get("NOTION_BASE_URL", "https://api.notion.com/v1").rstrip("/")
+NOTION_VERSION = "2022-06-28"
+PROBE_INTERVAL = 5.0
+FULL_REFRESH_SECONDS = 3600
+PAGE_BATCH = 25         # retrieve_pages: 한 번에 띄우는 페이지 조회 수
+PAGE_WORKERS = 3        # 동시 요청 스레드 (전역 한도 3 req/s 와 같은 수)
+SCHEMA_RETRY = 30.0     # property_ids: 스키마 조회 실패 후 다시 묻기까지 (초)
+
+
+class NotionUnavailable(Exception):
+    """조회 실패 — 캐시 함수 밖으로 던져 실패 결과가 캐시되지 않게 한다"""
+
+
+_probe_cache = {}       # database_id → (확인 시각, version)
+_probe_lock = threading.Lock()
+
+
+# ---------------------------------------------------------
+# 전역 요청 한도 (Token Bucket) · 동시 요청 병합 (Single-flight)
+# ---------------------------------------------------------
+class TokenBucket:
+    """rate: 초당 토큰, capacity: 순간 최대 허용량. acquire() 는 토큰이 생길 때까지 대기한다."""
+    def __init__(self, rate=3.0, capacity=3):
+        self.rate = float(rate); self.capacity = float(capacity)
+        self._tokens = float(capacity); self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate); self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1; return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def penalize(self, seconds):
+        # 429 Retry-After 동안은 버킷을 비워 다른 요청도 함께 쉬게 한다
+        with self._lock:
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate
+
+
+RATE_LIMITER = TokenBucket(rate=3.0, capacity=3)
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self): self.done = threading.Event(); self.result = None; self.error = None
+
+
+_flights = {}
+_flight_lock = threading.Lock()
+
+
+def single_flight(key, fn):
+    """같은 key 의 호출이 진행 중이면 새로 실행하지 않고 그 결과(또는 예외)를 함께 받는다"""
+    with _flight_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader: flight = _flights[key] = _Flight()
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None: raise flight.error
+        return flight.result
+    try:
+        flight.result = fn(); return flight.result
+    except BaseException as e:
+        flight.error = e; raise
+    finally:
+        with _flight_lock: _flights.pop(key, None)
+        flight.done.set()
+
+
+def notion_headers(token):
+    return {"Authorization": f"Bearer {token}", "Notion-Version": NOTION_VERSION, "Content-Type": "application/json"}
+
+
+def _request(method, path, token, payload=None, retries=3):
+    import requests
+    for _ in range(retries + 1):
+        RATE_LIMITER.acquire()
+        try: res = requests.request(method, f"{NOTION_BASE_URL}{path}", headers=notion_headers(token), json=payload)
+        except Exception: return None
+        if res.status_code == 200: return res.json()
+        if res.status_code != 429: return None
+        try: RATE_LIMITER.penalize(float(res.headers.get("Retry-After", 1)))
+        except (TypeError, ValueError): RATE_LIMITER.penalize(1.0)
+    return None
+
+
+# ---------------------------------------------------------
+# 서버 측 필터 · 정렬 · 속성 선택 (Predicate Pushdown · Projection)
+# ---------------------------------------------------------
+# 화면 선택값으로 노션 query 본문의 filter / sorts 를 만든다 — 필요한 행만 내려받고 pandas 에서 다시 거르지 않는다.
+#     payload = query_payload(all_of(where("Modality", "mAb"), where("Phase", "Phase 3")), sort_by("Method Name"))
+#     query_all(db_id, token, payload, properties=["Modality", "Phase", "Method Name"])    # filter_properties
+def where(prop, value, prop_type="select", op="equals"):
+    """속성 1개 조건. prop_type: select · status · rich_text · title · number · checkbox · date, op: equals · contains · on_or_after …"""
+    return {"property": prop, prop_type: {op: value}}
+
+
+def one_of(prop, values, prop_type="select"):
+    """값 목록 중 하나 (OR). 값이 1개면 단일 조건."""
+    conds = [where(prop, v, prop_type) for v in dict.fromkeys(values)]
+    return conds[0] if len(conds) == 1 else ({"or": conds} if conds else None)
+
+
+def all_of(*conditions):
+    """None 을 뺀 조건들의 AND (1개면 그대로, 없으면 None)"""
+    conds = [c for c in conditions if c]
+    return conds[0] if len(conds) == 1 else ({"and": conds} if conds else None)
+
+
+def sort_by(*props, descending=False):
+    return [{"property": p, "direction": "descending" if descending else "ascending"} for p in props]
+
+
+def query_payload(filter=None, sorts=None):
+    payload = {}
+    if filter: payload["filter"] = filter
+    if sorts: payload["sorts"] = list(sorts)
+    return payload
+
+
+_property_ids = {}      # database_id → ({속성명: 속성 id}, 재조회 시각 — 실패한 조회만 monotonic 시각, 성공은 None)
+_property_lock = threading.Lock()
+
+
+def property_ids(database_id, token, names):
+    """
+    속성명 → filter_properties 에 쓸 속성 id 목록 (DB 스키마 GET 은 DB 버전이 바뀔 때마다 1회 — database_version 이 무효화).
+    스키마를 못 받으면 None (속성 선택 없이 전체 속성 조회 — 실패는 SCHEMA_RETRY 초 동안만 기억해 쿼리마다 다시 묻지 않는다), DB 에 없는 속성명은 건너뛴다.
+    """
+    with _property_lock: ids, retry_at = _property_ids.get(database_id, (None, 0.0))
+    if ids is None or (retry_at is not None and time.monotonic() >= retry_at):
+        schema = _request("GET", f"/databases/{database_id}", token)
+        ids = {name: p.get("id", name) for name, p in (schema or {}).get("properties", {}).items()}
+        with _property_lock: _property_ids[database_id] = (ids, None if schema is not None else time.monotonic() + SCHEMA_RETRY)
+    return [ids[n] for n in names if n in ids] or None
+
+
+def query_database(database_id, token, payload=None, properties=None):
+    """
+    POST /databases/{id}/query 1회 → 응답 JSON (실패 시 None). 동일 쿼리의 동시 호출은 1회로 병합 — 결과는 읽기 전용.
+    properties: 응답에 담을 속성명 목록 (filter_properties). None 이면 전체 속성.
+    """
+    payload = payload or {}
+    path = f"/databases/{database_id}/query"
+    ids = property_ids(database_id, token, properties) if properties else None
+    if ids: path += "?" + "&".join(f"filter_properties={quote(i, safe='%')}" for i in ids)
+    key = ("query", path, token, json.dumps(payload, sort_keys=True))
+    return single_flight(key, lambda: _request("POST", path, token, payload))
+
+
+def query_all(database_id, token, payload=None, properties=None):
+    """페이지네이션을 끝까지 따라가 전체 results 를 반환 (중간 실패 시 None)"""
+    payload = dict(payload or {}); payload.setdefault("page_size", 100)
+    results = []
+    while True:
+        body = query_database(database_id, token, payload, properties)
+        if body is None: return None
+        results.extend(body.get("results", []))
+        if not body.get("has_more") or not body.get("next_cursor"): return results
+        payload["start_cursor"] = body["next_cursor"]
+
+
+def retrieve_page(page_id, token):
+    """GET /pages/{id} 1회 → 페이지 JSON (실패 시 None). 같은 페이지의 동시 조회는 1회로 병합."""
+    return single_flight(("page", page_id, token), lambda: _request("GET", f"/pages/{page_id}", token))
+
+
+def retrieve_pages(page_ids, token, batch_size=PAGE_BATCH, workers=PAGE_WORKERS):
+    """
+    페이지 여러 건을 batch_size 개씩 끊어 workers 스레드로 동시 조회 → {page_id: 페이지} (실패한 id 는 빠진다).
+    동시 요청 수 · 대기 작업 수가 고정되므로 id 가 많아도 메모리와 스레드는 늘지 않고, 전송 속도는 RATE_LIMITER 가 정한다.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    page_ids = list(dict.fromkeys(page_ids)); pages = {}
+    if not page_ids: return pages
+    with ThreadPoolExecutor(max_workers=min(workers, len(page_ids)), thread_name_prefix="notion-page") as pool:
+        for i in range(0, len(page_ids), batch_size):
+            batch = page_ids[i:i + batch_size]
+            pages.update((pid, p) for pid, p in zip(batch, pool.map(lambda pid: retrieve_page(pid, token), batch)) if p is not None)
+    return pages
+
+def probe_last_edited(database_id, token):
+    """가장 최근에 수정된 페이지 1건의 last_edited_time (실패 시 None)"""
+    body = query_database(database_id, token, {"sorts": [{"timestamp": "last_edited_time", "direction": "descending"}], "page_size": 1})
+    if body is None: return None
+    rows = body.get("results", [])
+    return rows[0].get("last_edited_time", "") if rows else ""
+
+
+def database_version(database_id, token, min_interval=PROBE_INTERVAL):
+    """캐시 키로 쓸 DB 버전 문자열. 프로브 실패 시 직전 버전을 유지해 캐시를 불필요하게 버리지 않는다."""
+    if not database_id: return None
+    now = time.monotonic()
+    with _probe_lock:
+        hit = _probe_cache.get(database_id)
+        if hit and now - hit[0] < min_interval: return hit[1]
+    last = probe_last_edited(database_id, token)
+    epoch = int(time.time() // FULL_REFRESH_SECONDS)
+    with _probe_lock:
+        if last is None:
+            version = hit[1] if hit else None
+        else:
+            version = f"{last}|{epoch}"
+        _probe_cache[database_id] = (now, version)
+    if hit and version != hit[1]:
+        # DB 가 바뀌면(또는 FULL_REFRESH_SECONDS 주기) 속성 id 도 다시 조회 — 추가 · 재생성된 속성을 filter_properties 에 반영
+        with _property_lock: _property_ids.pop(database_id, None)
+    return version
+
+
+def flatten_properties(props):
+    """페이지 속성 → {속성명: 문자열} (title / rich_text / select 는 표시 텍스트, 나머지는 str)"""
+    row = {}
+    for key, val in props.items():
+        p_type = val.get("type")
+        if p_type == "title": row[key] = val["title"][0]["plain_text"] if val["title"] else ""
+        elif p_type == "select": row[key] = val["select"]["name"] if val["select"] else ""
+        elif p_type == "rich_text": row[key] = val["rich_text"][0]["plain_text"] if val["rich_text"] else ""
+        else: row[key] = str(val.get(p_type, ""))
+    return row
+
+
+def fetch_database_frame(database_id, token, payload=None, properties=None):
+    """DB 조회 결과 → DataFrame (도구 앱 공통 평탄화). payload · properties 는 query_all 과 같다. 조회 실패 시 NotionUnavailable."""
+    results = query_all(database_id, token, payload, properties)
+    if results is None: raise NotionUnavailable(database_id)
+    if not results: return pd.DataFrame()
+    return pd.DataFrame([flatten_properties(p.get("properties", {})) for p in results])
+
+
+# ---------------------------------------------------------
+# 공유 값 동결 (Zero-copy · Copy-on-Write)
+# ---------------------------------------------------------
+def freeze(value):
+    """보관 시 1회: dict → MappingProxyType, list → tuple (중첩 포함). 레코드 · DataFrame · 스칼라는 그대로."""
+    if isinstance(value, dict): return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)): return tuple(freeze(v) for v in value)
+    return value
+
+
+def shared_view(value):
+    """읽을 때마다: DataFrame 은 버퍼를 공유하는 얕은 복사(열 수에 비례하는 비용)로, 나머지는 동결된 값 그대로"""
+    return value.copy(deep=False) if isinstance(value, pd.DataFrame) else value
+
+
+# ---------------------------------------------------------
+# Stale-While-Revalidate (프로세스 공용 · 세션 간 공유)
+# ---------------------------------------------------------
+class _Entry:
+    __slots__ = ("value", "version", "as_of", "checked", "refreshing")
+
+    def __init__(self, value, version, as_of):
+        self.value = value; self.version = version; self.as_of = as_of
+        self.checked = time.monotonic(); self.refreshing = False
+
+
+_swr = {}               # (name, database_id) → _Entry
+_swr_lock = threading.Lock()
+
+
+def _revalidate(key, database_id, token, loader):
+    entry = _swr[key]
+    try:
+        version = database_version(database_id, token, min_interval=0)
+        if version is not None and version != entry.version:
+            value = freeze(loader(database_id, token))
+            with _swr_lock: _swr[key] = _Entry(value, version, datetime.now())   # 원자적 교체
+        elif version is not None:
+            entry.as_of = datetime.now()      # 변경 없음 확인 → 기준 시각만 갱신
+    except Exception: pass                    # 실패 시 기존(stale) 데이터를 계속 제공
+    finally:
+        entry.checked = time.monotonic(); entry.refreshing = False
+
+
+def swr_get(database_id, token, loader, name=None, min_interval=PROBE_INTERVAL):
+    """
+    loader(database_id, token) 결과를 프로세스 공용으로 보관해 즉시 반환한다.
+    최초 조회만 동기(실패 시 loader 의 예외가 그대로 전달), 이후에는 min_interval 마다 백그라운드 재검증을 1회 트리거.
+    반환 값은 모든 세션이 공유한다 — dict/list 는 읽기 전용으로 동결되고, DataFrame 은 수정해도 원본에 반영되지 않는 view 다.
+    """
+    key = (name or loader.__name__, database_id)
+    entry = _swr.get(key)
+    if entry is None:
+        # 콜드 스타트에 여러 세션이 동시에 들어와도 조회는 한 번만
+        def cold_load():
+            version = database_version(database_id, token)
+            value = freeze(loader(database_id, token))
+            with _swr_lock: return _swr.setdefault(key, _Entry(value, version, datetime.now()))
+        return shared_view(single_flight(("swr",) + key, lambda: _swr.get(key) or cold_load()).value)
+    with _swr_lock:
+        start = not entry.refreshing and time.monotonic() - entry.checked >= min_interval
+        if start: entry.refreshing = True
+    if start:
+        threading.Thread(target=_revalidate, args=(key, database_id, token, loader), name=f"swr-{key[0]}", daemon=True).start()
+    return shared_view(entry.value)
+
+
+_derived = {}          # 이름 → (원본 값 tuple, 파생 값)
+
+
+def derived(name, fn, *sources):
+    """
+    swr_get 값(sources)에서 만든 조인 · 그룹 색인을 프로세스 공용으로 1회만 계산한다.
+    SWR 값은 재조회로 교체될 때만 객체가 바뀌므로 객체 동일성(is)으로 무효화한다 — rerun 마다 값을 비교 · 해시하지 않는다.
+    """
+    hit = _derived.get(name)
+    if hit is not None and len(hit[0]) == len(sources) and all(a is b for a, b in zip(hit[0], sources)): return hit[1]
+    value = freeze(fn(*sources))
+    _derived[name] = (sources, value)     # 원본 참조를 함께 보관해 id 재사용으로 인한 오판을 막는다
+    return value
+
+
+def data_as_of(*database_ids):
+    """해당 DB 들의 데이터 기준 시각 중 가장 오래된 값 (없으면 None)"""
+    times = [e.as_of for (_, db), e in list(_swr.items()) if not database_ids or db in database_ids]
+    return min(times) if times else None
+
+
+def is_refreshing(*database_ids):
+    return any(e.refreshing for (_, db), e in list(_swr.items()) if not database_ids or db in database_ids)
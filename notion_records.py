@@ -0,0 +1,203 @@
+"""
+노션 행 레코드 (__slots__ 기반 경량 타입).
+
+CRITERIA / STRATEGY / PARAM DB 행을 DataFrame(object 열) 대신 __slots__ 레코드의 tuple 로 보관한다.
+인스턴스마다 __dict__ 가 없고, 목록 값은 tuple, 반복되는 짧은 문자열(Modality · Phase · Category 등)은 intern 하여 공유하므로
+프로세스 공용 캐시(swr_get)에 여러 DB 를 올려도 메모리가 작고, 피클 시에는 (클래스, 값 tuple) 만 기록한다.
+
+    rows = (StrategyRow("mAb", "Phase 1", "SEC-HPLC", "Purity", ("Specificity",), page_id), ...)
+    row.Method / row["Method"] / row.get("Method")       # 속성 · dict 스타일 모두 지원 (기존 호출부 호환)
+    st.dataframe(records_frame(rows, ["Method", "Category"]))   # DataFrame 은 화면 표시 시점에만 생성
+
+레코드는 세션 간 공유되므로 불변이다. 값을 바꾸려면 row.replace(Category="Purity") 로 새 레코드를 만든다 (명시적 Copy-on-Write).
+
+탭 · 필터 · 그룹 화면은 적재 시 1회 만든 색인을 쓴다 — rerun 마다 전체 스캔 · 문자열 정규화를 반복하지 않는다.
+    group_records(rows, "Modality", "Phase")[("mAb", "Phase 1")]     # 레코드: (필드 값 tuple) → 레코드 tuple
+    IndexedFrame(df, {"category": df["Category"]}).rows("category", "Purity")   # DataFrame: 그룹 위치만 take → O(그룹 크기)
+"""
+import sys
+
+
+def _text(v): return sys.intern(v) if isinstance(v, str) and len(v) <= 64 else v
+
+
+class Record:
+    """필드명 = __slots__. 매핑처럼 get / keys / items / [] 를 제공하며, 생성 후에는 수정할 수 없다."""
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, v in zip(self.__slots__, values): object.__setattr__(self, name, v)
+
+    def __setattr__(self, name, value): raise AttributeError(f"{type(self).__name__} 는 읽기 전용입니다 — replace() 를 사용하세요")
+
+    def __delattr__(self, name): raise AttributeError(f"{type(self).__name__} 는 읽기 전용입니다")
+
+    def replace(self, **changes):
+        """지정한 필드만 바꾼 새 레코드 (원본 · 다른 세션이 보는 값은 그대로)"""
+        unknown = changes.keys() - set(self.__slots__)
+        if unknown: raise TypeError(f"알 수 없는 필드: {sorted(unknown)}")
+        return self.__class__(*(changes.get(k, v) for k, v in self.items()))
+
+    def __getitem__(self, key):
+        try: return getattr(self, key)
+        except (AttributeError, TypeError): raise KeyError(key)
+
+    def __contains__(self, key): return key in self.__slots__
+
+    def get(self, key, default=None): return getattr(self, key, default) if isinstance(key, str) else default
+
+    def keys(self): return self.__slots__
+
+    def values(self): return tuple(getattr(self, k) for k in self.__slots__)
+
+    def items(self): return tuple((k, getattr(self, k)) for k in self.__slots__)
+
+    def as_dict(self): return dict(self.items())
+
+    def __reduce__(self): return (self.__class__, self.values())
+
+    def __eq__(self, other): return type(other) is type(self) and other.values() == self.values()
+
+    def __hash__(self): return hash(self.values())
+
+    def __repr__(self): return f"{type(self).__name__}({', '.join(f'{k}={v!r}' for k, v in self.items())})"
+
+
+# ---------------------------------------------------------
+# DB 별 레코드
+# ---------------------------------------------------------
+class CriteriaRow(Record):
+    """CRITERIA DB: 시험 분류 · 필수 평가 항목"""
+    __slots__ = ("page_id", "Category", "Required_Items")
+
+    def __init__(self, page_id, Category, Required_Items=()):
+        Record.__init__(self, page_id, _text(Category), tuple(_text(i) for i in Required_Items))
+
+
+class StrategyRow(Record):
+    """STRATEGY DB 행 + CRITERIA 조인 결과. rel 은 관계(Relation) 페이지 id 전체."""
+    __slots__ = ("Modality", "Phase", "Method", "Category", "Required_Items", "page_id", "rel")
+
+    def __init__(self, Modality, Phase, Method, Category="Unknown", Required_Items=(), page_id="", rel=()):
+        Record.__init__(self, _text(Modality), _text(Phase), _text(Method), _text(Category), tuple(Required_Items), page_id, tuple(rel))
+
+    def joined(self, criteria):
+        """
+        criteria(CriteriaRow 또는 그 목록) 의 분류 · 필수 항목을 채운 새 레코드.
+        관계가 여러 개면 분류는 ' / ' 로 잇고, 필수 항목은 처음 나온 순서대로 중복 없이 합친다.
+        """
+        if isinstance(criteria, CriteriaRow): criteria = (criteria,)
+        criteria = [c for c in criteria or () if c is not None]
+        if not criteria: return self
+        return self.replace(Category=" / ".join(dict.fromkeys(c.Category for c in criteria)),
+                            Required_Items=tuple(dict.fromkeys(i for c in criteria for i in c.Required_Items)))
+
+
+def join_relations(rows, index, fetch=None):
+    """
+    rows(.rel = 관계 페이지 id 전체) 를 index({page_id: 레코드}) 와 해시 조인 → (조인된 rows tuple, 해석하지 못한 id tuple).
+    index 에 없는 id 는 모아서 fetch(ids) → {page_id: 레코드} 를 한 번만 호출해 보충한다 (행마다 조회하지 않는다).
+    """
+    wanted = dict.fromkeys(i for r in rows for i in r.rel)
+    missing = [i for i in wanted if i not in index]
+    if missing and fetch is not None:
+        index = {**index, **fetch(missing)}
+    unresolved = tuple(i for i in wanted if i not in index)
+    return tuple(r.joined([index[i] for i in r.rel if i in index]) if r.rel else r for r in rows), unresolved
+
+
+PARAM_TEXT_FIELDS = (
+    "Instrument", "Column_Plate", "Condition_A", "Condition_B", "Detection", "SST_Criteria", "Reference_Guideline",
+    "Detail_Specificity", "Detail_Linearity", "Detail_Range", "Detail_Accuracy", "Detail_Precision", "Detail_Inter_Precision",
+    "Detail_LOD", "Detail_LOQ", "Detail_Robustness", "Reagent_List", "Ref_Standard_Info", "Preparation_Std", "Preparation_Sample", "Unit")
+PARAM_NUMBER_FIELDS = ("Target_Conc",)
+
+
+class MethodParams(Record):
+    """PARAM DB 의 Method 별 시험 조건. 기존 params dict 와 같은 방식(params.get('Unit'))으로 읽는다."""
+    __slots__ = PARAM_TEXT_FIELDS + PARAM_NUMBER_FIELDS
+
+    def __init__(self, *values, **fields):
+        Record.__init__(self, *values)
+        for name in self.__slots__[len(values):]:
+            v = fields.get(name, "" if name in PARAM_TEXT_FIELDS else None)
+            object.__setattr__(self, name, _text(v) if name in ("Instrument", "Detection", "Unit") else v)
+
+
+class ParamRow(Record):
+    """PARAM DB 행. criteria 는 적재 시 컴파일한 판정 기준 (acceptance_criteria.CriteriaSet)"""
+    __slots__ = ("id", "last_edited", "Method", "params", "criteria")
+
+    def __init__(self, id, last_edited, Method, params, criteria=None):
+        Record.__init__(self, id, last_edited, _text(Method), params, criteria)
+
+
+def records_frame(records, columns=None):
+    """레코드 목록 → DataFrame (표시 전용). columns 를 주면 해당 열만 만든다."""
+    import pandas as pd
+    records = list(records)
+    if columns is None: columns = list(records[0].__slots__) if records else []
+    return pd.DataFrame({c: [r[c] for r in records] for c in columns}, columns=columns)
+
+
+def group_records(records, *fields):
+    """필드 값 조합 → 레코드 tuple (등장 순서 유지). 필드가 하나면 키는 값 자체."""
+    groups = {}
+    for r in records:
+        key = getattr(r, fields[0]) if len(fields) == 1 else tuple(getattr(r, f) for f in fields)
+        groups.setdefault(key, []).append(r)
+    return {k: tuple(v) for k, v in groups.items()}
+
+
+# ---------------------------------------------------------
+# DataFrame 그룹 색인
+# ---------------------------------------------------------
+class IndexedFrame:
+    """
+    DataFrame + 적재 시 1회 계산한 그룹 색인. keys: {색인명: 정규화된 키 Series} — 결측(None/NaN) 행은 어느 그룹에도 넣지 않는다.
+    원본은 세션 간 공유되므로 frame 은 버퍼를 공유하는 view 로, rows() 는 해당 그룹 행만 복사해 준다.
+    """
+    __slots__ = ("_frame", "_groups")
+
+    def __init__(self, frame, keys=None):
+        import numpy as np
+        import pandas as pd
+        groups = {}
+        for name, key in (keys or {}).items():
+            key = pd.Series(key).reset_index(drop=True)
+            positions = pd.Series(np.arange(len(key))).groupby(key, sort=False).indices
+            ordered = {}
+            for value in key.dropna().unique():
+                pos = np.asarray(positions[value]); pos.setflags(write=False); ordered[value] = pos
+            groups[name] = ordered
+        object.__setattr__(self, "_frame", frame); object.__setattr__(self, "_groups", groups)
+
+    def __setattr__(self, name, value): raise AttributeError("IndexedFrame 는 읽기 전용입니다")
+
+    def __len__(self): return len(self._frame)
+
+    @property
+    def empty(self): return self._frame.empty
+
+    @property
+    def columns(self): return self._frame.columns
+
+    @property
+    def frame(self): return self._frame.copy(deep=False)
+
+    def keys(self, name):
+        """색인 name 의 그룹 값 (등장 순서)"""
+        return list(self._groups.get(name, {}))
+
+    def positions(self, name, value):
+        return self._groups.get(name, {}).get(value, [])
+
+    def rows(self, name, value, columns=None):
+        frame = self._frame if columns is None else self._frame[list(columns)]
+        return frame.take(self.positions(name, value))
+
+    def flags(self, name, value):
+        """그룹 소속 여부 bool 배열 (행 순서) — 행 단위 반복에서 조건 판정을 다시 하지 않기 위함"""
+        import numpy as np
+        out = np.zeros(len(self._frame), dtype=bool); out[self.positions(name, value)] = True
+        return out
@@ -0,0 +1,115 @@
+"""
+노션 결과 반영 (Batched · Rate-limited Write-back).
+
+    writer = NotionWriter(api_key)
+    writer.stage(page_id, {"Result_R2": {"number": 0.9993}})   # 같은 페이지는 하나의 PATCH 로 병합 (Coalescing)
+    report = writer.flush(on_progress)                         # 토큰 버킷(기본 3 req/s)으로 순차 전송
+
+노션 API 평균 한도(약 3 req/s)를 넘지 않도록 프로세스 공용 토큰 버킷(notion_api.RATE_LIMITER)으로 요청 간격을 고정하므로 50 페이지 반영 시간은 ≈ 50 / rate 초로 예측 가능하다.
+페이지 속성 PATCH 는 같은 값을 다시 써도 결과가 같으므로(멱등) 429 / 5xx / 네트워크 오류는 Retry-After 또는 지수 백오프 후 재시도한다.
+"""
+import random
+import threading
+import time
+
+from notion_api import NOTION_BASE_URL, RATE_LIMITER, notion_headers
+_RETRY_STATUS = {409, 429, 500, 502, 503, 504}
+
+
+# ---------------------------------------------------------
+# 속성 값 → 노션 property payload (DB 스키마 타입 기준)
+# ---------------------------------------------------------
+def property_value(prop_type, value):
+    if value is None or value == "N/A":
+        return {"number": None} if prop_type == "number" else ({"rich_text": []} if prop_type == "rich_text" else None)
+    if prop_type == "number":
+        try: return {"number": float(value)}
+        except (TypeError, ValueError): return None
+    if prop_type == "rich_text": return {"rich_text": [{"type": "text", "text": {"content": str(value)[:2000]}}]}
+    if prop_type == "select": return {"select": {"name": str(value)[:100]}}
+    if prop_type == "date": return {"date": {"start": str(value)}}
+    if prop_type == "checkbox": return {"checkbox": bool(value)}
+    return None
+
+
+def build_properties(values, schema):
+    """values: {속성명: 값}, schema: {속성명: 타입}. DB 에 없는 속성은 건너뛰고 (payload, 누락 속성 목록) 반환."""
+    payload, missing = {}, []
+    for name, value in values.items():
+        prop_type = schema.get(name)
+        if prop_type is None: missing.append(name); continue
+        v = property_value(prop_type, value)
+        if v is not None: payload[name] = v
+    return payload, missing
+
+
+class NotionWriter:
+    """
+    기본으로 조회와 같은 전역 버킷(RATE_LIMITER)을 쓴다 — 통합(Integration) 토큰 단위의 한도를 프로세스 전체가 함께 지키기 위함.
+    stage/flush 대기열은 writer 인스턴스별이므로 요청(세션)마다 새로 만든다.
+    """
+    def __init__(self, api_key, bucket=None, max_retries=5, timeout=30, base_url=NOTION_BASE_URL):
+        self.api_key = api_key; self.max_retries = max_retries; self.timeout = timeout; self.base_url = base_url
+        self.bucket = bucket or RATE_LIMITER
+        self._pending = {}          # page_id → 병합된 properties (삽입 순서 유지)
+        self._lock = threading.Lock()
+        self._session = None
+
+    def _http(self):
+        if self._session is None:
+            import requests
+            self._session = requests.Session(); self._session.headers.update(notion_headers(self.api_key))
+        return self._session
+
+    def __len__(self): return len(self._pending)
+
+    def stage(self, page_id, properties):
+        """같은 페이지에 대한 여러 갱신은 속성 단위로 병합되어 PATCH 1회로 전송된다 (나중 값 우선)"""
+        if not page_id or not properties: return
+        with self._lock: self._pending.setdefault(page_id, {}).update(properties)
+
+    def estimate_seconds(self):
+        return max(len(self._pending) - self.bucket.capacity, 0) / self.bucket.rate
+
+    def get_schema(self, database_id):
+        """{속성명: 타입} — 존재하는 속성에만 쓰기 위해 사용"""
+        self.bucket.acquire()
+        try:
+            res = self._http().get(f"{self.base_url}/databases/{database_id}", timeout=self.timeout)
+            if res.status_code != 200: return {}
+            return {k: v.get("type") for k, v in res.json().get("properties", {}).items()}
+        except Exception: return {}
+
+    def _patch(self, page_id, properties):
+        attempt, last = 0, None
+        while attempt <= self.max_retries:
+            attempt += 1
+            self.bucket.acquire()
+            try:
+                res = self._http().patch(f"{self.base_url}/pages/{page_id}", json={"properties": properties}, timeout=self.timeout)
+                status = res.status_code
+            except Exception as e:
+                status, last = None, str(e)
+            else:
+                if status == 200: return {"page_id": page_id, "ok": True, "status": 200, "attempts": attempt}
+                last = res.text[:300]
+                if status not in _RETRY_STATUS:
+                    return {"page_id": page_id, "ok": False, "status": status, "attempts": attempt, "error": last}
+            # 재시도 대기: Retry-After 는 버킷에 반영(다음 acquire 가 대기), 없으면 지수 백오프 + 지터
+            retry_after = None
+            if status == 429:
+                try: retry_after = float(res.headers.get("Retry-After"))
+                except (TypeError, ValueError): retry_after = None
+            if retry_after is not None: self.bucket.penalize(retry_after)
+            else: time.sleep(min(30.0, 0.5 * 2 ** (attempt - 1)) * (0.5 + random.random() / 2))
+        return {"page_id": page_id, "ok": False, "status": status, "attempts": attempt, "error": last}
+
+    def flush(self, on_progress=None):
+        """대기 중인 갱신을 전송하고 페이지별 결과 목록을 반환. 실패한 페이지는 다시 stage 되지 않는다."""
+        with self._lock:
+            batch = list(self._pending.items()); self._pending.clear()
+        results = []
+        for i, (page_id, props) in enumerate(batch, 1):
+            results.append(self._patch(page_id, props))
+            if on_progress: on_progress(i, len(batch))
+        return results
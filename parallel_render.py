@@ -0,0 +1,92 @@
+"""
+독립 문서 병렬 렌더링.
+
+서로 상태를 공유하지 않는 생성기(VMP · Recipe · Protocol, CTD · Stability Matrix 등)를 풀에서 동시에 실행하고
+결과 바이트를 모은다. 다문서 요청의 지연 시간 = 가장 느린 문서 1건.
+
+    render_all({"VMP.docx": (generate_vmp_premium, modality, phase, plan),
+                "Protocol.docx": partial(generate_protocol_premium, ...)})   → {"VMP.docx": b"...", ...}
+
+스레드 풀이 기본이다 (Streamlit 스크립트(__main__)에 정의된 함수도 그대로 실행 가능).
+use_processes=True 이면 (멀티코어 환경에서) import 가능한 최상위 함수만 프로세스 풀로 보내고, 나머지는 스레드 풀에서 실행한다.
+"""
+import io
+import multiprocessing
+import os
+import pickle
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+_MAX_WORKERS = min(8, (os.cpu_count() or 1) + 2)
+_MULTI_CORE = (os.cpu_count() or 1) > 1     # 단일 코어에서는 프로세스 풀이 기동 비용만 늘린다
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+def _pool(kind):
+    # 세션 간 공유 · 한 번만 생성 (프로세스 풀은 워커 기동 비용이 커서 재사용이 필수)
+    with _pool_lock:
+        if kind not in _pools:
+            if kind == "process":
+                _pools[kind] = ProcessPoolExecutor(_MAX_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                _pools[kind] = ThreadPoolExecutor(_MAX_WORKERS, thread_name_prefix="render")
+        return _pools[kind]
+
+
+def _as_bytes(data):
+    if isinstance(data, (bytes, bytearray)): return bytes(data)
+    if hasattr(data, "getvalue"): return data.getvalue()
+    return data.read()
+
+
+def _call(fn, args, kwargs): return _as_bytes(fn(*args, **kwargs))
+
+
+def _split(job):
+    # (fn, *args) 튜플 · callable(partial 포함) 모두 허용
+    if isinstance(job, tuple): return job[0], job[1:], {}
+    fn = getattr(job, "func", None)
+    if fn is not None: return fn, tuple(job.args), dict(job.keywords)
+    return job, (), {}
+
+
+def _picklable(fn, args, kwargs):
+    if getattr(fn, "__module__", "__main__") == "__main__" or "<locals>" in getattr(fn, "__qualname__", "<locals>"): return False
+    try: pickle.dumps((fn, args, kwargs)); return True
+    except Exception: return False
+
+
+def render_all(jobs, use_processes=False, timeout=None):
+    """jobs: {이름: (fn, *args) | callable} → {이름: bytes}. 하나라도 실패하면 나머지 완료 후 첫 예외를 다시 던진다."""
+    futures = {}
+    for name, job in jobs.items():
+        fn, args, kwargs = _split(job)
+        kind = "process" if use_processes and _MULTI_CORE and _picklable(fn, args, kwargs) else "thread"
+        futures[name] = (_pool(kind).submit(_call, fn, args, kwargs), fn, args, kwargs)
+    results, error = {}, None
+    for name, (fut, fn, args, kwargs) in futures.items():
+        try: results[name] = fut.result(timeout)
+        except BrokenProcessPool:
+            # 워커 프로세스 기동 실패 → 풀을 버리고 해당 문서는 스레드에서 다시 생성
+            with _pool_lock: _pools.pop("process", None)
+            try: results[name] = _pool("thread").submit(_call, fn, args, kwargs).result(timeout)
+            except Exception as e: error = error or e
+        except Exception as e: error = error or e
+    if error is not None: raise error
+    return results
+
+
+def bundle_zip(rendered):
+    """{파일명: bytes} → zip 바이트 (문서는 이미 압축되어 있으므로 STORED)"""
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_STORED) as z:
+        for name, data in rendered.items(): z.writestr(name, data)
+    return out.getvalue()
+
+
+def render_bundle(jobs, use_processes=False):
+    """render_all + bundle_zip — st.download_button 의 data callable 로 사용"""
+    return bundle_zip(render_all(jobs, use_processes))
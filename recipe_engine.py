@@ -0,0 +1,80 @@
+"""
+시약 제조(Dilution / Recipe) 배치 계산 엔진.
+
+my_plan 의 모든 Method 에 대해 (Method × Level) 희석 조건을 NumPy 브로드캐스팅으로 한 번에 계산하고,
+반복 조제 수(replicates)를 반영한 Method 별 / 캠페인 전체 소요량(Stock·Diluent·API 질량)을 집계한다.
+"""
+import numpy as np
+import pandas as pd
+
+DEFAULT_LEVELS = (80, 90, 100, 110, 120)
+
+
+def parse_levels(text):
+    """'80, 90,100 ,110;120' → (80.0, 90.0, 100.0, 110.0, 120.0). 잘못된 값은 무시."""
+    out = []
+    for tok in str(text).replace(";", ",").split(","):
+        try:
+            v = float(tok.strip())
+            if v > 0: out.append(v)
+        except ValueError: continue
+    return tuple(sorted(set(out))) or DEFAULT_LEVELS
+
+
+def dilution_scheme(target_conc, stock_conc, vial_vol, levels=DEFAULT_LEVELS):
+    """
+    target_conc / stock_conc / vial_vol: 스칼라 또는 길이 M 배열, levels: 길이 L (%).
+    반환: (M, L) 배열 dict — conc(목표 농도), stock_vol, diluent_vol, feasible(Stock 이 해당 Level 보다 진한지)
+    """
+    t = np.atleast_1d(np.asarray(target_conc, dtype=float))[:, None]
+    s = np.atleast_1d(np.asarray(stock_conc, dtype=float))[:, None]
+    v = np.atleast_1d(np.asarray(vial_vol, dtype=float))[:, None]
+    lv = np.asarray(levels, dtype=float)[None, :] / 100.0
+    conc = t * lv
+    with np.errstate(divide="ignore", invalid="ignore"):
+        stock_vol = np.where(s > 0, conc * v / s, 0.0)
+    stock_vol = np.nan_to_num(stock_vol)
+    diluent_vol = v - stock_vol
+    feasible = (s > 0) & (stock_vol <= v)
+    return {"conc": conc, "stock_vol": stock_vol, "diluent_vol": diluent_vol, "vial_vol": np.broadcast_to(v, conc.shape), "feasible": feasible}
+
+
+def plan_recipes(plan, levels=DEFAULT_LEVELS, replicates=1):
+    """
+    plan: Method, Target_Conc, Stock_Conc, Vial_Vol (+ Unit) 컬럼을 가진 DataFrame 또는 dict 리스트.
+    반환: (detail, rollup)
+        detail — Method × Level 한 행씩 (long format)
+        rollup — Method 별 총 Stock/Diluent 부피, 필요 API 질량(= Stock 부피 × Stock 농도), 바이알 수, 조제 가능 여부
+    """
+    df = pd.DataFrame(plan).reset_index(drop=True)
+    if df.empty:
+        return pd.DataFrame(), pd.DataFrame()
+    if "Unit" not in df: df["Unit"] = ""
+    levels = tuple(levels); reps = max(int(replicates), 1)
+    sch = dilution_scheme(df["Target_Conc"].to_numpy(float), df["Stock_Conc"].to_numpy(float), df["Vial_Vol"].to_numpy(float), levels)
+    m, n_lv = sch["conc"].shape
+
+    detail = pd.DataFrame({
+        "Method": np.repeat(df["Method"].to_numpy(), n_lv),
+        "Level (%)": np.tile(np.asarray(levels, dtype=float), m),
+        "Target Conc": sch["conc"].ravel(),
+        "Unit": np.repeat(df["Unit"].to_numpy(), n_lv),
+        "Stock Vol (mL)": sch["stock_vol"].ravel(),
+        "Diluent Vol (mL)": sch["diluent_vol"].ravel(),
+        "Total (mL)": sch["vial_vol"].ravel(),
+        "Replicates": reps,
+        "Feasible": sch["feasible"].ravel(),
+    })
+
+    stock_total = sch["stock_vol"].sum(axis=1) * reps
+    rollup = pd.DataFrame({
+        "Method": df["Method"],
+        "Unit": df["Unit"],
+        "Stock Conc": df["Stock_Conc"].astype(float),
+        "Vials": n_lv * reps,
+        "Total Stock (mL)": stock_total,
+        "Total Diluent (mL)": sch["diluent_vol"].sum(axis=1) * reps,
+        "API Needed": stock_total * df["Stock_Conc"].to_numpy(float),
+        "Feasible": sch["feasible"].all(axis=1),
+    })
+    return detail, rollup
@@ -0,0 +1,186 @@
+"""
+밸리데이션 결과 이력 저장소 (Append-only Columnar Store).
+
+extract_logbook_data 결과를 (Method, Lot, Date) 키로 누적 저장한다. 이미 저장된 키는 다시 쓰지 않는다 (중복 저장 무시).
+    segments/seg-000001.npz  — append 1회당 세그먼트 1개 (컬럼별 NumPy 배열, 수정/삭제 없음)
+    aggregates.json          — Method × 지표별 누적 통계 (Welford mean/M2, min/max, 이동범위 MR)
+                               + 최근 ROLLING_WINDOW 건 링 버퍼 (Date, Lot 순)
+    keys.jsonl               — 저장된 (Method, Lot, Date) 키 (append 마다 줄 추가 — 중복 저장 판별용)
+추세/관리도는 aggregates.json 만 읽으므로 이력이 수년치로 늘어도 과거 세그먼트를 다시 읽지 않는다.
+저장 1회의 쓰기량은 세그먼트 · 키 몇 줄 · 고정 크기 aggregates.json 으로 누적 이력 크기와 무관하다.
+"""
+import bisect
+import datetime
+import json
+import math
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+# 저장 지표 (summarize_runs 결과 키 → 표시명)
+METRICS = {
+    "sst": "SST RSD (%)",
+    "r2": "R²",
+    "slope": "Slope",
+    "acc_mean": "Recovery (%)",
+    "prec_rsd": "Precision RSD (%)",
+    "lod_sn": "LOD S/N",
+    "loq_sn": "LOQ S/N",
+}
+ROLLING_WINDOW = 100
+_D2 = 1.128     # I-MR 관리도 상수 (n=2)
+
+
+def _to_float(v):
+    try:
+        v = float(v)
+        return v if math.isfinite(v) else math.nan
+    except (TypeError, ValueError): return math.nan
+
+
+def _empty_stat():
+    return {"n": 0, "mean": 0.0, "m2": 0.0, "min": None, "max": None, "last": None, "mr_sum": 0.0, "mr_n": 0, "ring": []}
+
+
+def _update_stat(s, value, date, lot):
+    # Welford 갱신 + 이동범위(|x_i - x_(i-1)|) 누적 → 과거 값을 다시 읽지 않고 평균/SD/관리한계 계산
+    s["n"] += 1
+    delta = value - s["mean"]
+    s["mean"] += delta / s["n"]
+    s["m2"] += delta * (value - s["mean"])
+    s["min"] = value if s["min"] is None else min(s["min"], value)
+    s["max"] = value if s["max"] is None else max(s["max"], value)
+    if s["last"] is not None:
+        s["mr_sum"] += abs(value - s["last"]); s["mr_n"] += 1
+    s["last"] = value
+    # 링 버퍼는 (Date, Lot) 순 — 과거 Lot 을 나중에 저장해도 최신 결과 · 관리도 순서가 날짜를 따른다
+    bisect.insort(s["ring"], [date, lot, value])
+    if len(s["ring"]) > ROLLING_WINDOW: del s["ring"][:-ROLLING_WINDOW]
+
+
+class ResultsStore:
+    def __init__(self, root):
+        self.root = root
+        self.seg_dir = os.path.join(root, "segments")
+        self.agg_path = os.path.join(root, "aggregates.json")
+        self.keys_path = os.path.join(root, "keys.jsonl")
+        self._lock = threading.Lock()
+        os.makedirs(self.seg_dir, exist_ok=True)
+        self._agg = self._load_aggregates()
+        self._keys = self._load_keys()
+
+    def _load_aggregates(self):
+        try:
+            with open(self.agg_path, encoding="utf-8") as f: agg = json.load(f)
+        except (OSError, ValueError):
+            agg = {"seq": 0, "rows": 0, "methods": {}}
+        agg.pop("keys", None)       # 이전 형식 (aggregates.json 안의 키 목록) → keys.jsonl
+        return agg
+
+    def _load_keys(self):
+        try:
+            with open(self.keys_path, encoding="utf-8") as f: return {tuple(json.loads(line)) for line in f if line.strip()}
+        except OSError: pass
+        # 키 로그 도입 전 저장소 → 세그먼트에서 1회 복원
+        h = self.history()
+        keys = set(zip(h["method"].astype(str), h["lot"].astype(str), h["date"].astype(str)))
+        self._write_atomic(self.keys_path, lambda p: self._dump_keys(p, keys, "w"))
+        return keys
+
+    def _dump_keys(self, path, keys, mode="a"):
+        with open(path, mode, encoding="utf-8") as f: f.writelines(json.dumps(k, ensure_ascii=False) + "\n" for k in keys)
+
+    def _write_atomic(self, path, writer):
+        tmp = path + ".tmp"
+        writer(tmp)
+        os.replace(tmp, path)
+
+    def methods(self):
+        return sorted(self._agg["methods"])
+
+    def __len__(self): return self._agg["rows"]
+
+    def append(self, records):
+        """
+        records: [{"method", "lot", "date"(date|str), <METRICS 키>: 값}, ...]
+        세그먼트 1개를 새로 쓰고 누적 통계를 갱신한다. 이미 저장된 (method, lot, date) 키는 건너뛴다. 저장한 행 수를 반환.
+        """
+        with self._lock:
+            rows, keys = [], {}
+            for r in records:
+                if not r.get("method"): continue
+                k = (str(r["method"]), str(r.get("lot") or ""), str(np.datetime64(str(r.get("date") or datetime.date.today()), "D")))
+                if k in self._keys or k in keys: continue
+                rows.append(r); keys[k] = None
+            if not rows: return 0
+            cols = {
+                "method": np.array([str(r["method"]) for r in rows]),
+                "lot": np.array([str(r.get("lot") or "") for r in rows]),
+                "date": np.array([str(r.get("date") or datetime.date.today()) for r in rows], dtype="datetime64[D]"),
+            }
+            for key in METRICS: cols[key] = np.array([_to_float(r.get(key)) for r in rows])
+
+            seq = self._agg["seq"] + 1
+            seg_path = os.path.join(self.seg_dir, f"seg-{seq:06d}.npz")
+
+            def save_segment(p):
+                with open(p, "wb") as f: np.savez_compressed(f, **cols)
+            self._write_atomic(seg_path, save_segment)
+            for i, r in enumerate(rows):
+                m = self._agg["methods"].setdefault(cols["method"][i], {})
+                d = str(cols["date"][i]); lot = str(cols["lot"][i])
+                for key in METRICS:
+                    v = float(cols[key][i])
+                    if math.isnan(v): continue
+                    _update_stat(m.setdefault(key, _empty_stat()), v, d, lot)
+            self._agg["seq"] = seq; self._agg["rows"] += len(rows)
+            self._dump_keys(self.keys_path, keys); self._keys.update(keys)
+
+            def dump(p):
+                with open(p, "w", encoding="utf-8") as f: json.dump(self._agg, f, ensure_ascii=False)
+            self._write_atomic(self.agg_path, dump)
+        return len(rows)
+
+    def latest(self, method):
+        """가장 최근(Date, Lot 기준) 결과 {"lot", "date", <지표>: 값} — 링 버퍼 마지막 항목 (없으면 None)"""
+        stats = self._agg["methods"].get(method)
+        if not stats: return None
+        out = {}
+        for key, s in stats.items():
+            if not s["ring"]: continue
+            date, lot, value = s["ring"][-1]
+            out[key] = value
+            if (date, lot) > (out.get("date", ""), out.get("lot", "")): out["date"], out["lot"] = date, lot
+        return out
+
+    def summary(self, method, metric):
+        """누적 통계: n, mean, sd, min, max, 관리한계(I-MR: mean ± 3·MR̄/1.128)"""
+        s = self._agg["methods"].get(method, {}).get(metric)
+        if not s or not s["n"]: return None
+        sd = math.sqrt(s["m2"] / (s["n"] - 1)) if s["n"] > 1 else math.nan
+        sigma = (s["mr_sum"] / s["mr_n"]) / _D2 if s["mr_n"] else math.nan
+        return {"n": s["n"], "mean": s["mean"], "sd": sd, "min": s["min"], "max": s["max"],
+                "ucl": s["mean"] + 3 * sigma, "lcl": s["mean"] - 3 * sigma}
+
+    def trend(self, method, metric, window=10):
+        """최근 ROLLING_WINDOW 건 DataFrame (Date, Lot, Value, Rolling Mean, Mean, UCL, LCL) — 링 버퍼만 사용"""
+        s = self._agg["methods"].get(method, {}).get(metric)
+        if not s or not s["ring"]: return pd.DataFrame()
+        df = pd.DataFrame(s["ring"], columns=["Date", "Lot", "Value"])
+        df["Date"] = pd.to_datetime(df["Date"])
+        df["Rolling Mean"] = df["Value"].rolling(window, min_periods=1).mean()
+        stat = self.summary(method, metric)
+        df["Mean"] = stat["mean"]; df["UCL"] = stat["ucl"]; df["LCL"] = stat["lcl"]
+        return df
+
+    def history(self, method=None):
+        """전체 이력 (세그먼트 전체 스캔) — 내보내기/감사 용도"""
+        frames = []
+        for name in sorted(os.listdir(self.seg_dir)):
+            if not name.endswith(".npz"): continue
+            with np.load(os.path.join(self.seg_dir, name)) as z:
+                df = pd.DataFrame({k: z[k] for k in z.files})
+            frames.append(df if method is None else df[df["method"] == method])
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["method", "lot", "date", *METRICS])
@@ -0,0 +1,184 @@
+"""
+안정성 결과 분석 — 유효기간 추정 (ICH Q1E, NumPy 배치).
+
+Lot · 보관 조건 · 시험 항목별 시점 결과(long format)를 받아 (조건 × 항목) 그룹 전체를 한 번에 계산한다.
+    results = read_stability_results(uploaded_file)       # CSV / XLSX → 표준 열 (Lot, Condition, Attribute, Month, Value, Lower, Upper)
+    table = estimate_shelf_life(results)                   # 그룹별 회귀 · poolability · 유효기간
+    shelf_life_matrix(table)                               # 항목 × 조건 유효기간 매트릭스 (create_stability_excel(analysis=...) 로 함께 출력)
+
+그룹마다 (Lot × 시점) 을 NaN 으로 채운 (G, L, M) 배열로 쌓아 Lot 별 · 공통 기울기 · 전체 합산 회귀 제곱합을 한 번에 구하고,
+    1) 기울기 동등성 F 검정 (p < 0.25 → Lot 별 모델)   2) 절편 동등성 F 검정 (p < 0.25 → 공통 기울기 · Lot 별 절편, 아니면 전체 합산)
+선택된 모델의 평균 회귀선 신뢰한계가 규격에 닿는 첫 시점을 (G, L, T) 시간 격자에서 찾는다.
+규격이 한쪽만 있으면 단측 95%, 양쪽이면 양측 95% 신뢰한계를 쓰며, 유효기간은 가장 짧은 Lot 기준이다.
+외삽은 ICH Q1E 에 따라 실측 최장 시점의 2배 · +12개월 이내로 제한한다.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from validation_stats import f_sf, t_ppf
+
+POOL_ALPHA = 0.25           # ICH Q1E poolability 유의수준
+CONFIDENCE = 0.95
+GRID_STEP = 0.1             # 개월
+MODELS = ("Pooled", "Common slope", "Separate")
+
+# 입력 열 별칭 (영숫자만 남긴 소문자)
+RESULT_COLUMNS = {
+    "Lot": ("lot", "batch", "lotno", "batchno"),
+    "Condition": ("condition", "storage", "storagecondition", "cond"),
+    "Attribute": ("attribute", "test", "testitem", "item", "cqa", "parameter"),
+    "Month": ("month", "months", "timepoint", "time", "tp", "interval"),
+    "Value": ("value", "result", "results", "measured"),
+    "Lower": ("lower", "lsl", "specmin", "min", "lowerlimit", "lowerspec"),
+    "Upper": ("upper", "usl", "specmax", "max", "upperlimit", "upperspec"),
+}
+
+
+# ---------------------------------------------------------
+# 입력 정리
+# ---------------------------------------------------------
+def _norm(col): return re.sub(r"[^0-9a-z]", "", str(col).lower())
+
+
+def timepoint_months(v):
+    """'T0' / '3M' / '12 months' / 6 → 개월 (해석 불가 시 NaN)"""
+    if isinstance(v, (int, float, np.number)): return float(v)
+    m = re.fullmatch(r"\s*T?\s*(\d+(?:\.\d+)?)\s*(M|MO|MONTHS?)?\s*", str(v).upper())
+    return float(m.group(1)) if m else np.nan
+
+
+def normalize_results(df):
+    """별칭 열 → 표준 열. 수치가 아닌 결과('<LOQ', 'Conforms' 등) · 시점은 제외한다."""
+    rename = {}
+    for std, aliases in RESULT_COLUMNS.items():
+        col = next((c for c in df.columns if _norm(c) in aliases and c not in rename), None)
+        if col is not None: rename[col] = std
+    out = df.rename(columns=rename)
+    missing = [c for c in ("Lot", "Attribute", "Month", "Value") if c not in out]
+    if missing: raise ValueError(f"필수 열이 없습니다: {missing}")
+    if "Condition" not in out: out["Condition"] = "Long-term"
+    for c in ("Lower", "Upper"):
+        out[c] = pd.to_numeric(out[c], errors="coerce") if c in out else np.nan
+    out["Month"] = out["Month"].map(timepoint_months)
+    out["Value"] = pd.to_numeric(out["Value"], errors="coerce")
+    for c in ("Lot", "Condition", "Attribute"): out[c] = out[c].astype(str).str.strip()
+    return out.dropna(subset=["Month", "Value"])[list(RESULT_COLUMNS)].reset_index(drop=True)
+
+
+def read_stability_results(source):
+    """CSV / XLSX (첫 시트) → normalize_results"""
+    name = str(getattr(source, "name", source)).lower()
+    df = pd.read_excel(source) if name.endswith((".xlsx", ".xls")) else pd.read_csv(source, sep=None, engine="python")
+    return normalize_results(df)
+
+
+def _stack(df):
+    """long format → 그룹 키 표 + (G, L, M) 시점 · 결과 배열 (결측은 NaN)"""
+    g = df.groupby(["Condition", "Attribute"], sort=False).ngroup().to_numpy()
+    gl = df.groupby(["Condition", "Attribute", "Lot"], sort=False).ngroup().to_numpy()
+    # 그룹 안 Lot 번호 (등장 순서) · Lot 안 관측 위치
+    first_gl = pd.Series(gl).groupby(g).transform("min").to_numpy()
+    lot = gl - first_gl
+    pos = pd.Series(gl).groupby(gl).cumcount().to_numpy()
+    shape = (g.max() + 1, lot.max() + 1, pos.max() + 1)
+    x = np.full(shape, np.nan); y = np.full(shape, np.nan)
+    x[g, lot, pos] = df["Month"].to_numpy(float); y[g, lot, pos] = df["Value"].to_numpy(float)
+    keys = df.groupby(g, sort=True).agg(Condition=("Condition", "first"), Attribute=("Attribute", "first"),
+                                        Lower=("Lower", "min"), Upper=("Upper", "max"))
+    lots = df.groupby(gl, sort=True)["Lot"].first().to_numpy()
+    lot_names = np.full(shape[:2], None, dtype=object); lot_names[g, lot] = lots[gl]
+    return keys.reset_index(drop=True), x, y, lot_names
+
+
+# ---------------------------------------------------------
+# 배치 회귀 · poolability · 유효기간
+# ---------------------------------------------------------
+def estimate_shelf_life(results, confidence=CONFIDENCE, pool_alpha=POOL_ALPHA, step=GRID_STEP):
+    """
+    results: normalize_results 형식 DataFrame. 반환: (조건 × 항목) 그룹별 1행 DataFrame —
+        Lots, N, Model, p (slope), p (intercept), Slope (/month), Limiting Lot, Limit, Estimate (months), Extrapolation Limit, Shelf Life (months)
+    """
+    if results.empty: return pd.DataFrame(columns=["Condition", "Attribute", "Lots", "N", "Model", "p (slope)", "p (intercept)",
+                                                   "Slope (/month)", "Limiting Lot", "Limit", "Estimate (months)", "Extrapolation Limit", "Shelf Life (months)"])
+    keys, x, y, lot_names = _stack(results)
+    mask = ~(np.isnan(x) | np.isnan(y))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Lot 별 제곱합 (G, L)
+        n_i = mask.sum(-1)
+        xm_i = np.where(mask, x, 0).sum(-1) / n_i; ym_i = np.where(mask, y, 0).sum(-1) / n_i
+        dx = np.where(mask, x - xm_i[..., None], 0); dy = np.where(mask, y - ym_i[..., None], 0)
+        sxx_i = (dx * dx).sum(-1); sxy_i = (dx * dy).sum(-1); syy_i = (dy * dy).sum(-1)
+        fit_i = sxx_i > 0
+        b_i = sxy_i / sxx_i
+        # 그룹 합계 (G,)
+        k = (n_i > 0).sum(-1); N = n_i.sum(-1)
+        # Lot 별 모델 자유도: 회귀 가능한 Lot 은 2, 시점이 하나뿐인 Lot 은 평균 1
+        sse_full = np.where(fit_i, syy_i - sxy_i * b_i, 0).sum(-1); df_full = N - k - fit_i.sum(-1)
+        sxx_w = sxx_i.sum(-1); sxy_w = sxy_i.sum(-1)
+        b_c = sxy_w / sxx_w
+        sse_cs = syy_i.sum(-1) - sxy_w * b_c; df_cs = N - k - 1
+        xm = np.where(mask, x, 0).sum((-1, -2)) / N; ym = np.where(mask, y, 0).sum((-1, -2)) / N
+        dxa = np.where(mask, x - xm[:, None, None], 0); dya = np.where(mask, y - ym[:, None, None], 0)
+        sxx = (dxa * dxa).sum((-1, -2)); sxy = (dxa * dya).sum((-1, -2)); syy = (dya * dya).sum((-1, -2))
+        b_p = sxy / sxx
+        sse_p = syy - sxy * b_p; df_p = N - 2
+
+        # 1) 기울기 동등성: Lot 별 vs 공통 기울기   2) 절편 동등성: 공통 기울기 vs 전체 합산
+        dfn = np.maximum(k - 1, 1)
+        p_slope = np.where((k > 1) & (df_full > 0), f_sf(((sse_cs - sse_full) / dfn) / (sse_full / df_full), dfn, np.maximum(df_full, 1)), np.nan)
+        p_int = np.where((k > 1) & (df_cs > 0), f_sf(((sse_p - sse_cs) / dfn) / (sse_cs / df_cs), dfn, np.maximum(df_cs, 1)), np.nan)
+        model = np.where(p_slope < pool_alpha, 2, np.where(p_int < pool_alpha, 1, 0))
+
+        # 선택된 모델의 Lot 별 회귀선 (G, L): 절편 · 기울기 · 평균 시점 · 분산 항 · 잔차 분산 · 자유도
+        pooled, common = (model == 0)[:, None], (model == 1)[:, None]
+        slope = np.where(pooled, b_p[:, None], np.where(common, b_c[:, None], b_i))
+        x_bar = np.where(pooled, xm[:, None], xm_i)
+        y_bar = np.where(pooled, ym[:, None], ym_i)
+        n_eff = np.where(pooled, N[:, None], n_i)
+        sxx_eff = np.where(pooled, sxx[:, None], np.where(common, sxx_w[:, None], sxx_i))
+        dof = np.choose(model, [df_p, df_cs, df_full])
+        s2 = np.choose(model, [sse_p, sse_cs, sse_full]) / dof
+        # 전체 합산 모델은 Lot 구분이 없으므로 첫 Lot 행만 사용
+        lot_ok = (n_i > 0) & np.where(pooled, np.arange(n_i.shape[1]) == 0, True) & (dof > 0)[:, None] & np.isfinite(slope)
+
+        lower, upper = keys["Lower"].to_numpy(float), keys["Upper"].to_numpy(float)
+        two_sided = ~np.isnan(lower) & ~np.isnan(upper)
+        tq = t_ppf(np.where(two_sided, 1 - (1 - confidence) / 2, confidence), np.maximum(dof, 1))
+        t_max = np.nanmax(np.where(mask, x, np.nan), axis=(-1, -2))
+        cap = np.minimum(2 * t_max, t_max + 12)
+
+        # 시간 격자 (G, L, T) 에서 신뢰한계가 규격을 벗어나는 첫 시점
+        grid = np.arange(0, np.nanmax(cap) + step, step)
+        fit = (y_bar + slope * (grid[:, None, None] - x_bar)).transpose(1, 2, 0)
+        half = (tq[:, None] * np.sqrt(s2[:, None] * (1 / n_eff + (grid[:, None, None] - x_bar) ** 2 / sxx_eff))).transpose(1, 2, 0)
+        out_hi = fit + half > upper[:, None, None]
+        out = out_hi | (fit - half < lower[:, None, None])
+        first = np.where(out.any(-1), out.argmax(-1), grid.size)
+        est = np.where(first == 0, 0.0, np.where(first < grid.size, grid[np.maximum(first - 1, 0)], np.inf))
+        est = np.where(lot_ok, est, np.nan)
+    has_limit = ~np.isnan(lower) | ~np.isnan(upper)
+    valid = lot_ok.any(-1) & has_limit
+    limiting = np.argmin(np.where(np.isnan(est), np.inf, est), axis=-1)
+    rows = np.arange(len(keys))
+    g_est = np.where(valid, est[rows, limiting], np.nan)
+    crossed = np.isfinite(g_est)
+    side = np.where(~crossed, "", np.where(out_hi[rows, limiting, np.minimum(first[rows, limiting], grid.size - 1)], "Upper", "Lower"))
+    table = keys[["Condition", "Attribute"]].copy()
+    table["Lots"] = k; table["N"] = N
+    table["Model"] = np.where(k > 1, np.array(MODELS)[model], "Single lot")
+    table["p (slope)"] = np.round(p_slope, 4); table["p (intercept)"] = np.round(np.where(model < 2, p_int, np.nan), 4)
+    table["Slope (/month)"] = np.round(slope[rows, limiting], 5)
+    table["Limiting Lot"] = np.where(~crossed, "", np.where((model == 0) & (k > 1), "(pooled)", lot_names[rows, limiting]))
+    table["Limit"] = side
+    table["Estimate (months)"] = np.round(np.where(crossed, g_est, np.nan), 1)     # 격자 끝까지 규격 이내면 NaN (외삽 한계로 제한)
+    table["Extrapolation Limit"] = cap
+    table["Shelf Life (months)"] = np.floor(np.minimum(g_est, cap))
+    return table
+
+
+def shelf_life_matrix(table):
+    """항목 × 보관 조건 유효기간(개월) 매트릭스"""
+    if table.empty: return pd.DataFrame()
+    return table.pivot_table(index="Attribute", columns="Condition", values="Shelf Life (months)", aggfunc="min", sort=False)
@@ -0,0 +1,143 @@
+"""
+밸리데이션 노션 카탈로그 (CRITERIA · STRATEGY · PARAM DB 로더 · 결과 반영).
+
+Streamlit 없이 import 되는 순수 함수 모음 — app.py 는 swr_get / derived 로 보관만 하고, 워커 · CLI · 벤치마크는 그대로 호출한다.
+토큰 · DB ID 는 전역 설정(st.secrets)에서 읽지 않고 인자로 받는다.
+
+    criteria_map = load_criteria_map(CRITERIA_DB_ID, token)                       # {page_id: CriteriaRow}
+    rows = load_strategy_rows(STRATEGY_DB_ID, token, "mAb", "Phase 3")            # 선택값 → 노션 query 필터
+    index = index_strategy(rows, criteria_map, token)                             # 관계 조인 + (Modality, Phase) 그룹
+    catalog = load_param_catalog(PARAM_DB_ID, token)                              # ParamRow tuple (판정 기준 컴파일 포함)
+    write_back_results(token, PARAM_DB_ID, [(page_id, method, data, lot, date)], {method: criteria})
+"""
+from datetime import datetime
+from functools import partial
+
+import pandas as pd
+
+from acceptance_criteria import DEFAULT_CRITERIA, compile_criteria, evaluate
+from notion_api import NotionUnavailable, all_of, query_all, query_payload, retrieve_pages, sort_by, where
+from notion_records import CriteriaRow, MethodParams, ParamRow, StrategyRow, group_records, join_relations
+from validation_docs import make_doc_no
+
+CRITERIA_PROPERTIES = ("Test_Category", "Required_Items")
+STRATEGY_PROPERTIES = ("Modality", "Phase", "Method Name", "Test Category")
+
+
+# ---------------------------------------------------------
+# CRITERIA · STRATEGY (관계 조인)
+# ---------------------------------------------------------
+def parse_criteria_page(p):
+    props = p["properties"]
+    cat = props["Test_Category"]["title"][0]["text"]["content"] if props["Test_Category"]["title"] else "Unknown"
+    req = [i["name"] for i in props["Required_Items"]["multi_select"]]
+    return CriteriaRow(p["id"], cat, req)
+
+
+def load_criteria_map(database_id, token):
+    results = query_all(database_id, token, properties=CRITERIA_PROPERTIES)
+    if results is None: raise NotionUnavailable(database_id)
+    criteria_map = {}
+    for p in results:
+        try: criteria_map[p["id"]] = parse_criteria_page(p)
+        except: continue
+    return criteria_map
+
+
+def fetch_criteria_pages(page_ids, token):
+    """CRITERIA DB 조회에 없던 관계 페이지(보관 · 다른 DB 등)를 배치 동시 조회 → {page_id: CriteriaRow}"""
+    found = {}
+    for pid, p in retrieve_pages(page_ids, token).items():
+        try: found[pid] = parse_criteria_page(p)
+        except: continue
+    return found
+
+
+def load_strategy_rows(database_id, token, modality=None, phase=None):
+    # 선택한 Modality · Phase 행만, 필요한 속성만 노션에서 걸러 받는다 (서버 측 필터 · filter_properties)
+    flt = all_of(where("Modality", modality) if modality else None, where("Phase", phase) if phase else None)
+    results = query_all(database_id, token, query_payload(flt, sort_by("Method Name")), properties=STRATEGY_PROPERTIES)
+    if results is None: raise NotionUnavailable(database_id)
+    rows = []
+    for p in results:
+        try:
+            props = p["properties"]
+            mod = props["Modality"]["select"]["name"] if props["Modality"]["select"] else ""
+            ph = props["Phase"]["select"]["name"] if props["Phase"]["select"] else ""
+            met = props["Method Name"]["rich_text"][0]["text"]["content"] if props["Method Name"]["rich_text"] else ""
+            rows.append(StrategyRow(mod, ph, met, page_id=p["id"], rel=[r["id"] for r in props["Test Category"]["relation"]]))
+        except: continue
+    return tuple(rows)
+
+
+def index_strategy(rows, criteria_map, token=""):
+    """{"rows": 조인된 StrategyRow tuple, "plan": {(Modality, Phase): StrategyRow tuple}, "unresolved": 관계 id tuple}. 토큰이 없으면 누락 페이지를 조회하지 않는다."""
+    joined, unresolved = join_relations(rows, criteria_map, partial(fetch_criteria_pages, token=token) if token else None)
+    return {"rows": joined, "plan": group_records(joined, "Modality", "Phase"), "unresolved": unresolved}
+
+
+# ---------------------------------------------------------
+# PARAM (시험 조건 · 판정 기준)
+# ---------------------------------------------------------
+def parse_param_props(props):
+    def txt(n):
+        try: ts = props.get(n, {}).get("rich_text", []); return "".join([t["text"]["content"] for t in ts]) if ts else ""
+        except: return ""
+    def num(n):
+        try: return props.get(n, {}).get("number")
+        except: return None
+    return MethodParams(**{n: txt(n) for n in MethodParams.__slots__ if n != "Target_Conc"}, Target_Conc=num("Target_Conc"))
+
+
+def load_param_catalog(database_id, token):
+    results = query_all(database_id, token)
+    if results is None: raise NotionUnavailable(database_id)
+    rows = []
+    for p in results:
+        try:
+            title = p["properties"]["Method_Name"]["title"]
+            params = parse_param_props(p["properties"])
+            rows.append(ParamRow(p["id"], p.get("last_edited_time"), "".join(t["plain_text"] for t in title), params, compile_criteria(params)))
+        except: continue
+    return tuple(rows)
+
+
+def method_params(catalog, method_name):
+    for p in catalog:
+        if p.Method == method_name: return p.params
+    return {}
+
+
+def method_criteria(catalog, method_name):
+    # 판정 기준은 PARAM 적재 시 1회 컴파일 (PARAM 에 없는 Method 는 기본 기준)
+    for p in catalog:
+        if p.Method == method_name: return p.criteria
+    return DEFAULT_CRITERIA
+
+
+# ---------------------------------------------------------
+# 결과 반영 (Write-back)
+# ---------------------------------------------------------
+# 추출 결과 → PARAM / STRATEGY 페이지 속성. DB 에 해당 속성이 있을 때만 기록한다.
+RESULT_PROPERTIES = {"Result_SST_RSD": "sst", "Result_R2": "r2", "Result_Recovery": "acc_mean", "Result_Precision_RSD": "prec_rsd", "Result_LOQ_SN": "loq_sn"}
+
+
+def result_property_values(method_name, data, lot="", date=None, overall=None, criteria=DEFAULT_CRITERIA):
+    if overall is None: overall = criteria.verdict(data)
+    values = {prop: data.get(key) for prop, key in RESULT_PROPERTIES.items()}
+    values.update({"Result_Verdict": overall, "Result_Lot": lot, "Result_Date": str(date or datetime.now().date()), "Result_Report_No": make_doc_no("VR", method_name)})
+    return values
+
+
+def write_back_results(token, database_id, page_results, criteria=None, on_progress=None):
+    """page_results: [(page_id, method, data, lot, date)], criteria: {method: CriteriaSet} → (페이지별 결과, DB 에 없는 속성 목록)"""
+    from notion_writer import NotionWriter, build_properties
+    writer = NotionWriter(token)    # 조회와 같은 전역 토큰 버킷을 사용
+    schema = writer.get_schema(database_id); missing = set()
+    # 종합 판정은 Method 별 기준으로 한 번에 (batch close-out)
+    table = pd.DataFrame([{"method": method, **data} for _, method, data, _, _ in page_results])
+    verdicts = evaluate(table, criteria or {})["Verdict"] if len(table) else []
+    for (page_id, method, data, lot, date), overall in zip(page_results, verdicts):
+        props, miss = build_properties(result_property_values(method, data, lot, date, overall), schema)
+        missing.update(miss); writer.stage(page_id, props)
+    return writer.flush(on_progress), sorted(missing)
@@ -0,0 +1,840 @@
+"""
+시험법 밸리데이션 문서 생성기 (VMP · Recipe · Protocol · Logbook · Report · Dossier) 및 로그북 / CDS 결과 판독.
+
+app.py 화면 구간이 호출하는 최상위 함수 — Streamlit 을 import 하지 않으므로 워커 프로세스(parallel_render) · CLI · 벤치마크에서
+그대로 import 해 쓸 수 있다. docx / xlsxwriter / openpyxl 은 함수 안에서 import 한다 (Lazy Import).
+
+    xlsx = generate_smart_excel("SEC-HPLC", "Purity", params, criteria=compile_criteria(params))
+    data = extract_logbook_data(xlsx)                       # {"sst", "r2", "acc_mean", "prec_rsd", "loq_sn", ...}
+    docx = generate_summary_report_gmp("SEC-HPLC", "Purity", params, {"analyst": "..."}, data)
+"""
+import io
+from datetime import datetime
+
+import pandas as pd
+
+from acceptance_criteria import DEFAULT_CRITERIA, REPORT_METRICS, compile_criteria, evaluate
+from recipe_engine import DEFAULT_LEVELS, dilution_scheme, plan_recipes
+
+# ---------------------------------------------------------
+# 문서 생성 헬퍼
+# ---------------------------------------------------------
+def set_korean_font(doc):
+    from docx.shared import Pt
+    from docx.oxml.ns import qn
+    style = doc.styles['Normal']
+    style.font.name = 'Malgun Gothic'
+    style._element.rPr.rFonts.set(qn('w:eastAsia'), 'Malgun Gothic')
+    style.font.size = Pt(10)
+
+def set_font(run):
+    from docx.oxml.ns import qn
+    run.font.name = 'Times New Roman'
+    run._element.rPr.rFonts.set(qn('w:eastAsia'), 'Malgun Gothic')    
+
+def set_table_header_style(cell):
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.oxml.ns import qn
+    from docx.oxml import OxmlElement
+    tcPr = cell._element.get_or_add_tcPr()
+    shading_elm = OxmlElement('w:shd')
+    shading_elm.set(qn('w:fill'), 'D9D9D9') 
+    tcPr.append(shading_elm)
+    if cell.paragraphs:
+        cell.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+        for run in cell.paragraphs[0].runs:
+            run.bold = True
+            set_font(run)
+
+def add_page_number(doc):
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.oxml.ns import qn
+    from docx.oxml import OxmlElement
+    section = doc.sections[0]
+    footer = section.footer
+    p = footer.paragraphs[0]
+    p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    run = p.add_run()
+    fldChar1 = OxmlElement('w:fldChar')
+    fldChar1.set(qn('w:fldCharType'), 'begin')
+    instrText = OxmlElement('w:instrText')
+    instrText.set(qn('xml:space'), 'preserve')
+    instrText.text = "PAGE"
+    fldChar2 = OxmlElement('w:fldChar')
+    fldChar2.set(qn('w:fldCharType'), 'separate')
+    fldChar3 = OxmlElement('w:fldChar')
+    fldChar3.set(qn('w:fldCharType'), 'end')
+    run._r.append(fldChar1)
+    run._r.append(instrText)
+    run._r.append(fldChar2)
+    run._r.append(fldChar3)
+
+# [문서 번호] 계획서(VP) · 보고서(VR) 공통 규칙: {접두어}-{Method 앞 3글자}-{yymmdd}
+def make_doc_no(prefix, method_name, when=None):
+    return f"{prefix}-{method_name[:3].upper() if method_name else 'GEN'}-{(when or datetime.now()).strftime('%y%m%d')}"
+
+# ---------------------------------------------------------
+# 문서 생성 엔진
+# ---------------------------------------------------------
+
+# [VMP 공통] 수행 전략표 (종합계획서 · 밸리데이션 일괄 보고서)
+def add_strategy_table(doc, plan_rows):
+    table = doc.add_table(rows=1, cols=4); table.style = 'Table Grid'
+    for i, h in enumerate(['No.', 'Method', 'Category', 'Required Items']): c = table.rows[0].cells[i]; c.text=h; set_table_header_style(c)
+    for idx, row in enumerate(plan_rows): 
+        r = table.add_row().cells
+        r[0].text=str(idx+1); r[1].text=str(row['Method']); r[2].text=str(row['Category']); r[3].text=", ".join(row['Required_Items'])
+    return table
+
+# [VMP: 밸리데이션 종합계획서]
+def generate_vmp_premium(modality, phase, plan_rows):
+    from docx import Document
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    doc = Document(); set_korean_font(doc)
+    doc.add_heading('밸리데이션 종합계획서 (Validation Master Plan)', 0).alignment = WD_ALIGN_PARAGRAPH.CENTER
+    doc.add_paragraph()
+    table_info = doc.add_table(rows=2, cols=4); table_info.style = 'Table Grid'
+    headers = ["제품명", "단계", "문서 번호", "제정 일자"]
+    values = [f"{modality} Project", phase, "VMP-001", datetime.now().strftime('%Y-%m-%d')]
+    for i, h in enumerate(headers): c = table_info.rows[0].cells[i]; c.text=h; set_table_header_style(c)
+    for i, v in enumerate(values): c = table_info.rows[1].cells[i]; c.text=v; c.paragraphs[0].alignment = WD_ALIGN_PARAGRAPH.CENTER
+    doc.add_paragraph()
+    doc.add_heading('1. 목적 (Objective)', 1); doc.add_paragraph("본 문서는 의약품 품질 관리를 위한 시험법 밸리데이션의 전략과 범위를 규정한다.")
+    doc.add_heading('4. 밸리데이션 수행 전략', 1)
+    add_strategy_table(doc, plan_rows)
+    doc_io = io.BytesIO(); doc.save(doc_io); doc_io.seek(0)
+    return doc_io
+
+# [Master Recipe Excel]
+def generate_master_recipe_excel(method_name, target_conc, unit, stock_conc, req_vol, sample_type, powder_info="", levels=DEFAULT_LEVELS):
+    import xlsxwriter
+    output = io.BytesIO(); workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+    title_fmt = workbook.add_format({'bold':True, 'font_size': 14, 'align':'center', 'bg_color': '#44546A', 'font_color': 'white'})
+    header = workbook.add_format({'bold':True, 'border':1, 'bg_color':'#D9E1F2', 'align':'center'})
+    sub = workbook.add_format({'bold':True, 'border':1, 'bg_color':'#EDEDED', 'align':'center'})
+    cell = workbook.add_format({'border':1, 'align':'center'})
+    num = workbook.add_format({'border':1, 'num_format':'0.00', 'align':'center'})
+    auto = workbook.add_format({'border':1, 'bg_color':'#E2EFDA', 'num_format':'0.000', 'align':'center'})
+    total_fmt = workbook.add_format({'bold':True, 'border':1, 'bg_color':'#FFFF00', 'num_format':'0.000', 'align':'center'})
+    
+    ws = workbook.add_worksheet("Master Recipe"); ws.set_column('A:F', 18)
+    ws.merge_range('A1:F1', f'Validation Material Planner: {method_name}', title_fmt)
+    ws.write('A3', "Sample Type:", sub); ws.write('B3', sample_type, cell)
+    if sample_type == "Powder (파우더)": ws.write('C3', "Prep Detail:", sub); ws.write_string('D3', powder_info, cell)
+    ws.write('A4', "Stock Conc:", sub); ws.write('B4', stock_conc, num); ws.write('C4', unit, cell)
+    ws.write('A5', "Target Conc:", sub); ws.write('B5', target_conc, num); ws.write('C5', unit, cell)
+    ws.write('A6', "Vol/Vial (mL):", sub); ws.write('B6', req_vol, num)
+    
+    ws.write(8, 0, "■ Dilution Scheme (Linearity & Accuracy)", header)
+    ws.write_row(9, 0, ["Level (%)", "Target Conc", "Stock Vol (mL)", "Diluent Vol (mL)", "Total (mL)", "Check"], header)
+    
+    row = 10; start_sum = row + 1 
+    pct = workbook.add_format({'border':1, 'num_format':'0%','align':'center'})
+    sch = dilution_scheme(target_conc, stock_conc, req_vol, levels)
+    for i, level in enumerate(levels):
+        ws.write(row, 0, level/100, pct)
+        ws.write(row, 1, sch["conc"][0, i], num)
+        ws.write(row, 2, sch["stock_vol"][0, i], auto)
+        ws.write(row, 3, sch["diluent_vol"][0, i], auto)
+        ws.write(row, 4, float(req_vol), num)
+        ws.write(row, 5, "□", cell)
+        row += 1
+    
+    ws.write(row, 1, "Total Stock Needed:", sub)
+    ws.write_formula(row, 2, f"=SUM(C{start_sum}:C{row})", total_fmt)
+    workbook.close(); output.seek(0)
+    return output
+
+# [Campaign Recipe Excel] my_plan 전체 Method 를 하나의 워크북으로 (Summary + Dilution Schemes)
+def generate_campaign_recipe_excel(plan, levels=DEFAULT_LEVELS, replicates=3, title="Validation Campaign"):
+    import xlsxwriter
+    detail, rollup = plan_recipes(plan, levels, replicates)
+    output = io.BytesIO(); workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+    title_fmt = workbook.add_format({'bold':True, 'font_size': 14, 'align':'center', 'bg_color': '#44546A', 'font_color': 'white'})
+    header = workbook.add_format({'bold':True, 'border':1, 'bg_color':'#D9E1F2', 'align':'center'})
+    cell = workbook.add_format({'border':1, 'align':'center'})
+    num = workbook.add_format({'border':1, 'num_format':'0.000', 'align':'center'})
+    pct = workbook.add_format({'border':1, 'num_format':'0%','align':'center'})
+    warn = workbook.add_format({'border':1, 'bg_color':'#FFC7CE', 'font_color':'#9C0006', 'align':'center'})
+    total_fmt = workbook.add_format({'bold':True, 'border':1, 'bg_color':'#FFFF00', 'num_format':'0.000', 'align':'center'})
+
+    # 1. Summary (Method 별 소요량 Rollup)
+    ws = workbook.add_worksheet("Summary"); ws.set_column('A:A', 28); ws.set_column('B:H', 16)
+    ws.merge_range('A1:H1', f'Material Consumption Plan: {title}', title_fmt)
+    ws.write_row(2, 0, ["Levels (%)", ", ".join(f"{l:g}" for l in levels), "Replicates", replicates], cell)
+    cols = ["Method", "Unit", "Stock Conc", "Vials", "Total Stock (mL)", "Total Diluent (mL)", "API Needed", "Feasible"]
+    ws.write_row(4, 0, cols, header)
+    for r, rec in enumerate(rollup.itertuples(index=False), start=5):
+        ws.write(r, 0, rec[0], cell); ws.write(r, 1, rec[1], cell)
+        for c in range(2, 7): ws.write(r, c, rec[c], num)
+        ws.write(r, 7, "OK" if rec[7] else "Stock too dilute", cell if rec[7] else warn)
+    last = 5 + len(rollup)
+    ws.write(last, 0, "Campaign Total", header)
+    for c, col in [(3, 'D'), (4, 'E'), (5, 'F')]: ws.write_formula(last, c, f"=SUM({col}6:{col}{last})", total_fmt)
+
+    # 2. Dilution Schemes (Method × Level 전체)
+    ws2 = workbook.add_worksheet("Dilution Schemes"); ws2.set_column('A:A', 28); ws2.set_column('B:I', 15)
+    ws2.write_row(0, 0, list(detail.columns) + ["Check"], header)
+    for r, rec in enumerate(detail.itertuples(index=False), start=1):
+        ws2.write(r, 0, rec[0], cell); ws2.write(r, 1, rec[1] / 100, pct)
+        ws2.write(r, 2, rec[2], num); ws2.write(r, 3, rec[3], cell)
+        for c in range(4, 7): ws2.write(r, c, rec[c], num)
+        ws2.write(r, 7, rec[7], cell); ws2.write(r, 8, "OK" if rec[8] else "X", cell if rec[8] else warn); ws2.write(r, 9, "□", cell)
+    workbook.close(); output.seek(0)
+    return output
+
+# [PROTOCOL: 중간 표현] 미리보기(HTML)와 DOCX 가 같은 블록을 사용한다
+def build_protocol_content(method_name, params, stock_conc=None, req_vol=None, target_conc_override=None):
+    from doc_content import heading, paragraph, bullets, table, kv_table
+    now = datetime.now()
+    doc_no = make_doc_no("VP", method_name, now)
+
+    # 변수 설정 (입력값 없으면 기본값)
+    try:
+        s_conc = float(stock_conc) if stock_conc else 0.0
+        t_conc = float(target_conc_override) if target_conc_override else 1.0
+        v_req = float(req_vol) if req_vol else 10.0
+    except: s_conc = 0.0; t_conc = 1.0; v_req = 10.0
+    unit = params.get('Unit', 'mg/mL')
+    def stock_vol(conc, vol): return (conc * vol) / s_conc if s_conc > 0 else 0
+
+    blocks = [
+        {"type": "page_header", "lines": [(f"Document No.: {doc_no}", True), (f"Date: {now.strftime('%Y-%m-%d')}", False)]},
+        {"type": "title", "text": '시험법 밸리데이션 상세 계획서', "subtitle": f"(Method Validation Protocol for {method_name})"},
+        # 1. 목적
+        heading('1. 목적 (Objective)'),
+        paragraph(f"본 문서는 '{method_name}' 시험법이 의약품 품질 관리에 적합함을 검증하기 위한 구체적인 시험 절차, 시액 조제 방법 및 판정 기준을 규정한다."),
+        # 2. 기기 및 시약 (상세)
+        heading('2. 기기 및 분석 조건 (Instruments & Conditions)'),
+        kv_table([
+            ("사용 기기 (Instrument)", params.get('Instrument', 'HPLC System')),
+            ("컬럼 (Column)", params.get('Column_Plate', 'C18 Column')),
+            ("검출기 (Detector)", params.get('Detection', 'UV/Vis')),
+            ("이동상 (Mobile Phase)", f"A: {params.get('Condition_A', 'N/A')}\nB: {params.get('Condition_B', 'N/A')}"),
+            ("희석액 (Diluent)", "이동상 A와 B의 혼합액 또는 규정된 용매"),
+        ]),
+        # 3. 상세 시험 방법 (SOP 수준 - 모든 항목 계산 반영)
+        heading('3. 상세 시험 방법 (Test Procedure)'),
+        heading('3.1 시액 및 표준액 조제', 2),
+        paragraph("1) 희석액(Diluent): 이동상 A와 B를 지정된 비율로 혼합하거나 규정된 용매를 사용하여 준비한다."),
+        paragraph(f"2) 표준 모액(Stock Solution): 표준품을 정밀하게 달아 {s_conc} {unit} 농도가 되도록 희석액으로 녹여 조제한다."),
+        paragraph(f"3) 위약(Placebo): 주성분을 제외한 기제를 정밀하게 달아 {v_req} mL 부피 플라스크에 넣고 희석액으로 표선까지 채워 조제한다."),
+        # [3.2 특이성]
+        heading('3.2 특이성 (Specificity)', 2),
+        paragraph("다음 용액을 조제하여 주입한다."),
+        bullets([("", "공시험액, 위약: 3.1항에서 조제한 용액 사용."),
+                 ("", f"표준액(100%): 표준 모액 {stock_vol(t_conc, v_req):.3f} mL를 {v_req} mL 플라스크에 넣고 희석액으로 표선까지 채운다.")]),
+        # [3.3 직선성]
+        heading('3.3 직선성 (Linearity)', 2),
+        paragraph(f"표준 모액({s_conc} {unit})을 사용하여 아래 표와 같이 5개 농도 레벨로 희석한다."),
+        paragraph("※ 각 농도 레벨별로 3회씩 독립적으로 조제하여(총 15개 검액), 각각 1회 분석한다."),
+        table(["Level", "목표 농도", "모액 취함 (mL)", "최종 부피 (mL)", "희석액 (mL)"],
+              [[f"{level}%", f"{t_conc * (level/100):.4f} {unit}", f"{stock_vol(t_conc * (level/100), v_req):.3f}", f"{v_req:.1f}",
+                f"{v_req - stock_vol(t_conc * (level/100), v_req):.3f}"] for level in [80, 90, 100, 110, 120]]),
+        # [3.4 정확성]
+        heading('3.4 정확성 (Accuracy)', 2),
+        paragraph("기준 농도의 80%, 100%, 120% 수준으로 각 3회씩 독립적으로 조제하여 분석한다 (총 9개 검액)."),
+        bullets([("", f"{lvl}% Level (3회): 위 직선성 표의 {lvl}% 조건({stock_vol(t_conc * lvl / 100, v_req):.3f} mL 모액 → {v_req} mL)으로 3개 조제.") for lvl in [80, 100, 120]]),
+        # [3.5 정밀성]
+        heading('3.5 정밀성 (Precision)', 2),
+        paragraph(f"기준 농도(100%)인 {t_conc} {unit} 검액을 6개 독립적으로 조제한다."),
+        bullets([("", f"조제법: 표준 모액 {stock_vol(t_conc, v_req):.3f} mL를 취하여 {v_req} mL 부피 플라스크에 넣고 희석한다. (x 6회 반복)")]),
+    ]
+
+    # [3.6 LOD/LOQ] - 중간 희석액 도입 (타겟의 10% 수준, 중간 희석액은 넉넉하게 100mL 제조 가정)
+    inter_conc = t_conc * 0.1
+    inter_vol_req = 100.0
+    lod_rows = []
+    # LOQ (1%), LOD (0.3% 가정) — 중간액에서 희석: V = (Target * Total) / Inter_Conc
+    for lvl, name in [(1.0, "LOQ (예상)"), (0.33, "LOD (예상)")]:
+        ltgt = t_conc * (lvl/100)
+        lvs = (ltgt * v_req) / inter_conc if inter_conc > 0 else 0
+        lod_rows.append([name, f"{lvl}%", f"{ltgt:.5f}", f"{lvs:.3f}", f"{v_req:.1f}"])
+    blocks += [
+        heading('3.6 검출 및 정량한계 (LOD/LOQ)', 2),
+        paragraph("저농도에서의 정확한 조제를 위해 '중간 희석액'을 거쳐 단계적으로 희석한다."),
+        paragraph(f"1) 중간 희석액 조제 ({inter_conc:.4f} {unit}): 표준 모액 {stock_vol(inter_conc, inter_vol_req):.3f} mL를 취하여 {inter_vol_req} mL 부피 플라스크에 넣고 희석한다."),
+        table(["구분", "추정 Level", "농도", "중간액 취함 (mL)", "최종 부피 (mL)"], lod_rows),
+    ]
+
+    # 4. 밸리데이션 항목 및 판정 기준 (서술식 & 분리)
+    def evaluation(title, method_text, criteria_lines):
+        return [heading(title, 2), paragraph("1) 평가 방법 (Evaluation Method)"), paragraph(f"   {method_text}"),
+                paragraph("2) 판정 기준 (Acceptance Criteria)")] + [paragraph(f"   - {c}") for c in criteria_lines]
+    blocks.append(heading('4. 밸리데이션 항목 및 판정 기준 (Evaluation & Criteria)'))
+    blocks += evaluation('4.1 특이성 (Specificity)',
+        "공시험액(Blank), 위약(Placebo), 표준액을 각각 분석하여 크로마토그램을 비교한다. 주성분 피크의 머무름 시간(RT)에 간섭하는 피크가 있는지 확인한다.",
+        [f"공시험액 및 위약에서 주성분 피크와 겹치는 간섭 피크가 없거나, 검출되더라도 그 면적이 {params.get('Detail_Specificity', '간섭 피크 면적 ≤ 표준액 평균 면적의 0.5%')} 이어야 한다."])
+    blocks += evaluation('4.2 직선성 (Linearity)',
+        f"{t_conc} {unit} 농도를 기준으로 80 ~ 120% 범위 내 5개 농도의 표준액을 분석한다. 농도(X축)와 피크 면적(Y축)에 대한 회귀분석을 수행하여 상관계수(R) 및 결정계수(R²)를 구한다.",
+        [params.get('Detail_Linearity', "결정계수(R²) ≥ 0.990"), "Y절편과 기울기가 타당한 수준이어야 한다."])
+    blocks += evaluation('4.3 정확성 (Accuracy)',
+        "기준 농도의 80%, 100%, 120% 수준에서 각각 3회씩 조제하여 분석한다. 각 검액의 실측 농도를 이론 농도로 나누어 회수율(Recovery, %)을 계산한다.",
+        [f"각 농도별 평균 회수율 및 전체 평균 회수율이 {params.get('Detail_Accuracy', '회수율 80.0 ~ 120.0%')} 이내여야 한다.", "각 농도별 회수율의 상대표준편차(RSD)가 적절해야 한다."])
+    blocks += evaluation('4.4 정밀성 (Precision)',
+        "기준 농도(100%)에 해당하는 검액을 6개 독립적으로 조제하여 분석한다. 6회 결과에 대한 피크 면적의 상대표준편차(RSD)를 계산한다.",
+        [f"피크 면적의 {params.get('Detail_Precision', 'RSD ≤ 2.0%')}"])
+    blocks += evaluation('4.5 검출 및 정량한계 (LOD & LOQ)',
+        "신호 대 잡음비(Signal-to-Noise Ratio, S/N) 방식을 이용한다. 예상되는 저농도 용액을 분석하여 S/N 비를 측정한다.",
+        [params.get('Detail_LOQ', "LOD S/N ≥ 3, LOQ S/N ≥ 10")])
+
+    # 5. 서명
+    blocks.append({"type": "signature", "roles": ["작성자 (Prepared By)", "검토자 (Reviewed By)", "승인자 (Approved By)"]})
+    return blocks
+
+# [PROTOCOL]
+def generate_protocol_premium(method_name, category, params, stock_conc=None, req_vol=None, target_conc_override=None):
+    from docx import Document
+    from docx.shared import Pt
+    from docx.oxml.ns import qn
+    from doc_content import write_docx
+    doc = Document()
+    # 기본 스타일 설정 (한글: 맑은 고딕, 영어: Times New Roman)
+    style = doc.styles['Normal']
+    style.font.name = 'Times New Roman'
+    style._element.rPr.rFonts.set(qn('w:eastAsia'), 'Malgun Gothic')
+    style.font.size = Pt(10)
+
+    write_docx(doc, build_protocol_content(method_name, params, stock_conc, req_vol, target_conc_override), set_font, set_table_header_style)
+    doc_io = io.BytesIO(); doc.save(doc_io); doc_io.seek(0)
+    return doc_io
+
+# [Excel 생성 함수 - Smart Logbook (ACTUAL WEIGHT & CORRECTION LOGIC)]
+def generate_smart_excel(method_name, category, params, simulate=False, measured=None, criteria=None):
+    """measured: cds_import 로 가져온 {칸: 피크 값} — 주면 SST / 직선성 / 정확성 입력 칸을 채워서 만든다.
+    criteria: 판정 기준 (없으면 params 의 기준 문구로 컴파일) — IF 수식 · 기준 표기에 사용"""
+    import xlsxwriter
+    from cds_import import PEAK_FIELDS, slot_value
+    crit = criteria or compile_criteria(params)
+    output = io.BytesIO()
+    workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+    
+    # [중요] 모든 스타일 정의를 함수 시작 부분에 배치
+    header = workbook.add_format({'bold':True, 'border':1, 'bg_color':'#4472C4', 'font_color':'white', 'align':'center', 'valign':'vcenter'})
+    sub = workbook.add_format({'bold':True, 'border':1, 'bg_color':'#D9E1F2', 'align':'center'})
+    sub_rep = workbook.add_format({'bold':True, 'border':1, 'bg_color':'#FCE4D6', 'align':'left'})
+    cell = workbook.add_format({'border':1, 'align':'center'})
+    num = workbook.add_format({'border':1, 'num_format':'0.00', 'align':'center'})
+    num3 = workbook.add_format({'border':1, 'num_format':'0.000', 'align':'center'}) 
+    calc = workbook.add_format({'border':1, 'bg_color':'#FFFFCC', 'num_format':'0.00', 'align':'center'}) 
+    auto = workbook.add_format({'border':1, 'bg_color':'#E2EFDA', 'num_format':'0.00', 'align':'center'})
+    pass_fmt = workbook.add_format({'bold':True, 'border':1, 'bg_color':'#C6EFCE', 'font_color':'#006100', 'align':'center'})
+    fail_fmt = workbook.add_format({'bold':True, 'border':1, 'bg_color':'#FFC7CE', 'font_color':'#9C0006', 'align':'center'})
+    total_fmt = workbook.add_format({'bold':True, 'border':1, 'bg_color':'#FFFF00', 'num_format':'0.00', 'align':'center'})
+    crit_fmt = workbook.add_format({'bold':True, 'font_color':'red', 'align':'left'})
+
+    # 1. Info Sheet (Enhanced with Actual Weighing & Purity)
+    ws1 = workbook.add_worksheet("1. Info"); ws1.set_column('A:A', 25); ws1.set_column('B:E', 15); ws1.merge_range('A1:E1', f'GMP Logbook: {method_name}', header)
+    info = [("Date", datetime.now().strftime("%Y-%m-%d")), ("Instrument", params.get('Instrument')), ("Column", params.get('Column_Plate')), ("Analyst", "")]
+    
+    # 기본 정보
+    info_rows = [("Date", datetime.now().strftime("%Y-%m-%d")), ("Instrument", params.get('Instrument')), ("Column", params.get('Column_Plate')), ("Analyst", "")]
+    for i, (k, v) in enumerate(info_rows):
+        ws1.write(i+3, 0, k, sub); ws1.merge_range(i+3, 1, i+3, 4, v if v else "", cell)
+    
+    # Target Conc
+    ws1.write(9, 0, "Target Conc:", sub)
+    ws1.write(9, 1, float(params.get('Target_Conc', 1.0)), auto)
+
+    # Actual Stock Prep Section
+    r = 11
+    ws1.merge_range(r, 0, r, 4, "■ Standard Stock Solution Preparation (보정값 적용)", sub_rep); r+=1
+    ws1.write(r, 0, "Purity (Potency, %):", sub); ws1.write(r, 1, "", calc); ws1.write(r, 2, "%", cell)
+    ws1.write(r+1, 0, "Water Content (%):", sub); ws1.write(r+1, 1, 0, calc); ws1.write(r+1, 2, "% (If applicable)", cell)
+    ws1.write(r+2, 0, "Actual Weight (mg):", sub); ws1.write(r+2, 1, "", calc); ws1.write(r+2, 2, "mg", cell)
+    ws1.write(r+3, 0, "Final Volume (mL):", sub); ws1.write(r+3, 1, "", calc); ws1.write(r+3, 2, "mL", cell)
+    ws1.write(r+4, 0, "Actual Stock Conc (mg/mL):", sub)
+    # Actual Conc = (Weight * (Purity/100) * ((100-Water)/100)) / Vol
+    # Assuming B11=Purity, B12=Water, B13=Weight, B14=Vol
+    # Formula Row Index: r is variable. Purity at r, Weight at r+2.
+    purity_cell = f"B{r+1}"; water_cell = f"B{r+2}"; weight_cell = f"B{r+3}"; vol_cell = f"B{r+4}"
+    ws1.write_formula(r+4, 1, f"=ROUNDDOWN(({weight_cell}*({purity_cell}/100)*((100-{water_cell})/100))/{vol_cell}, 4)", total_fmt)
+    actual_stock_ref = f"'1. Info'!B{r+5}" # Reference for other sheets
+
+    # 2. SST Sheet
+    ws_sst = workbook.add_worksheet("2. SST"); ws_sst.set_column('A:F', 15)
+    ws_sst.merge_range('A1:F1', 'System Suitability Test (n=6)', header)
+    ws_sst.write_row('A2', ["Inj No.", "RT (min)", "Area", "Height", "Tailing (1st)", "Plate Count"], sub)
+    for i in range(1, 7): ws_sst.write(i+1, 0, i, cell); ws_sst.write_row(i+1, 1, [slot_value(measured, ("sst", None, i), f) for f in PEAK_FIELDS], calc)
+    ws_sst.write('A9', "Mean", sub); ws_sst.write_formula('B9', "=ROUNDDOWN(AVERAGE(B3:B8), 2)", auto); ws_sst.write_formula('C9', "=ROUNDDOWN(AVERAGE(C3:C8), 2)", auto)
+    ws_sst.write('A10', "RSD(%)", sub); ws_sst.write_formula('B10', "=ROUNDDOWN(STDEV(B3:B8)/B9*100, 2)", auto); ws_sst.write_formula('C10', "=ROUNDDOWN(STDEV(C3:C8)/C9*100, 2)", auto)
+    ws_sst.write('A12', "Criteria (RSD):", sub); ws_sst.write('B12', crit['sst'].short, cell)
+    ws_sst.write('C12', "Criteria (Tail):", sub); ws_sst.write('D12', f"{crit['sst_tailing'].short} (Inj #1)", cell) 
+    ws_sst.write('E12', "Result:", sub)
+    ws_sst.write_formula('F12', f'=IF(AND({crit["sst"].excel("B10")}, {crit["sst"].excel("C10")}, {crit["sst_tailing"].excel("E3")}), "Pass", "Fail")', pass_fmt)
+    ws_sst.conditional_format('F12', {'type': 'cell', 'criteria': '==', 'value': '"Fail"', 'format': fail_fmt})
+
+    # [Criteria Added]
+    ws_sst.write('A14', f"※ Criteria: RSD {crit['sst'].short}", crit_fmt)
+    ws_sst.write('A15', f"1) RSD of RT & Area {crit['sst'].short}")
+    ws_sst.write('A16', f"2) Tailing Factor (1st Inj) {crit['sst_tailing'].short}")
+
+    # 3. Specificity Sheet
+    ws_spec = workbook.add_worksheet("3. Specificity"); ws_spec.set_column('A:E', 20)
+    ws_spec.merge_range('A1:E1', 'Specificity Test (Identification & Interference)', header)
+    
+    # [Reference Data from SST] - SST 결과값 자동 참조
+    ws_spec.write('A3', "Ref. Std RT (min):", sub); ws_spec.write_formula('B3', "='2. SST'!B9", num) # SST Mean RT
+    ws_spec.write('C3', "Ref. Std Area:", sub); ws_spec.write_formula('D3', "='2. SST'!C9", num) # SST Mean Area
+    
+    # -----------------------------------------------------------
+    # Part 1. Identification (RT Match) - 주성분 확인
+    # -----------------------------------------------------------
+    ws_spec.merge_range('A5:E5', "1. Identification (RT Match)", sub_rep)
+    ws_spec.write_row('A6', ["Sample", "RT (min)", "Diff with Std (%)", "Criteria (≤2.0%)", "Result"], sub)
+    
+    # 검체(Sample) 1개 예시
+    ws_spec.write('A7', "Sample", cell)
+    ws_spec.write('B7', "", calc) # 사용자 입력 (검체 RT)
+    
+    # RT 차이(%) = abs(검체RT - 표준RT) / 표준RT * 100
+    ws_spec.write_formula('C7', f"=IF(B7=\"\",\"\",ROUNDDOWN(ABS(B7-$B$3)/$B$3*100, 2))", auto)
+    ws_spec.write('D7', "≤ 2.0%", cell)
+    ws_spec.write_formula('E7', f'=IF(C7=\"\",\"\",IF(C7<=2.0, "Pass", "Fail"))', pass_fmt)
+    ws_spec.conditional_format('E7', {'type': 'cell', 'criteria': '==', 'value': '"Fail"', 'format': fail_fmt})
+
+    # -----------------------------------------------------------
+    # Part 2. Interference (Area Check) - 간섭 확인
+    # -----------------------------------------------------------
+    ws_spec.merge_range('A9:E9', "2. Interference (Blank/Placebo Check)", sub_rep)
+    ws_spec.write_row('A10', ["Sample", "Detected RT", "Area", "Interference (%)", "Result (≤0.5%)"], sub)
+    
+    for i, s in enumerate(["Blank", "Placebo"]):
+        row = i + 11
+        ws_spec.write(row, 0, s, cell)
+        ws_spec.write(row, 1, "", calc) # RT 입력 (간섭 피크가 떴을 때)
+        ws_spec.write(row, 2, "", calc) # Area 입력
+        
+        # 간섭율(%) = (간섭피크 면적 / 표준액 평균 면적) * 100
+        # 분모(D3)가 0이거나 비어있을 때 에러 방지
+        ws_spec.write_formula(row, 3, f"=IF(OR($D$3=\"\",$D$3=0), \"\", IF(C{row+1}=\"\", 0, ROUNDDOWN(C{row+1}/$D$3*100, 2)))", auto)
+        
+        # 판정: 0.5% 이하 Pass
+        ws_spec.write_formula(row, 4, f'=IF(D{row+1}<=0.5, "Pass", "Fail")', pass_fmt)
+        ws_spec.conditional_format(f'E{row+1}', {'type': 'cell', 'criteria': '==', 'value': '"Fail"', 'format': fail_fmt})
+
+    # [Criteria Added]
+    ws_spec.write(14, 0, "※ Acceptance Criteria:", crit_fmt)
+    ws_spec.write(15, 0, "1) Interference Peak Area ≤ 0.5% of Standard Area")
+
+    # 4. Linearity Sheet (Uses Actual Stock Conc)
+    target_conc = params.get('Target_Conc')
+    if target_conc:
+        ws2 = workbook.add_worksheet("4. Linearity"); ws2.set_column('A:I', 13)
+        unit = params.get('Unit', 'ppm'); ws2.merge_range('A1:I1', f'Linearity Test (Target: {target_conc} {unit})', header)
+        row = 3; rep_rows = {1: [], 2: [], 3: []}
+        
+        for rep in range(1, 4):
+            ws2.merge_range(row, 0, row, 8, f"■ Repetition {rep}", sub_rep); row += 1
+            ws2.write_row(row, 0, ["Level", "Conc (X)", "Area (Y)", "Back Calc", "Accuracy (%)", "Check"], sub); row += 1
+            data_start = row
+            for level in [80, 90, 100, 110, 120]:
+                # Conc (X) now links to Info Sheet Actual Stock * (Level/100) or similar dilution logic
+                # Assuming simple dilution from stock: Actual Stock * (Level % of Target / Stock?) -> This depends on recipe.
+                # Simplified: Actual Stock * (Target * Level% / Stock_Target_Ratio)
+                # Let's assume standard dilution: X = Actual_Stock * (Level/100) if Stock was made to be 100%. 
+                # But stock is usually hi-conc. Let's assume the user prepared levels to match 80%~120% of TARGET.
+                # So Conc X = Target_Conc_Theoretical * (Actual_Stock / Theoretical_Stock) * Level%
+                # Ideally, simple reference: =Actual_Stock_Cell * Dilution_Factor
+                # For this template, we will allow user to input Actual Conc X or calc from Info.
+                # Best approach: X = Actual Stock * (Level_Target / Stock_Target)
+                ws2.write(row, 0, f"{level}%", cell)
+                # Here we simply assume they diluted to nominal targets relative to the actual stock
+                # Formula: =Info!ActualStock * (Level/100) * (Target/Stock_User_Input) -> Complex.
+                # Use simplified: =ROUNDDOWN(ActualStock * (Level/100), 3) assuming Stock is ~100% target or normalized.
+                # Let's link to the calculated actual stock from Info sheet as base
+                ws2.write_formula(row, 1, f"=ROUNDDOWN({actual_stock_ref} * ({level}/100), 3)", num) # Dynamic Actual Conc
+                ws2.write(row, 2, slot_value(measured, ("lin", level, rep), "area"), calc)
+                rep_rows[rep].append(row + 1)
+                ind_slope = f"C{data_start+7}"; ind_int = f"C{data_start+8}"
+                ws2.write_formula(row, 3, f"=IF(C{row+1}<>\"\", ROUNDDOWN((C{row+1}-{ind_int})/{ind_slope}, 3), \"\")", auto)
+                ws2.write_formula(row, 4, f"=IF(C{row+1}<>\"\", ROUNDDOWN(D{row+1}/B{row+1}*100, 1), \"\")", auto)
+                ws2.write(row, 5, "OK", cell); row += 1
+            ws2.write(row, 1, "Slope:", sub); ws2.write_formula(row, 2, f"=SLOPE(C{data_start+1}:C{row}, B{data_start+1}:B{row})", auto)
+            ws2.write(row+1, 1, "Intercept:", sub); ws2.write_formula(row+1, 2, f"=INTERCEPT(C{data_start+1}:C{row}, B{data_start+1}:B{row})", auto)
+            ws2.write(row+2, 1, "R²:", sub); ws2.write_formula(row+2, 2, f"=RSQ(C{data_start+1}:C{row}, B{data_start+1}:B{row})", auto)
+            chart = workbook.add_chart({'type': 'scatter', 'subtype': 'straight_with_markers'})
+            chart.add_series({'name': f'Rep {rep}', 'categories': f"='4. Linearity'!$B${data_start+1}:$B${row}", 'values': f"='4. Linearity'!$C${data_start+1}:$C${row}", 'trendline': {'type': 'linear', 'display_equation': True, 'display_r_squared': True}})
+            chart.set_size({'width': 350, 'height': 220}); ws2.insert_chart(f'G{data_start}', chart)
+            row += 6
+
+        ws2.merge_range(row, 0, row, 8, "■ Summary (Mean of 3 Reps) & Final Check", sub_rep); row += 1
+        ws2.write_row(row, 0, ["Level", "Conc (X)", "Mean Area", "STDEV", "% RSD", "Criteria (RSD≤5%)"], sub); row += 1
+        summary_start = row
+        for i, level in enumerate([80, 90, 100, 110, 120]):
+            r1 = rep_rows[1][i]; r2 = rep_rows[2][i]; r3 = rep_rows[3][i]
+            ws2.write(row, 0, f"{level}%", cell); ws2.write_formula(row, 1, f"=B{r1}", num)
+            ws2.write_formula(row, 2, f"=ROUNDDOWN(AVERAGE(C{r1},C{r2},C{r3}), 2)", auto)
+            ws2.write_formula(row, 3, f"=ROUNDDOWN(STDEV(C{r1},C{r2},C{r3}), 2)", auto)
+            ws2.write_formula(row, 4, f"=ROUNDDOWN(IF(C{row+1}=0, 0, D{row+1}/C{row+1}*100), 2)", auto)
+            ws2.write_formula(row, 5, f'=IF(E{row+1}<=5.0, "Pass", "Fail")', pass_fmt)
+            row += 1
+        row += 1
+        slope_cell = f"'4. Linearity'!C{row+1}"; int_cell = f"'4. Linearity'!C{row+2}"
+        ws2.write(row, 1, "Slope:", sub); ws2.write_formula(row, 2, f"=ROUNDDOWN(SLOPE(C{summary_start+1}:C{summary_start+5}, B{summary_start+1}:B{summary_start+5}), 4)", auto)
+        ws2.write(row+1, 1, "Intercept:", sub); ws2.write_formula(row+1, 2, f"=ROUNDDOWN(INTERCEPT(C{summary_start+1}:C{summary_start+5}, B{summary_start+1}:B{summary_start+5}), 4)", auto)
+        ws2.write(row+2, 1, "R²:", sub); ws2.write_formula(row+2, 2, f"=ROUNDDOWN(RSQ(C{summary_start+1}:C{summary_start+5}, B{summary_start+1}:B{summary_start+5}), 4)", auto)
+        ws2.write(row+2, 3, f"Criteria ({crit['r2'].short}):", sub); ws2.write_formula(row+2, 4, f'=IF({crit["r2"].excel(f"C{row+3}")}, "Pass", "Fail")', pass_fmt)
+
+    # [Criteria Added]
+    ws2.write(row+4, 0, "※ Acceptance Criteria:", crit_fmt)
+    ws2.write(row+5, 0, f"1) Coefficient of determination (R²) {crit['r2'].short}")
+    ws2.write(row+6, 0, "2) %RSD of peak areas at each level ≤ 5.0%")
+
+    # 5. Accuracy Sheet
+    ws_acc = workbook.add_worksheet("5. Accuracy"); ws_acc.set_column('A:G', 15)
+    ws_acc.merge_range('A1:G1', 'Accuracy (Recovery)', header)
+    
+    # Reference Linearity Slope/Int
+    ws_acc.write('E3', "Slope:", sub); ws_acc.write_formula('F3', f"='4. Linearity'!C{row+1}", auto)
+    ws_acc.write('E4', "Int:", sub); ws_acc.write_formula('F4', f"='4. Linearity'!C{row+2}", auto)
+    ws_acc.write('G3', "(From Linearity)", cell)
+    
+    acc_row = 6
+    for level in [80, 100, 120]:
+        ws_acc.merge_range(acc_row, 0, acc_row, 6, f"■ Level {level}% (3 Reps)", sub_rep); acc_row += 1
+        ws_acc.write_row(acc_row, 0, ["Rep", "Theo Conc", "Area", "Calc Conc", "Recovery (%)", "Criteria", "Result"], sub); acc_row += 1
+        start_r = acc_row
+        for rep in range(1, 4):
+            ws_acc.write(acc_row, 0, rep, cell)
+            # Theo Conc Formula
+            ws_acc.write_formula(acc_row, 1, f"=ROUNDDOWN({actual_stock_ref} * ({level}/100), 3)", num3)
+            ws_acc.write(acc_row, 2, slot_value(measured, ("acc", level, rep), "area"), calc)
+            ws_acc.write_formula(acc_row, 3, f'=IF(C{acc_row+1}="","",ROUNDDOWN((C{acc_row+1}-$F$4)/$F$3, 3))', auto)
+            ws_acc.write_formula(acc_row, 4, f'=IF(D{acc_row+1}="","",ROUNDDOWN(D{acc_row+1}/B{acc_row+1}*100, 1))', auto)
+            ws_acc.write(acc_row, 5, crit['acc_mean'].short, cell)
+            ws_acc.write_formula(acc_row, 6, f'=IF(E{acc_row+1}="","",IF({crit["acc_mean"].excel(f"E{acc_row+1}")}, "Pass", "Fail"))', pass_fmt)
+            ws_acc.conditional_format(f'G{acc_row+1}', {'type': 'cell', 'criteria': '==', 'value': '"Fail"', 'format': fail_fmt}); acc_row += 1
+        ws_acc.write(acc_row, 3, "Mean Rec(%):", sub); ws_acc.write_formula(acc_row, 4, f"=ROUNDDOWN(AVERAGE(E{start_r+1}:E{acc_row}), 1)", total_fmt); acc_row += 2
+    
+    # [Criteria Added]
+    ws_acc.write(acc_row, 0, "※ Acceptance Criteria:", crit_fmt)
+    ws_acc.write(acc_row+1, 0, f"1) Individual & Mean Recovery: {crit['acc_mean'].short}")
+
+    # 6. Precision, 7. Robustness, 8. LOD/LOQ (Same as before)
+    ws3 = workbook.add_worksheet("6. Precision"); ws3.set_column('A:E', 15); ws3.merge_range('A1:E1', 'Precision', header)
+    ws3.merge_range('A3:E3', "■ Day 1 (Repeatability)", sub); ws3.write_row('A4', ["Inj", "Sample", "Result", "Mean", "RSD"], sub)
+    for i in range(6): ws3.write_row(4+i, 0, [i+1, "Sample", ""], calc)
+    ws3.write_formula('D5', "=ROUNDDOWN(AVERAGE(C5:C10), 2)", num); ws3.write_formula('E5', "=ROUNDDOWN(STDEV(C5:C10)/D5*100, 2)", num)
+    ws3.write('E11', f"Check (RSD {crit['prec_rsd'].short}):", sub); ws3.write_formula('E12', f'=IF({crit["prec_rsd"].excel("E5")}, "Pass", "Fail")', pass_fmt)
+    ws3.merge_range('A14:E14', "■ Day 2 (Intermediate Precision)", sub); ws3.write_row('A15', ["Inj", "Sample", "Result", "Mean", "RSD"], sub)
+    for i in range(6): ws3.write_row(15+i, 0, [i+1, "Sample", ""], calc)
+    ws3.write_formula('D16', "=ROUNDDOWN(AVERAGE(C16:C21), 2)", num); ws3.write_formula('E16', "=ROUNDDOWN(STDEV(C16:C21)/D16*100, 2)", num)
+    ws3.write('A23', "Diff (%)", sub); ws3.write_formula('B23', "=ROUNDDOWN(ABS(D5-D16)/AVERAGE(D5,D16)*100, 2)", num)
+
+    if params.get('Detail_Robustness'):
+        ws4 = workbook.add_worksheet("7. Robustness"); ws4.set_column('A:F', 18); ws4.merge_range('A1:F1', 'Robustness Conditions', header)
+        ws4.write_row('A3', ["Condition", "Set", "Actual", "SST Result", "Pass/Fail", "Note"], sub)
+        for r, c in enumerate(["Standard", "Flow -0.1", "Flow +0.1", "Temp -2", "Temp +2"]): 
+            ws4.write(4+r, 0, c, cell); ws4.write_row(4+r, 1, [""]*5, calc)
+
+    ws_ll = workbook.add_worksheet("8. LOD_LOQ"); ws_ll.set_column('A:E', 15); ws_ll.merge_range('A1:E1', 'LOD / LOQ', header)
+    ws_ll.write_row('A2', ["Item", "Signal", "Noise", "S/N Ratio", "Result"], sub)
+    ws_ll.write('A3', "LOD Sample", cell); ws_ll.write('B3', "", calc); ws_ll.write('C3', "", calc); ws_ll.write_formula('D3', "=ROUNDDOWN(B3/C3, 1)", auto)
+    ws_ll.write_formula('E3', f'=IF({crit["lod_sn"].excel("D3")}, "Pass", "Fail")', pass_fmt)
+    ws_ll.write('A4', "LOQ Sample", cell); ws_ll.write('B4', "", calc); ws_ll.write('C4', "", calc); ws_ll.write_formula('D4', "=ROUNDDOWN(B4/C4, 1)", auto)
+    ws_ll.write_formula('E4', f'=IF({crit["loq_sn"].excel("D4")}, "Pass", "Fail")', pass_fmt)
+
+    workbook.close(); output.seek(0)
+    return output
+
+# [Data Extractor: 원시 측정값 → 통계 엔진]
+def _num(v):
+    try: return float(v)
+    except (TypeError, ValueError): return float("nan")
+
+def read_logbook_arrays(sheets):
+    """작성된 로그북의 시트별 원시 측정값(반복 배열)을 읽는다. sheets: {시트명: DataFrame(header=None)}"""
+    raw = {}
+    info = sheets.get('1. Info')
+    target = _num(info.iloc[9, 1]) if info is not None and info.shape[0] > 9 else float("nan")
+
+    sst = sheets.get('2. SST')
+    if sst is not None and sst.shape[0] > 7:
+        raw['sst_area'] = [_num(v) for v in sst.iloc[2:8, 2]]
+        raw['sst_rt'] = [_num(v) for v in sst.iloc[2:8, 1]]
+        raw['sst_tailing'] = [_num(sst.iloc[2, 4])]      # Tailing (1st Inj) — F12 판정 칸 E3
+
+    lin = sheets.get('4. Linearity')
+    if lin is not None:
+        xs, ys = [], []
+        for _, r in lin.iterrows():
+            label = str(r.iloc[0])
+            if label.startswith("■ Summary"): break
+            if label.endswith("%") and label[:-1].isdigit():
+                x = _num(r.iloc[1])
+                # 수식 캐시값이 없거나 0 이면 (엑셀에서 재계산 전 — xlsxwriter 는 캐시값 0 을 저장) Level × Target 으로 대체
+                xs.append(x if x > 0 else target * int(label[:-1]) / 100); ys.append(_num(r.iloc[2]))
+        raw['lin_x'], raw['lin_y'] = xs, ys
+
+    acc = sheets.get('5. Accuracy')
+    if acc is not None:
+        areas, theos = [], []; level = None
+        for _, r in acc.iterrows():
+            label = str(r.iloc[0])
+            if label.startswith("■ Level"): level = _num(label.split()[2].rstrip("%"))
+            elif level is not None and label in ("1", "2", "3", "1.0", "2.0", "3.0"):
+                theo = _num(r.iloc[1])
+                theos.append(theo if theo > 0 else target * level / 100); areas.append(_num(r.iloc[2]))
+        raw['acc_area'], raw['acc_theo'] = areas, theos
+
+    prec = sheets.get('6. Precision')
+    if prec is not None and prec.shape[0] > 9: raw['prec'] = [_num(v) for v in prec.iloc[4:10, 2]]
+
+    ll = sheets.get('8. LOD_LOQ')
+    if ll is not None and ll.shape[0] > 3:
+        raw['lod'] = [_num(ll.iloc[2, 1]), _num(ll.iloc[2, 2])]
+        raw['loq'] = [_num(ll.iloc[3, 1]), _num(ll.iloc[3, 2])]
+    return raw
+
+def extract_logbook_data(uploaded_file):
+    from validation_stats import summarize_runs
+    try:
+        # 모든 시트를 한 번에 읽고, 판정값은 엑셀 수식 캐시 대신 원시 반복 측정값에서 직접 계산
+        sheets = pd.read_excel(uploaded_file, sheet_name=None, header=None)
+        return summarize_runs([read_logbook_arrays(sheets)])[0]
+    except Exception as e: return {'error': str(e)}
+
+def extract_cds_data(uploaded_file, target_conc=None, peak=None):
+    """CDS 피크 테이블(CSV/TXT) → 로그북 없이 바로 결과 계산 (extract_logbook_data 와 같은 형식)"""
+    from cds_import import import_peak_table, to_raw
+    from validation_stats import summarize_runs
+    try: return summarize_runs([to_raw(import_peak_table(uploaded_file, peak), target_conc)])[0]
+    except Exception as e: return {'error': str(e)}
+
+# [판정 로직] 보고서 결과 요약표 · 노션 결과 반영 공통 — 기준은 PARAM 문구를 컴파일한 acceptance_criteria 한 곳에서
+def judge_results(data, criteria=DEFAULT_CRITERIA):
+    """[(항목, 기준, 결과 문자열, Pass/Fail/-)]"""
+    return criteria.judge(data)
+
+# [보고서 공통] 상세 결과 서술 (num: 절 번호 '3' / '4.2', level: 헤딩 수준)
+def add_result_details(doc, add_h, data, crit, num, level=2):
+    # 1 특이성
+    add_h(f'{num}.1 특이성 (Specificity)', level)
+    doc.add_paragraph("공시험액 및 위약에서 주성분 피크와 겹치는 간섭 피크는 관찰되지 않아 특이성을 만족하였다.")   
+
+    # 2 직선성
+    add_h(f'{num}.2 직선성 (Linearity)', level)
+    r2_val = data.get('r2', 'N/A')
+    if crit['r2'].passes(r2_val):
+        doc.add_paragraph(f"80~120% 농도 범위에서 회귀분석 결과, 결정계수(R²)는 {r2_val}로 확인되어 판정 기준({crit['r2'].short})을 만족하는 우수한 직선성을 보였다.")
+    else:
+        doc.add_paragraph(f"결정계수(R²)가 {r2_val}로 확인되어 직선성 기준을 만족하지 못하였다.")
+
+    # 3 정확성
+    add_h(f'{num}.3 정확성 (Accuracy)', level)
+    acc_val = data.get('acc_mean', 'N/A')
+    if crit['acc_mean'].passes(acc_val):
+        doc.add_paragraph(f"각 농도별 평균 회수율은 {acc_val}%로 확인되어, 판정 기준({crit['acc_mean'].short})을 만족하였다.")
+    else:
+        doc.add_paragraph(f"평균 회수율이 {acc_val}%로 확인되어 정확성 기준을 벗어났다.")
+
+    # 4 정밀성
+    add_h(f'{num}.4 정밀성 (Precision)', level)
+    prec_val = data.get('prec_rsd', 'N/A')
+    if crit['prec_rsd'].passes(prec_val):
+        doc.add_paragraph(f"반복성 시험 결과(n=6), 피크 면적의 상대표준편차(RSD)는 {prec_val}%로 확인되어 판정 기준({crit['prec_rsd'].short})을 만족하였다.")
+    else:
+        doc.add_paragraph(f"RSD가 {prec_val}%로 확인되어 정밀성 기준을 만족하지 못하였다.")
+
+    # 5 정량한계
+    add_h(f'{num}.5 정량한계 (LOQ)', level)
+    loq_val = data.get('loq_sn', 'N/A')
+    if crit['loq_sn'].passes(loq_val):
+        doc.add_paragraph(f"LOQ 농도에서 S/N 비는 {loq_val}로 확인되어 판정 기준({crit['loq_sn'].short})을 만족하였다.")
+    else:
+        doc.add_paragraph(f"S/N 비가 {loq_val}로 확인되어 LOQ 기준 미달이다.")
+
+# [보고서 공통] 결과 요약표 → Fail 여부
+def add_result_summary(doc, data, crit):
+    from docx.shared import RGBColor
+    t_res = doc.add_table(rows=1, cols=4); t_res.style = 'Table Grid'
+    headers = ["항목 (Test Item)", "기준 (Criteria)", "결과 (Result)", "판정 (Judgement)"]
+    for i, h in enumerate(headers): t_res.rows[0].cells[i].text = h; set_table_header_style(t_res.rows[0].cells[i])
+    
+    items = judge_results(data, crit)
+
+    has_fail = False
+    for item, crit_text, res, judge_res in items:
+        row = t_res.add_row().cells
+        row[0].text = item; row[1].text = crit_text; row[2].text = res; row[3].text = judge_res
+        if judge_res == "Fail": 
+            row[3].paragraphs[0].runs[0].font.color.rgb = RGBColor(255, 0, 0)
+            has_fail = True
+        elif judge_res == "Pass":
+            row[3].paragraphs[0].runs[0].font.color.rgb = RGBColor(0, 128, 0)
+    return has_fail
+
+# [보고서 공통] 서명란
+def add_signature(doc, context):
+    doc.add_paragraph("\n\n")
+    t_sign = doc.add_table(rows=2, cols=2); t_sign.style = 'Table Grid'
+    t_sign.rows[0].cells[0].text = "작성자 (Analyzed By)"; t_sign.rows[0].cells[1].text = "승인자 (Approved By)"
+    set_table_header_style(t_sign.rows[0].cells[0]); set_table_header_style(t_sign.rows[0].cells[1])
+    t_sign.rows[1].cells[0].text = f"\n{context.get('analyst', '연구원')}\nDate: {datetime.now().strftime('%Y-%m-%d')}"
+    t_sign.rows[1].cells[1].text = "\n\nDate: __________________"
+
+# [Final Report: 정의됨]
+def generate_summary_report_gmp(method_name, category, params, context, extracted_data, criteria=None):
+    from docx import Document
+    from docx.shared import RGBColor
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    doc = Document(); set_korean_font(doc)
+    add_page_number(doc) # Footer 페이지 번호 추가
+    
+    # -----------------------------------------------
+    # 1. 헤더 (좌측 정렬 + 문서번호)
+    # -----------------------------------------------
+    section = doc.sections[0]; header = section.header
+    doc_no = make_doc_no("VR", method_name)
+    vp_no = make_doc_no("VP", method_name) # 계획서 번호
+    
+    p_head = header.paragraphs[0]; p_head.alignment = WD_ALIGN_PARAGRAPH.LEFT
+    r1 = p_head.add_run(f"Document No.: {doc_no}\n"); r1.bold=True; set_font(r1)
+    r2 = p_head.add_run(f"Ref. Protocol No.: {vp_no}\n"); set_font(r2)
+    r3 = p_head.add_run(f"Date: {datetime.now().strftime('%Y-%m-%d')}"); set_font(r3)
+
+    doc.add_paragraph()
+    title = doc.add_heading('시험법 밸리데이션 최종 보고서', 0)
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    doc.add_paragraph(f"(Validation Report for {method_name})").alignment = WD_ALIGN_PARAGRAPH.CENTER
+    doc.add_paragraph()
+
+    # 공통 헤딩 함수
+    def add_h(text, level):
+        p = doc.add_paragraph(); p.style = doc.styles[f'Heading {level}']; r = p.add_run(text); set_font(r)
+
+    # 1. 개요 및 목적
+    add_h('1. 개요 및 목적 (Introduction & Objective)', 1)
+    doc.add_paragraph(f"본 보고서는 '{method_name}' 시험법이 의약품 품질 관리에 적합함을 입증하기 위해 실시한 밸리데이션 결과를 요약한 것이다.")
+    doc.add_paragraph("본 밸리데이션은 승인된 밸리데이션 계획서(VP)에 따라 수행되었으며, 설정된 판정 기준을 만족하는지 평가하였다.")
+
+    # 2. 적용 범위 및 근거
+    add_h('2. 적용 범위 및 근거 가이드라인 (Scope & References)', 1)
+    doc.add_paragraph("2.1 적용 범위 (Scope)")
+    doc.add_paragraph(f"• 대상 시험법: {method_name}")
+    doc.add_paragraph("• 대상 검체: 원료의약품(Drug Substance) 및 완제의약품(Drug Product)")
+    doc.add_paragraph("• 평가 항목: 특이성, 직선성, 정확성, 정밀성(반복성), 정량한계 등")
+    doc.add_paragraph("2.2 근거 가이드라인 (Reference Guidelines)")
+    doc.add_paragraph("• ICH Q2(R2) Validation of Analytical Procedures")
+    doc.add_paragraph("• 식품의약품안전처(MFDS) 의약품등 시험방법 밸리데이션 가이드라인")
+    doc.add_paragraph("• USP <1225> Validation of Compendial Procedures")
+
+    # 3. 상세 시험 결과 (서술형)
+    add_h('3. 상세 시험 결과 (Detailed Test Results)', 1)
+    data = extracted_data if extracted_data else {}
+    crit = criteria or compile_criteria(params)     # 요약표 · 서술 · 로그북 수식이 같은 기준을 쓴다
+    add_result_details(doc, add_h, data, crit, "3")
+
+    # 4. 결과 요약 (표)
+    add_h('4. 밸리데이션 결과 요약 (Result Summary)', 1)
+    has_fail = add_result_summary(doc, data, crit)
+
+    # 5. 종합 결론 (Fail 대응 포함)
+    add_h('5. 종합 결론 (Conclusion)', 1)
+    
+    if has_fail:
+        p = doc.add_paragraph()
+        run = p.add_run("[부적합 발생] 일부 항목이 판정 기준을 벗어났다 (Out of Specification).")
+        run.bold = True; run.font.color.rgb = RGBColor(255, 0, 0)
+        doc.add_paragraph("• 조치 사항: SOP-QA-00X '일탈 관리 및 OOS 처리' 절차에 따라 일탈 보고서를 발행하고 원인 분석(Root Cause Analysis)을 실시해야 한다.")
+        doc.add_paragraph("• 리스크 평가: 시험법의 정확성 및 재현성에 중대한 영향을 미칠 수 있으므로, 원인 규명 및 재시험 완료 전까지 해당 시험법의 사용을 중단한다.")
+    else:
+        doc.add_paragraph("모든 밸리데이션 항목이 설정된 판정 기준을 만족하였으므로, 본 시험법은 의약품 품질 평가에 적합(Suitable)함을 확인하였다.")
+        doc.add_paragraph("따라서 본 시험법을 표준 시험 절차(STP)로 제정하여 정기 시험에 적용할 것을 승인한다.")
+        
+    # 6. 서명
+    add_signature(doc, context)
+    
+    doc_io = io.BytesIO(); doc.save(doc_io); doc_io.seek(0)
+    return doc_io
+
+# [Validation Dossier: 계획 전체 Method 일괄 보고서]
+def generate_validation_dossier(modality, phase, plan_rows, results, context, criteria=None):
+    """
+    plan_rows 의 모든 Method 를 문서 하나로: 수행 전략표 → 판정 매트릭스 → Method 별 상세 결과(4.n) → 종합 결론.
+    results: {method: 결과 dict} (없는 Method 는 '결과 없음'), criteria: {method: CriteriaSet} (없으면 기본 기준).
+    문서 · 스타일 · 페이지 번호는 1회만 만들고, 판정은 evaluate() 로 전체 Method 를 한 번에 한다.
+    """
+    from docx import Document
+    from docx.shared import RGBColor
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.enum.text import WD_BREAK
+    criteria = criteria or {}
+    doc = Document(); set_korean_font(doc)
+    add_page_number(doc)
+    # 헤딩 스타일 ID 는 1회만 조회 (p.style = ... 는 매번 전체 스타일 목록을 훑는다)
+    styles = {lv: doc.styles[f'Heading {lv}'].style_id for lv in (1, 2, 3)}
+    def add_h(text, level):
+        p = doc.add_paragraph(); p._p.style = styles[level]; r = p.add_run(text); set_font(r)
+
+    doc_no = make_doc_no("VD", modality)
+    p_head = doc.sections[0].header.paragraphs[0]; p_head.alignment = WD_ALIGN_PARAGRAPH.LEFT
+    r1 = p_head.add_run(f"Document No.: {doc_no}\n"); r1.bold=True; set_font(r1)
+    r2 = p_head.add_run(f"Date: {datetime.now().strftime('%Y-%m-%d')}"); set_font(r2)
+
+    doc.add_paragraph()
+    doc.add_heading('시험법 밸리데이션 종합 보고서', 0).alignment = WD_ALIGN_PARAGRAPH.CENTER
+    doc.add_paragraph(f"(Validation Dossier: {modality} / {phase})").alignment = WD_ALIGN_PARAGRAPH.CENTER
+    doc.add_paragraph()
+
+    # 1. 개요
+    add_h('1. 개요 및 목적 (Introduction & Objective)', 1)
+    doc.add_paragraph(f"본 보고서는 {modality} {phase} 밸리데이션 계획에 포함된 시험법 {len(plan_rows)}건의 밸리데이션 결과를 종합한 것이다.")
+    doc.add_paragraph("각 시험법은 승인된 밸리데이션 계획서(VP)에 따라 수행되었으며, 시험법별 PARAM 판정 기준을 적용하여 평가하였다.")
+
+    # 2. 수행 전략
+    add_h('2. 밸리데이션 수행 전략 (Validation Strategy)', 1)
+    add_strategy_table(doc, plan_rows)
+
+    # 3. 판정 매트릭스 (전체 Method 일괄 판정)
+    add_h('3. 판정 매트릭스 (Verdict Matrix)', 1)
+    methods = [str(row['Method']) for row in plan_rows]
+    table = pd.DataFrame([{"method": m, **(results.get(m) or {})} for m in methods])
+    verdicts = evaluate(table, criteria) if len(table) else pd.DataFrame(columns=[*REPORT_METRICS, "Verdict"])
+    colors = {"Fail": RGBColor(255, 0, 0), "Pass": RGBColor(0, 128, 0)}
+    t_mx = doc.add_table(rows=1, cols=len(REPORT_METRICS) + 2); t_mx.style = 'Table Grid'
+    labels = ["Method", *(DEFAULT_CRITERIA[m].label for m in REPORT_METRICS), "종합 판정"]
+    for i, h in enumerate(labels): t_mx.rows[0].cells[i].text = h; set_table_header_style(t_mx.rows[0].cells[i])
+    for m, row in zip(methods, verdicts.itertuples(index=False)):
+        cells = t_mx.add_row().cells; cells[0].text = m
+        for i, v in enumerate(row, 1):
+            if m not in results: v = "결과 없음" if i == len(row) else "-"
+            cells[i].text = v
+            if v in colors: cells[i].paragraphs[0].runs[0].font.color.rgb = colors[v]
+    failed = [m for m, v in zip(methods, verdicts["Verdict"]) if v == "Fail" and m in results]
+    missing = [m for m in methods if m not in results]
+
+    # 4. Method 별 상세 결과
+    add_h('4. 시험법별 상세 결과 (Results by Method)', 1)
+    for n, row in enumerate(plan_rows, 1):
+        m = methods[n - 1]
+        if n > 1: doc.add_paragraph().add_run().add_break(WD_BREAK.PAGE)
+        add_h(f'4.{n} {m} ({row["Category"]})', 2)
+        doc.add_paragraph(f"Ref. Report No.: {make_doc_no('VR', m)}")
+        if m not in results:
+            doc.add_paragraph("결과 없음: 저장된 로그북 · CDS 결과가 없어 판정하지 않았다.")
+            continue
+        crit = criteria.get(m, DEFAULT_CRITERIA)
+        add_result_details(doc, add_h, results[m], crit, f"4.{n}", level=3)
+        add_result_summary(doc, results[m], crit)
+
+    # 5. 종합 결론
+    add_h('5. 종합 결론 (Conclusion)', 1)
+    if failed:
+        p = doc.add_paragraph()
+        run = p.add_run(f"[부적합 발생] {len(failed)}개 시험법이 판정 기준을 벗어났다 (Out of Specification): {', '.join(failed)}")
+        run.bold = True; run.font.color.rgb = RGBColor(255, 0, 0)
+        doc.add_paragraph("• 조치 사항: SOP-QA-00X '일탈 관리 및 OOS 처리' 절차에 따라 해당 시험법별 일탈 보고서를 발행하고 원인 분석을 실시해야 한다.")
+    if missing:
+        doc.add_paragraph(f"• 미완료: {len(missing)}개 시험법은 결과가 없어 본 보고서의 판정 대상에서 제외하였다: {', '.join(missing)}")
+    if not failed and not missing:
+        doc.add_paragraph("계획된 모든 시험법이 설정된 판정 기준을 만족하였으므로, 각 시험법은 의약품 품질 평가에 적합(Suitable)함을 확인하였다.")
+    elif not failed:
+        doc.add_paragraph("결과가 있는 시험법은 모두 설정된 판정 기준을 만족하였다.")
+
+    # 6. 서명
+    add_signature(doc, context)
+
+    doc_io = io.BytesIO(); doc.save(doc_io); doc_io.seek(0)
+    return doc_io
@@ -0,0 +1,211 @@
+"""
+밸리데이션 통계 엔진 (NumPy).
+
+엑셀 수식(SLOPE / INTERCEPT / RSQ / STDEV / AVERAGE)과 같은 값을 원시 반복 측정 배열에서 직접 계산한다.
+모든 함수는 마지막 축을 '관측치' 축으로 보고 앞쪽 축(Method × Run …)에 대해 벡터화되어 있으며,
+길이가 다른 데이터셋은 NaN 으로 채워(stack_datasets) 한 번에 처리한다.
+"""
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+
+def stack_datasets(arrays, width=None):
+    """길이가 다른 1차원 배열 목록 → NaN 으로 채운 (D, width) 배열"""
+    arrays = [np.asarray(a, dtype=float).ravel() for a in arrays]
+    width = width or max((len(a) for a in arrays), default=0)
+    out = np.full((len(arrays), width), np.nan)
+    for i, a in enumerate(arrays): out[i, :min(len(a), width)] = a[:width]
+    return out
+
+
+# ---------------------------------------------------------
+# 분포 함수 (scipy 없이)
+# ---------------------------------------------------------
+def _t_ppf_scalar(q, df):
+    """Student t 분위수 (Hill, 1970 Algorithm 396). q: 누적확률(>0.5), df: 자유도"""
+    if not (df >= 1) or not (0 < q < 1): return math.nan
+    if q < 0.5: return -_t_ppf_scalar(1 - q, df)
+    p = 2 * (1 - q)                               # 양측 확률
+    if df == 1: return math.tan(math.pi * (0.5 - p / 2)) if p < 1 else 0.0
+    if df == 2: return math.sqrt(2 / (p * (2 - p)) - 2)
+    a = 1 / (df - 0.5); b = 48 / (a * a)
+    c = ((20700 * a / b - 98) * a - 16) * a + 96.36
+    d = ((94.5 / (b + c) - 3) / b + 1) * math.sqrt(a * math.pi / 2) * df
+    x = d * p; y = x ** (2 / df)
+    if y > 0.05 + a:
+        x = NormalDist().inv_cdf(0.5 * p); y = x * x
+        if df < 5: c += 0.3 * (df - 4.5) * (x + 0.6)
+        c = (((0.05 * d * x - 5) * x - 7) * x - 2) * x + b + c
+        y = (((((0.4 * y + 6.3) * y + 36) * y + 94.5) / c - y - 3) / b + 1) * x
+        y = math.expm1(a * y * y)
+    else:
+        y = ((1 / (((df + 6) / (df * y) - 0.089 * d - 0.822) * (df + 2) * 3) + 0.5 / (df + 4)) * y - 1) * (df + 1) / (df + 2) + 1 / y
+    return math.sqrt(df * y)
+
+t_ppf = np.vectorize(_t_ppf_scalar, otypes=[float])
+
+
+def _betacf(a, b, x, max_iter=200, eps=3e-14):
+    # 정규화 불완전 베타함수의 연분수 전개 (Lentz)
+    tiny = 1e-300
+    qab, qap, qam = a + b, a + 1, a - 1
+    c, d = 1.0, 1 - qab * x / qap
+    d = 1 / (d if abs(d) > tiny else tiny); h = d
+    for m in range(1, max_iter + 1):
+        m2 = 2 * m
+        aa = m * (b - m) * x / ((qam + m2) * (a + m2))
+        d = 1 + aa * d; d = 1 / (d if abs(d) > tiny else tiny)
+        c = 1 + aa / c; c = c if abs(c) > tiny else tiny
+        h *= d * c
+        aa = -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))
+        d = 1 + aa * d; d = 1 / (d if abs(d) > tiny else tiny)
+        c = 1 + aa / c; c = c if abs(c) > tiny else tiny
+        delta = d * c; h *= delta
+        if abs(delta - 1) < eps: break
+    return h
+
+def _betainc_scalar(a, b, x):
+    if not (a > 0 and b > 0) or math.isnan(x): return math.nan
+    if x <= 0: return 0.0
+    if x >= 1: return 1.0
+    ln_front = math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log1p(-x)
+    if x < (a + 1) / (a + b + 2): return math.exp(ln_front) * _betacf(a, b, x) / a
+    return 1 - math.exp(ln_front) * _betacf(b, a, 1 - x) / b
+
+betainc = np.vectorize(_betainc_scalar, otypes=[float])
+
+def f_sf(f, dfn, dfd):
+    """F 분포 상단 꼬리 확률 P(F > f) — 회귀 기울기/절편 동등성(poolability) 검정용"""
+    f = np.asarray(f, dtype=float)
+    return betainc(np.asarray(dfd, dtype=float) / 2, np.asarray(dfn, dtype=float) / 2, dfd / (dfd + dfn * np.clip(f, 0, None)))
+
+
+# ---------------------------------------------------------
+# 기술 통계
+# ---------------------------------------------------------
+def describe(values, alpha=0.05):
+    """
+    반복 측정값 (..., n) → n, mean, sd(ddof=1), rsd(%), 평균의 양측 (1-alpha) 신뢰구간.
+    엑셀 AVERAGE / STDEV / STDEV÷AVERAGE×100 과 동일.
+    """
+    v = np.asarray(values, dtype=float)
+    n = np.sum(~np.isnan(v), axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(np.isnan(v), 0, v).sum(axis=-1) / n
+        sd = np.sqrt(np.nansum((v - mean[..., None]) ** 2, axis=-1) / (n - 1))
+        sd = np.where(n > 1, sd, np.nan)
+        rsd = sd / mean * 100
+        half = t_ppf(1 - alpha / 2, np.maximum(n - 1, 1)) * sd / np.sqrt(n)
+    return {"n": n, "mean": mean, "sd": sd, "rsd": rsd, "ci_low": mean - half, "ci_high": mean + half}
+
+
+def rsd(values):
+    return describe(values)["rsd"]
+
+
+def linearity(x, y, alpha=0.05):
+    """
+    최소제곱 회귀 (..., n) → slope, intercept, r2, residuals(…, n), 기울기/절편 신뢰구간, 잔차 표준편차.
+    엑셀 SLOPE / INTERCEPT / RSQ 와 동일 (결측은 NaN 으로 두면 해당 점만 제외).
+    """
+    x = np.asarray(x, dtype=float); y = np.asarray(y, dtype=float)
+    x, y = np.broadcast_arrays(x, y)
+    mask = ~(np.isnan(x) | np.isnan(y))
+    n = mask.sum(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        xm = np.where(mask, x, 0).sum(axis=-1) / n
+        ym = np.where(mask, y, 0).sum(axis=-1) / n
+        dx = np.where(mask, x - xm[..., None], 0); dy = np.where(mask, y - ym[..., None], 0)
+        sxx = (dx * dx).sum(axis=-1); sxy = (dx * dy).sum(axis=-1); syy = (dy * dy).sum(axis=-1)
+        slope = sxy / sxx
+        intercept = ym - slope * xm
+        residuals = np.where(mask, y - (intercept[..., None] + slope[..., None] * x), np.nan)
+        ss_res = np.nansum(residuals ** 2, axis=-1)
+        r2 = sxy * sxy / (sxx * syy)
+        s_res = np.sqrt(ss_res / (n - 2))
+        tq = t_ppf(1 - alpha / 2, np.maximum(n - 2, 1))
+        se_slope = s_res / np.sqrt(sxx)
+        se_int = s_res * np.sqrt(1 / n + xm * xm / sxx)
+    valid = n > 2
+    nan = np.nan
+    return {
+        "n": n, "slope": slope, "intercept": intercept, "r2": r2, "residuals": residuals,
+        "s_res": np.where(valid, s_res, nan),
+        "slope_ci": (np.where(valid, slope - tq * se_slope, nan), np.where(valid, slope + tq * se_slope, nan)),
+        "intercept_ci": (np.where(valid, intercept - tq * se_int, nan), np.where(valid, intercept + tq * se_int, nan)),
+    }
+
+
+def back_calculate(area, slope, intercept):
+    """
+    검량선으로 역산한 실측 농도 (area - intercept) / slope.
+    area: (..., n) · slope, intercept: (...) — 데이터셋별 검량선
+    """
+    area = np.asarray(area, dtype=float)
+    slope = np.asarray(slope, dtype=float)[..., None]; intercept = np.asarray(intercept, dtype=float)[..., None]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (area - intercept) / slope
+
+
+def signal_to_noise(signal, noise):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.asarray(signal, dtype=float) / np.asarray(noise, dtype=float)
+
+
+# ---------------------------------------------------------
+# 로그북 원시 데이터 → 요약 결과 (배치)
+# ---------------------------------------------------------
+def _rounddown(v, digits):
+    # 엑셀 ROUNDDOWN 과 같은 절사 (표시값 일치)
+    f = 10.0 ** digits
+    return np.trunc(np.asarray(v, dtype=float) * f) / f
+
+def sheet_rsd(values):
+    # 로그북 SST 표: ROUNDDOWN(STDEV / ROUNDDOWN(AVERAGE, 2) × 100, 2)
+    d = describe(values)
+    with np.errstate(invalid="ignore", divide="ignore"): return _rounddown(d["sd"] / _rounddown(d["mean"], 2) * 100, 2)
+
+def level_means(x, y):
+    """
+    반복 측정 (D, n) → 농도 수준별 (X, 평균 Y) (D, k). 로그북 직선성 Summary 표와 같이 같은 X 의 반복을 묶어
+    ROUNDDOWN(AVERAGE(반복), 2) 로 평균한다 (결측 반복은 제외, 수준 수가 다른 run 은 NaN 으로 채움).
+    """
+    xs, ys = [], []
+    for xi, yi in zip(np.atleast_2d(x), np.atleast_2d(y)):
+        ok = ~np.isnan(xi)
+        lv, inv = np.unique(xi[ok], return_inverse=True); yv = yi[ok]
+        total = np.bincount(inv, np.where(np.isnan(yv), 0, yv), len(lv)); count = np.bincount(inv, ~np.isnan(yv), len(lv))
+        with np.errstate(invalid="ignore", divide="ignore"): ys.append(total / count)
+        xs.append(lv)
+    return stack_datasets(xs), _rounddown(stack_datasets(ys), 2)
+
+def summarize_runs(runs):
+    """
+    runs: 로그북에서 읽은 원시 배열 dict 목록. 키 (없으면 NaN 처리):
+        sst_area (6,), sst_rt (6,), sst_tailing (1,), lin_x (k,), lin_y (k,), acc_area (m,), acc_theo (m,), prec (6,), lod (signal, noise), loq (signal, noise)
+    반환: run 별 결과 dict 목록 — sst(Area RSD) / sst_rt(RT RSD) / sst_tailing / r2 / slope / intercept / acc_mean / prec_rsd / lod_sn / loq_sn
+    (모든 통계는 run 축으로 한 번에 벡터 연산). 직선성은 로그북 'Final R²' 와 같이 수준별 평균(level_means)으로 회귀하고,
+    정확성은 그 검량선(ROUNDDOWN 4자리)으로 역산 농도(3자리) · 회수율(1자리)을 시트와 같은 순서로 절사한다.
+    """
+    if not runs: return []
+    get = lambda key: stack_datasets([r.get(key, []) for r in runs])
+    sst, sst_rt = sheet_rsd(get("sst_area")), sheet_rsd(get("sst_rt"))
+    tailing = get("sst_tailing")
+    sst_tailing = tailing[:, 0] if tailing.shape[1] else np.full(len(runs), np.nan)
+    lin = linearity(*level_means(get("lin_x"), get("lin_y")))
+    slope, intercept = _rounddown(lin["slope"], 4), _rounddown(lin["intercept"], 4)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        conc = _rounddown(back_calculate(get("acc_area"), slope, intercept), 3)          # Calc Conc
+        rec = _rounddown(conc / get("acc_theo") * 100, 1)                                # Recovery (%)
+    acc_mean = describe(rec)["mean"]
+    prec = describe(get("prec"))["rsd"]
+    lod = get("lod"); loq = get("loq")
+    lod_sn = signal_to_noise(lod[:, 0], lod[:, 1]) if lod.shape[1] >= 2 else np.full(len(runs), np.nan)
+    loq_sn = signal_to_noise(loq[:, 0], loq[:, 1]) if loq.shape[1] >= 2 else np.full(len(runs), np.nan)
+    cols = {
+        "sst": sst, "sst_rt": sst_rt, "sst_tailing": sst_tailing, "r2": _rounddown(lin["r2"], 4), "slope": slope, "intercept": intercept,
+        "acc_mean": _rounddown(acc_mean, 1), "prec_rsd": _rounddown(prec, 2), "lod_sn": _rounddown(lod_sn, 1), "loq_sn": _rounddown(loq_sn, 1),
+    }
+    return [{k: (float(v[i]) if np.isfinite(v[i]) else "N/A") for k, v in cols.items()} for i in range(len(runs))]